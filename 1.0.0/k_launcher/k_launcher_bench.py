@@ -0,0 +1,536 @@
+
+# regular import
+import argparse
+import contextlib
+import logging
+import timeit
+import statistics
+import shutil
+import tempfile
+import subprocess
+import sys
+import time
+import os
+
+
+logging.basicConfig(level=logging.INFO)
+
+
+# CONTEXT sub-folders that the site constants may relocate, with their default name.
+CONTEXT_FOLDER_CONSTANTS = {"mirror_folder": "mirrors", "remote_refs_folder": "remote_refs"}
+
+
+@contextlib.contextmanager
+def temporary_context():
+    """
+    Points the CONTEXT folder of this process at a temporary folder, so the
+    benchmarks never touch the sessions, logs and caches of the artists.
+
+    Must be entered before the launcher modules are imported, they read the
+    folder once at import.
+
+    Yields:
+        str: The temporary CONTEXT folder.
+    """
+    from k_constants import CONSTANTS
+
+    names = ["context_folder"] + [name for name in CONTEXT_FOLDER_CONSTANTS if hasattr(CONSTANTS, name)]
+    saved = {name: getattr(CONSTANTS, name) for name in names}
+    with tempfile.TemporaryDirectory(prefix="k_launcher_bench_context_") as folder:
+        # An absolute folder replaces `root_folder` in os.path.join(root_folder, context_folder).
+        CONSTANTS.context_folder = folder
+        for name in names[1:]:
+            setattr(CONSTANTS, name, os.path.join(folder, CONTEXT_FOLDER_CONSTANTS[name]))
+        try:
+            yield folder
+        finally:
+            for name, value in saved.items():
+                setattr(CONSTANTS, name, value)
+
+
+def _time_per_call(func, number):
+    """
+    Times `func` over `number` calls.
+
+    Args:
+        func (callable): The function to time.
+        number (int): The number of calls.
+
+    Returns:
+        float: The average time per call, in microseconds.
+    """
+    return timeit.timeit(func, number=number) / number * 1e6
+
+
+def bench_session_id(number=200):
+    """
+    Measures the cost of resolving the terminal session ID per launcher invocation.
+
+    Compares the former full `cmd.exe` parent walk, the bounded walk done on a
+    cold start, the exported environment variable fast path and the in-process
+    cached value.
+
+    Args:
+        number (int): The number of calls per measure.
+
+    Returns:
+        dict: The time per call of each strategy, in microseconds.
+    """
+    import psutil
+    import k_launcher_id
+
+    def legacy_walk():
+        parent_pid = psutil.Process(os.getpid()).ppid()
+        while parent_pid:
+            parent_process = psutil.Process(parent_pid)
+            if "cmd.exe" in parent_process.name().lower():
+                return parent_pid
+            parent_pid = parent_process.ppid()
+        return None
+
+    def cold_walk():
+        k_launcher_id._SESSION_ID = None
+        return k_launcher_id.get_session_id()
+
+    saved_env = os.environ.pop(k_launcher_id.SESSION_ENV_VAR, None)
+    try:
+        results = {
+            "legacy parent walk": _time_per_call(legacy_walk, number),
+            "bounded walk (cold)": _time_per_call(cold_walk, number),
+        }
+        os.environ[k_launcher_id.SESSION_ENV_VAR] = k_launcher_id.get_session_id()
+        results["environment variable"] = _time_per_call(cold_walk, number)
+        results["cached"] = _time_per_call(k_launcher_id.get_session_id, number)
+    finally:
+        os.environ.pop(k_launcher_id.SESSION_ENV_VAR, None)
+        if saved_env is not None:
+            os.environ[k_launcher_id.SESSION_ENV_VAR] = saved_env
+        k_launcher_id._SESSION_ID = None
+
+    for name, duration in results.items():
+        logging.info(f"session id - {name}: {duration:.2f} us/call")
+    return results
+
+
+# Runs a launcher script with the CONTEXT folder given as first argument (see `temporary_context`).
+STARTUP_BOOTSTRAP = (
+    "import os, sys\n"
+    "from k_constants import CONSTANTS\n"
+    "CONSTANTS.context_folder = sys.argv.pop(1)\n"
+    "sys.argv.pop(0)\n"
+    "sys.path.insert(0, os.path.dirname(sys.argv[0]))\n"
+    "with open(sys.argv[0]) as script:\n"
+    "    code = compile(script.read(), sys.argv[0], 'exec')\n"
+    "exec(code, {'__name__': '__main__', '__file__': sys.argv[0]})\n"
+)
+
+# Subcommands whose cold start is tracked: (script, arguments).
+STARTUP_COMMANDS = {
+    "rez --info": ("k_launcher_rez.py", ["--info"]),
+    "rez --context": ("k_launcher_rez.py", ["--context"]),
+    "git --info": ("k_launcher_git.py", ["--info"]),
+    "git --context": ("k_launcher_git.py", ["--context"]),
+}
+
+
+def _parse_importtime(stderr):
+    """
+    Parses the `-X importtime` report of a Python process.
+
+    Args:
+        stderr (str): The standard error of the process.
+
+    Returns:
+        tuple: The total import time in milliseconds and a list of
+               `(cumulative_ms, module)` for the top-level imports.
+    """
+    top_level = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        if not module.startswith("  "):
+            top_level.append((int(cumulative_us) / 1000, module.strip()))
+    return sum(duration for duration, _module in top_level), sorted(top_level, reverse=True)
+
+
+def bench_startup(number=5, top=5):
+    """
+    Measures the cold-start latency of each launcher subcommand.
+
+    Every subcommand of `STARTUP_COMMANDS` is run `number` times in a fresh
+    interpreter with `-X importtime`, the median wall time and import time are
+    logged along with the most expensive top-level imports. The subcommands use
+    the CONTEXT folder of this process (see `temporary_context`).
+
+    Args:
+        number (int): The number of runs per subcommand.
+        top (int): The number of top-level imports to report.
+
+    Returns:
+        dict: The median wall and import times per subcommand, in milliseconds.
+    """
+    from k_constants import CONSTANTS
+
+    folder = os.path.dirname(os.path.abspath(__file__))
+    context_folder = os.path.join(CONSTANTS.root_folder, CONSTANTS.context_folder)
+    results = {}
+    for name, (script, arguments) in STARTUP_COMMANDS.items():
+        wall_times, import_times, imports = [], [], []
+        for _run in range(number):
+            start = time.perf_counter()
+            result = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", STARTUP_BOOTSTRAP, context_folder,
+                 os.path.join(folder, script)] + arguments,
+                capture_output=True,
+                text=True,
+            )
+            wall_times.append((time.perf_counter() - start) * 1000)
+            import_time, imports = _parse_importtime(result.stderr)
+            import_times.append(import_time)
+
+        results[name] = {"wall": statistics.median(wall_times), "imports": statistics.median(import_times)}
+        logging.info(
+            f"startup - {name}: {results[name]['wall']:.1f} ms wall, {results[name]['imports']:.1f} ms imports "
+            f"(top: {', '.join(f'{module} {duration:.1f} ms' for duration, module in imports[:top])})"
+        )
+    return results
+
+
+def _make_package_tree(root_folder, packages, versions):
+    """
+    Creates a synthetic rez repository of `packages` x `versions` package.py files.
+    """
+    for package_index in range(packages):
+        for version_index in range(versions):
+            version = f"{package_index % 13}.{version_index}"
+            folder = os.path.join(root_folder, f"package_{package_index}", version)
+            os.makedirs(folder)
+            with open(os.path.join(folder, "package.py"), "w") as file:
+                file.write(f'name = "package_{package_index}"\nversion = "{version}"\n')
+
+
+def bench_package_index(packages=500, versions=20, number=3):
+    """
+    Compares the former `os.walk` scan of `parse_packages_files` with the package index
+    on a synthetic repository of `packages * versions` versions (10k by default).
+
+    Args:
+        packages (int): The number of packages of the synthetic repository.
+        versions (int): The number of versions per package.
+        number (int): The number of runs per measure, the best one is kept.
+
+    Returns:
+        dict: The time of each strategy, in milliseconds.
+    """
+    import k_launcher_index
+    from k_constants import CONSTANTS
+
+    def legacy_walk(root_folder, version):
+        package_files = []
+        for foldername, subfolders, filenames in os.walk(root_folder):
+            for filename in filenames:
+                if filename == CONSTANTS.package and version in foldername:
+                    package_files.append(os.path.join(foldername, filename))
+        return package_files
+
+    def best_of(func):
+        durations = []
+        for _run in range(number):
+            start = time.perf_counter()
+            result = func()
+            durations.append((time.perf_counter() - start) * 1000)
+        return min(durations), result
+
+    folder = tempfile.mkdtemp(prefix="k_launcher_bench_")
+    try:
+        root_folder = os.path.join(folder, "packages")
+        index_file = os.path.join(folder, "index.json")
+        _make_package_tree(root_folder, packages, versions)
+
+        results = {}
+        results["os.walk"], walk_matches = best_of(lambda: legacy_walk(root_folder, "1.0"))
+
+        def cold_build():
+            if os.path.exists(index_file):
+                os.remove(index_file)
+            index = k_launcher_index.PackageIndex(root_folder, index_file)
+            index.refresh()
+            return index
+        results["index build (cold)"], _index = best_of(cold_build)
+
+        def warm_query():
+            index = k_launcher_index.PackageIndex(root_folder, index_file)
+            index.refresh()
+            return index.find(version="1.0")
+        results["index refresh + query (warm)"], index_matches = best_of(warm_query)
+
+        def warm_deep_query():
+            index = k_launcher_index.PackageIndex(root_folder, index_file)
+            index.refresh(deep=True)
+            return index.find(version="1.0")
+        results["index deep refresh + query (warm)"], _matches = best_of(warm_deep_query)
+
+        index = k_launcher_index.PackageIndex(root_folder, index_file)
+        results["query by name + range (loaded)"], _matches = best_of(
+            lambda: index.find(name="package_42", version_range="3.5+<3.15")
+        )
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    for name, duration in results.items():
+        logging.info(f"package index - {name}: {duration:.1f} ms")
+    logging.info(
+        f"package index - version '1.0': os.walk matched {len(walk_matches)} file(s) by substring, "
+        f"the index matched {len(index_matches)} exact version(s)."
+    )
+    return results
+
+
+def _count_spawns(func):
+    """
+    Runs `func` and counts the processes it spawns, including the asyncio ones.
+
+    Args:
+        func (callable): The function to run.
+
+    Returns:
+        tuple: The number of processes spawned and the wall time, in milliseconds.
+    """
+    spawns = []
+    execute_child = subprocess.Popen._execute_child
+
+    def counting_execute_child(self, args, *other_args, **kwargs):
+        spawns.append(args)
+        return execute_child(self, args, *other_args, **kwargs)
+
+    subprocess.Popen._execute_child = counting_execute_child
+    try:
+        start = time.perf_counter()
+        func()
+        duration = (time.perf_counter() - start) * 1000
+    finally:
+        subprocess.Popen._execute_child = execute_child
+    return len(spawns), duration
+
+
+def _make_git_repository(folder, commits, branches, files):
+    """
+    Creates a repository of `commits` commits touching `files` files, with `branches`
+    branches and a tag every 10 commits, in a single `git fast-import`, and clones it.
+
+    Returns:
+        str: The clone, whose remote branches are the branches of the repository.
+    """
+    origin = os.path.join(folder, "origin.git")
+    subprocess.run(["git", "init", "--quiet", "--bare", origin], check=True)
+    subprocess.run(["git", "symbolic-ref", "HEAD", "refs/heads/main"], cwd=origin, check=True)
+    stream = []
+    for index in range(commits):
+        message = f"Commit {index}\n\nBody of commit {index}.\n"
+        stream.append(
+            f"commit refs/heads/main\nmark :{index + 1}\n"
+            f"committer Bench <bench@k_launcher> {1700000000 + index * 60} +0000\n"
+            f"data {len(message)}\n{message}"
+        )
+        for file_index in range(files) if index == 0 else [index % files]:
+            content = f"{file_index} {index}\n"
+            stream.append(f"M 100644 inline file_{file_index}.txt\ndata {len(content)}\n{content}")
+        stream.append("")
+    for branch_index in range(branches):
+        stream.append(f"reset refs/heads/branch_{branch_index}\nfrom :{commits - branch_index}\n")
+    for tag_index in range(0, commits, 10):
+        stream.append(f"reset refs/tags/v{tag_index}\nfrom :{tag_index + 1}\n")
+    subprocess.run(["git", "fast-import", "--quiet"], input="\n".join(stream), text=True, cwd=origin, check=True)
+
+    clone = os.path.join(folder, "clone")
+    subprocess.run(["git", "clone", "--quiet", origin, clone], check=True)
+    return clone
+
+
+def bench_git_queries(commits=500, branches=20, files=200, number=5):
+    """
+    Compares git subprocesses with the in-process GitPython queries of `k_git_cmd`
+    on a typical listing: remote branches, last 20 commits, full history and the
+    dirty check of `checkout_branch` (always answered by git).
+
+    The in-process queries are measured with an empty repository cache (first
+    query of a launcher call) and with the cached repository (UI, batch).
+
+    Args:
+        commits (int): The number of commits of the synthetic repository.
+        branches (int): The number of remote branches.
+        files (int): The number of tracked files.
+        number (int): The number of runs per measure, the best one is kept.
+
+    Returns:
+        dict: The spawn count and wall time in milliseconds of each strategy.
+    """
+    import k_launcher_git_cmd
+
+    command = k_launcher_git_cmd.k_git_cmd()
+    folder = tempfile.mkdtemp(prefix="k_launcher_bench_")
+    results = {}
+    logging.disable(logging.INFO)
+    try:
+        repo_path = _make_git_repository(folder, commits, branches, files)
+
+        def listing():
+            command.list_remote_branches(folder, "clone")
+            command.show_commit_log(folder, "clone", n=20)
+            command.list_repository_history(folder, "clone")
+            command.is_dirty(repo_path)
+
+        def best_of(prepare):
+            runs = []
+            for _run in range(number):
+                prepare()
+                runs.append(_count_spawns(listing))
+            return {"spawns": runs[-1][0], "wall": min(duration for _spawns, duration in runs)}
+
+        command.git_in_process = False
+        results["git subprocesses"] = best_of(lambda: None)
+
+        command.git_in_process = True
+        if "git" not in sys.modules:
+            spawns, duration = _count_spawns(k_launcher_git_cmd.import_gitpython)
+            results["GitPython import"] = {"spawns": spawns, "wall": duration}
+        if k_launcher_git_cmd.import_gitpython() is None:
+            logging.disable(logging.NOTSET)
+            logging.warning("git queries - GitPython is not installed, only git subprocesses were measured.")
+        else:
+            results["in process (cold)"] = best_of(command.clear_repos)
+            results["in process (cached)"] = best_of(lambda: None)
+    finally:
+        command.clear_repos()
+        logging.disable(logging.NOTSET)
+        shutil.rmtree(folder, ignore_errors=True)
+
+    for name, result in results.items():
+        logging.info(f"git queries - {name}: {result['wall']:.1f} ms, {result['spawns']} spawn(s)")
+    return results
+
+
+def _make_many_files_repository(folder, files, per_folder=1000):
+    """
+    Creates a repository of one commit with `files` files spread over folders of
+    `per_folder` files, in a single `git fast-import`, and clones it.
+
+    Returns:
+        str: The clone.
+    """
+    origin = os.path.join(folder, "origin.git")
+    subprocess.run(["git", "init", "--quiet", "--bare", origin], check=True)
+    subprocess.run(["git", "symbolic-ref", "HEAD", "refs/heads/main"], cwd=origin, check=True)
+    message = "Assets\n"
+    stream = [f"commit refs/heads/main\ncommitter Bench <bench@k_launcher> 1700000000 +0000\ndata {len(message)}\n{message}"]
+    for file_index in range(files):
+        content = f"asset {file_index}\n"
+        stream.append(
+            f"M 100644 inline assets/folder_{file_index // per_folder}/asset_{file_index}.txt\n"
+            f"data {len(content)}\n{content}"
+        )
+    stream.append("")
+    subprocess.run(["git", "fast-import", "--quiet"], input="\n".join(stream), text=True, cwd=origin, check=True)
+
+    clone = os.path.join(folder, "clone")
+    subprocess.run(["git", "clone", "--quiet", origin, clone], check=True)
+    return clone
+
+
+def bench_many_files(files=200000, changed=10, number=3):
+    """
+    Measures the working tree queries of `k_git_cmd` on a synthetic repository of
+    `files` files, before and after `apply_many_files_profile`: `git status`, the
+    dirty check of `checkout_branch`, and the staging of `commit_repository` with
+    `git add --all` or with the `changed` known paths only.
+
+    Args:
+        files (int): The number of tracked files.
+        changed (int): The number of files edited before each staging.
+        number (int): The number of runs per measure, the best one is kept.
+
+    Returns:
+        dict: The time of each measure in milliseconds, per profile.
+    """
+    import k_launcher_git_cmd
+
+    command = k_launcher_git_cmd.k_git_cmd()
+    folder = tempfile.mkdtemp(prefix="k_launcher_bench_")
+    results = {}
+    logging.disable(logging.INFO)
+    try:
+        repo_path = _make_many_files_repository(folder, files)
+        step = max(files // changed, 1)
+        paths = [f"assets/folder_{index // 1000}/asset_{index}.txt" for index in range(0, files, step)][:changed]
+
+        def best_of(func, stage=False):
+            durations = []
+            for run in range(number):
+                if stage:
+                    for path in paths:
+                        with open(os.path.join(repo_path, path), "a") as file:
+                            file.write(f"edit {run}\n")
+                start = time.perf_counter()
+                func()
+                durations.append((time.perf_counter() - start) * 1000)
+                if stage:
+                    command.run_git(["reset", "--quiet", "--hard"], repo_path)
+            return min(durations)
+
+        def measure():
+            command.clear_repos()
+            return {
+                "git status": best_of(lambda: command.run_git(["status", "--porcelain"], repo_path)),
+                "dirty check": best_of(lambda: command.is_dirty(repo_path)),
+                "git add --all": best_of(lambda: command.run_git(["add", "--all"], repo_path), stage=True),
+                "stage known paths": best_of(lambda: command.stage_paths(repo_path, paths), stage=True),
+            }
+
+        results["default"] = measure()
+        command.apply_many_files_profile(folder, "clone")
+        results["many files"] = measure()
+    finally:
+        command.clear_repos()
+        logging.disable(logging.NOTSET)
+        shutil.rmtree(folder, ignore_errors=True)
+
+    settings = ", ".join(f"{key}={value}" for key, value in k_launcher_git_cmd.k_git_cmd.get_many_files_config().items())
+    logging.info(f"many files - {files} files, profile: {settings}")
+    for measure_name in results["default"]:
+        logging.info(
+            f"many files - {measure_name}: {results['default'][measure_name]:.0f} ms -> "
+            f"{results['many files'][measure_name]:.0f} ms"
+        )
+    return results
+
+
+BENCHMARKS = {
+    "session_id": bench_session_id,
+    "startup": bench_startup,
+    "package_index": bench_package_index,
+    "git_queries": bench_git_queries,
+    "many_files": bench_many_files,
+}
+
+
+def main():
+    """
+    Runs the requested benchmarks in a temporary CONTEXT folder and logs their results.
+    """
+    parser = argparse.ArgumentParser(description="k_launcher_bench - Micro-benchmarks of the launcher hot paths.")
+    parser.add_argument("benchmarks", nargs="*", help=f"Benchmarks to run among: {', '.join(sorted(BENCHMARKS))} (default: all)")
+    args = parser.parse_args()
+
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"Unknown benchmark(s): {', '.join(sorted(unknown))}")
+
+    with temporary_context():
+        for name in args.benchmarks or sorted(BENCHMARKS):
+            logging.info(f"Running benchmark '{name}'...")
+            BENCHMARKS[name]()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,25 +2,357 @@
 
 # regular import
 import os
-import json
+import glob
+import time
+import atexit
+import socket
 import logging
 
 # custom packages import
 from k_constants import CONSTANTS
 import k_launcher_id
+import k_launcher_storage
 
 
 PACKAGE_CONTEXT_FILE = os.path.join(CONSTANTS.root_folder, CONSTANTS.context_folder, CONSTANTS.package_context)
 
+# Sessions not saved for this long are dropped by the garbage collection (seconds).
+SESSION_TTL = getattr(CONSTANTS, "context_session_ttl", 30 * 24 * 3600)
+# Inline garbage collection runs at most once per interval, within the time budget (seconds).
+GC_INTERVAL = getattr(CONSTANTS, "context_gc_interval", 3600)
+GC_INLINE_BUDGET = getattr(CONSTANTS, "context_gc_budget", 0.05)
+
+SESSION_META_KEY = "_session"
+
+# Output of the commands launched from each session: <SESSION_LOG_FOLDER>/<session id>.log[.N]
+SESSION_LOG_FOLDER = os.path.join(CONSTANTS.root_folder, CONSTANTS.context_folder, "logs")
+
+
+# Process wide store: the session context is read once per process and every
+# save is kept in memory until a single flush at exit. The "None" session of the
+# legacy file mixed every terminal that could not be identified, it is dropped.
+_STORE = k_launcher_storage.ShardedContextStore(PACKAGE_CONTEXT_FILE, legacy_skipped=("None",))
+_SESSION_CACHE = {}
+_DIRTY_SESSIONS = {}
+_TIMINGS = {"reads": 0, "read_time": 0.0, "writes": 0, "write_time": 0.0}
+_FLUSH_REGISTERED = False
+
+
+def _read_session(session_id):
+    """
+    Reads the stored context of a session and records the time spent doing it.
+
+    Args:
+        session_id (str): The session to read.
+
+    Returns:
+        dict or None: The stored context of the session, or None if not found.
+    """
+    start = time.perf_counter()
+    try:
+        return _STORE.load(session_id)
+    finally:
+        _TIMINGS["reads"] += 1
+        _TIMINGS["read_time"] += time.perf_counter() - start
+
+
+def _mark_dirty(session_id, dataName):
+    """
+    Flags a context key as modified and registers the exit flush on first use.
+
+    Args:
+        session_id (str): The session whose context changed.
+        dataName (str): The modified context key.
+    """
+    global _FLUSH_REGISTERED
+    _DIRTY_SESSIONS.setdefault(session_id, set()).add(dataName)
+    if not _FLUSH_REGISTERED:
+        atexit.register(flush_all_contexts)
+        _FLUSH_REGISTERED = True
+
+
+def flush_all_contexts():
+    """
+    Writes the modified keys of every session back to the context store.
+
+    Each session is written to its own shard under lock, only the keys changed by
+    this process are merged so concurrent saves of other keys are kept.
+    """
+    if not _DIRTY_SESSIONS:
+        return
+
+    for session_id, keys in list(_DIRTY_SESSIONS.items()):
+        context = _SESSION_CACHE[session_id]
+        values = {key: context[key] for key in keys}
+        values[SESSION_META_KEY] = _session_meta(session_id)
+        start = time.perf_counter()
+        try:
+            _STORE.update(session_id, values)
+        except (OSError, TimeoutError) as e:
+            logging.error(f"Failed to save context for session {session_id}: {e}")
+            continue
+        finally:
+            _TIMINGS["writes"] += 1
+            _TIMINGS["write_time"] += time.perf_counter() - start
+        del _DIRTY_SESSIONS[session_id]
+
+    logging.debug(
+        f"Context store: {_TIMINGS['reads']} read(s) in {_TIMINGS['read_time'] * 1000:.2f} ms, "
+        f"{_TIMINGS['writes']} write(s) in {_TIMINGS['write_time'] * 1000:.2f} ms"
+    )
+
+    _collect_stale_sessions_inline()
+
+
+def get_context_timings():
+    """
+    Returns the file round-trips done by the context store in this process.
+
+    Returns:
+        dict: Number of reads and writes and the time spent on each, in seconds.
+    """
+    return dict(_TIMINGS)
+
+
+def _session_meta(session_id):
+    """
+    Builds the bookkeeping stored with a session, used by the garbage collection.
+
+    Args:
+        session_id (str): The session identifier (see `k_launcher_id.get_session_id`).
+
+    Returns:
+        dict: The last update time, the host and, when available, the PID and
+              create time of the terminal owning the session.
+    """
+    meta = {"updated": time.time(), "host": socket.gethostname()}
+    pid, create_time = k_launcher_id.parse_session_id(session_id)
+    if pid is None:
+        return meta
+
+    meta["pid"] = pid
+    if create_time is not None:
+        meta["create_time"] = create_time
+        return meta
+
+    # Bare PID session (older launcher or exported value), ask the system.
+    import psutil
+    try:
+        meta["create_time"] = psutil.Process(pid).create_time()
+    except psutil.Error:
+        pass
+    return meta
+
+
+def _stale_reason(session_id, context, mtime, now, ttl):
+    """
+    Tells whether a stored session can be dropped.
+
+    The CONTEXT folder is shared by every workstation, a PID is only checked when
+    the session belongs to this host (metadata, or host tag of the ID). Sessions of
+    other hosts, or of an unknown host (older launcher), only expire after `ttl`.
+
+    Args:
+        session_id (str): The session identifier.
+        context (dict): The stored context of the session.
+        mtime (float): The modification time of the session file.
+        now (float): The current time.
+        ttl (float): The maximum age of a session, in seconds.
+
+    Returns:
+        str or None: "expired", "dead" or "reused" if the session is stale, None otherwise.
+    """
+    import psutil
+
+    meta = context.get(SESSION_META_KEY) or {}
+    if now - meta.get("updated", mtime) > ttl:
+        return "expired"
+    if "host" in meta:
+        local = meta["host"] == socket.gethostname()
+    else:
+        local = k_launcher_id.parse_session_host(session_id) == k_launcher_id.get_host_tag()
+    if not local:
+        return None
+
+    pid = meta.get("pid")
+    if pid is None:
+        pid, create_time = k_launcher_id.parse_session_id(session_id)
+        if pid is None:
+            return None
+        if create_time is not None:
+            meta = dict(meta, create_time=create_time)
+
+    if not psutil.pid_exists(pid):
+        return "dead"
+
+    if "create_time" in meta:
+        try:
+            if abs(psutil.Process(pid).create_time() - meta["create_time"]) > 1:
+                return "reused"
+        except psutil.NoSuchProcess:
+            return "dead"
+        except psutil.Error:
+            pass
+    return None
+
+
+def _remove_session_logs(session_id):
+    """
+    Removes the log file of a session and its rotated backups.
+
+    Args:
+        session_id (str): The session identifier.
+    """
+    for path in glob.glob(os.path.join(glob.escape(SESSION_LOG_FOLDER), glob.escape(f"{session_id}.log") + "*")):
+        try:
+            os.remove(path)
+        except OSError as e:
+            logging.debug(f"Failed to remove the session log {path}: {e}")
+
+
+def _remove_expired_logs(now, ttl):
+    """
+    Removes the session logs not written for more than `ttl` seconds, including
+    the logs of sessions that never saved a context.
+
+    Args:
+        now (float): The current time.
+        ttl (float): The maximum age of a log, in seconds.
+
+    Returns:
+        int: The number of removed files.
+    """
+    removed = 0
+    try:
+        entries = list(os.scandir(SESSION_LOG_FOLDER))
+    except OSError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.is_file() and now - entry.stat().st_mtime > ttl:
+                os.remove(entry.path)
+                removed += 1
+        except OSError as e:
+            logging.debug(f"Failed to remove the session log {entry.path}: {e}")
+    return removed
+
+
+def _measure_store():
+    """
+    Measures the total size of the stored sessions and the time to load all of them.
+
+    Returns:
+        dict: The number of sessions, their size in bytes and the load time in seconds.
+    """
+    shards = _STORE.scan()
+    start = time.perf_counter()
+    for _session_id, path, _size, _mtime in shards:
+        k_launcher_storage.read_json_file(path)
+    return {
+        "sessions": len(shards),
+        "bytes": sum(shard[2] for shard in shards),
+        "load_time": time.perf_counter() - start,
+    }
+
+
+def collect_stale_sessions(ttl=None, budget=None, report=True):
+    """
+    Drops the stored sessions whose terminal is gone or that expired.
+
+    A session is stale when it was not saved for more than `ttl` seconds or, for
+    the sessions of this host only, when its terminal PID is no longer alive or
+    was reused by another process (create time mismatch). The current session is
+    never dropped. The log files of the dropped sessions (see `SESSION_LOG_FOLDER`)
+    are removed with them, as are the logs older than `ttl` and the lock files
+    left without their shard for more than `ttl`.
+
+    Args:
+        ttl (float, optional): The maximum age of a session in seconds,
+                               defaults to `SESSION_TTL`.
+        budget (float, optional): Stops after this many seconds, the remaining
+                                  sessions are checked by the next pass.
+        report (bool): Measures the store before and after the pass.
+
+    Returns:
+        dict: The removed sessions by reason, the number of expired logs and orphan
+              lock files removed (`logs_removed` and `locks_removed`, complete
+              passes only) and, if `report` is set, the
+              size and load time of the store before and after the pass.
+
+    Logs:
+        - Info: The number of removed sessions and the before/after measures.
+    """
+    ttl = SESSION_TTL if ttl is None else ttl
+    current_session = k_launcher_id.get_session_id()
+    result = {"removed": {}, "checked": 0, "complete": True}
+    if report:
+        result["before"] = _measure_store()
+
+    start = time.perf_counter()
+    now = time.time()
+    for session_id, path, _size, mtime in _STORE.scan():
+        if budget is not None and time.perf_counter() - start > budget:
+            result["complete"] = False
+            break
+        result["checked"] += 1
+        if session_id == current_session:
+            continue
+
+        context = k_launcher_storage.read_json_file(path, {})
+        reason = _stale_reason(session_id, context, mtime, now, ttl)
+        if reason:
+            _STORE.remove(session_id)
+            _remove_session_logs(session_id)
+            result["removed"].setdefault(reason, []).append(session_id)
+
+    if result["complete"]:
+        result["logs_removed"] = _remove_expired_logs(now, ttl)
+        result["locks_removed"] = _STORE.remove_orphan_locks(ttl)
+
+    removed = sum(len(sessions) for sessions in result["removed"].values())
+    if report:
+        result["after"] = _measure_store()
+        before, after = result["before"], result["after"]
+        logging.info(
+            f"Context GC removed {removed} session(s) "
+            f"({', '.join(f'{reason}: {len(ids)}' for reason, ids in result['removed'].items()) or 'none'}). "
+            f"Size {before['bytes']} -> {after['bytes']} bytes, "
+            f"load time {before['load_time'] * 1000:.2f} -> {after['load_time'] * 1000:.2f} ms."
+        )
+    elif removed:
+        logging.debug(f"Context GC removed {removed} session(s).")
+    return result
+
+
+def _collect_stale_sessions_inline():
+    """
+    Runs a time-bounded garbage collection at most once per `GC_INTERVAL`.
+
+    The time of the last pass is shared between processes through the
+    modification time of a marker file in the session folder.
+    """
+    marker = os.path.join(_STORE.folder, ".gc")
+    try:
+        if os.path.exists(marker) and time.time() - os.path.getmtime(marker) < GC_INTERVAL:
+            return
+        with open(marker, "a"):
+            os.utime(marker, None)
+        collect_stale_sessions(budget=GC_INLINE_BUDGET, report=False)
+    except (OSError, TimeoutError) as e:
+        logging.debug(f"Context GC skipped: {e}")
+
 
 class PackageContextManager:
     """
     Manages the context for the current session by saving and loading 
     information (e.g., package, branch, or path) using a session ID as the key.
 
+    Each session is stored in its own file (see `k_launcher_storage.ShardedContextStore`)
+    so terminals sharing the CONTEXT folder never rewrite each other's context.
+
     Attributes:
         session_id (str): The unique identifier for the current session, 
-                          retrieved from the terminal process ID.
+                          built from the terminal process ID and creation time.
 
     Raises:
         ValueError: If the session ID cannot be retrieved.
@@ -33,91 +365,93 @@ class PackageContextManager:
             ValueError: If the terminal title cannot be retrieved, 
                         indicating a problem obtaining the session ID.
         """
-        self.session_id = str(k_launcher_id.get_terminal_pid())
+        self.session_id = k_launcher_id.get_session_id()
         if not self.session_id:
             raise ValueError("Could not retrieve terminal title")
 
     def save_data_context(self, dataName, dataValue):
         """
-        Saves the current context (e.g., package, branch, or path) to a JSON file 
-        using the session ID as the key.
+        Saves the current context (e.g., package, branch, or path) to the JSON file 
+        of the session.
 
         Args:
             dataName (str): The name of the context variable to save.
             dataValue (str): The value of the context variable to save.
 
         Behavior:
-            - Reads the existing context from the JSON file, if it exists.
-            - Updates or adds the context information for the current session.
-            - Writes the updated context back to the JSON file.
+            - Updates or adds the context information for the current session in memory.
+            - Schedules a single locked, atomic write of the session file at exit
+              (see `flush_data_context`).
 
         Logs:
             - Logs a success message when the context is saved.
             - Logs a warning if the session ID is unavailable.
 
         Warnings:
-            If the JSON file cannot be decoded, starts with a fresh context.
+            If the session file cannot be decoded, starts with a fresh context.
 
         Raises:
             None.
         """
-        context = {}
-        if os.path.exists(PACKAGE_CONTEXT_FILE):
-            with open(PACKAGE_CONTEXT_FILE, "r") as file:
-                try:
-                    context = json.load(file)
-                except json.JSONDecodeError:
-                    logging.warning("Failed to decode JSON, starting fresh.")
-
         if self.session_id:
-            if self.session_id in context:
-                context[self.session_id].update({dataName: dataValue})
-            else:
-                context[self.session_id] = {dataName: dataValue}
-
-            with open(PACKAGE_CONTEXT_FILE, "w") as file:
-                json.dump(context, file, indent=4)
+            self._get_session_context().update({dataName: dataValue})
+            _mark_dirty(self.session_id, dataName)
             logging.info(f"{dataName} context saved: {dataValue}")
         else:
             logging.warning("Failed to get the session ID.")
 
+    def flush_data_context(self):
+        """
+        Writes the pending context changes to the JSON file now instead of at exit.
+
+        Useful before a long blocking call (e.g. launching a DCC) so other
+        terminals see the updated context right away.
+        """
+        flush_all_contexts()
+
+    def _get_session_context(self):
+        """
+        Returns the in-memory context of the current session, reading the
+        context file on first access only.
+
+        Returns:
+            dict: The live context dictionary of the current session.
+        """
+        if self.session_id not in _SESSION_CACHE:
+            context = _read_session(self.session_id)
+            if context is not None:
+                _SESSION_CACHE[self.session_id] = context
+            else:
+                logging.warning(f"No context found for session {self.session_id}.")
+                _SESSION_CACHE[self.session_id] = {}
+        return _SESSION_CACHE[self.session_id]
+
     def load_data_context(self):
         """
-        Loads the context (e.g., package, branch, or path) from a JSON file 
-        using the session ID as the key.
+        Loads the context (e.g., package, branch, or path) from the JSON file 
+        of the session.
 
         Returns:
             dict: The loaded context for the current session, or an empty 
                   dictionary if the context is not found.
 
         Behavior:
-            - Reads the JSON file for saved context data.
-            - Checks if the current session ID exists in the loaded context.
+            - Reads the session JSON file only the first time, later calls reuse the
+              in-memory context of the session.
             - Retrieves context values (e.g., package, branch, or path) 
               if available.
 
         Logs:
             - Logs a warning if the session ID is not found in the file.
-            - Logs a warning if the file does not exist.
 
         Raises:
             None.
         """
-        if os.path.exists(PACKAGE_CONTEXT_FILE):
-            with open(PACKAGE_CONTEXT_FILE, "r") as file:
-                saveValue = json.load(file)
-                if self.session_id in saveValue:
-                    context = saveValue[self.session_id]
-                    self.package = context.get("package")
-                    self.branch = context.get("branch")
-                    self.path = context.get("path")
-                    return context
-                else:
-                    logging.warning(f"No context found for session {self.session_id}.")
-                    return {}
-        else:
-            logging.warning("Context file not found.")
-            return {}
+        context = self._get_session_context()
+        self.package = context.get("package")
+        self.branch = context.get("branch")
+        self.path = context.get("path")
+        return context
 
     def get_data_context(self):
         """
@@ -137,4 +471,5 @@ class PackageContextManager:
         context = self.load_data_context()
         if context:
             for key, val in context.items():
-                logging.info(f"context : {key} value is {val}")
+                if key != SESSION_META_KEY:
+                    logging.info(f"context : {key} value is {val}")
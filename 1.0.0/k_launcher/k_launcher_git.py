@@ -2,12 +2,12 @@
 # regular import
 import argparse
 import logging
+import json
 import sys
 import os
 
 # custom packages import
 import k_launcher_info
-import k_launcher_utils
 import k_launcher_git_cmd
 import k_launcher_context
 import k_launcher_id
@@ -26,21 +26,24 @@ class KLauncher_git(k_launcher_git_cmd.k_git_cmd,
 
     def __init__(self):
         """
-        Initializes the KLauncher_git object, setting up the session ID, repository dictionary,
-        and loading the context from a saved file.
+        Initializes the KLauncher_git object, setting up the session ID and loading
+        the context from a saved file. The repository registry is read on first use.
         """
         self.package = None
         self.branch = None
         self.path = None
+        self.worktree_base = None
         self.url = None
-        self.session_id = str(k_launcher_id.get_terminal_pid())
-        self.load_repo_dict()
+        self.session_id = k_launcher_id.get_session_id()
         self.load_data_context()
 
-    def parse_args(self):
+    @staticmethod
+    def parse_args():
         """
         Parses command-line arguments for Git operations.
 
+        Static so the arguments can be parsed before building the launcher.
+
         Returns:
             argparse.Namespace: Parsed arguments object.
         """
@@ -49,11 +52,33 @@ class KLauncher_git(k_launcher_git_cmd.k_git_cmd,
         parser.add_argument("-i", "--info", action="store_true", help="Display information about the tool.")
         parser.add_argument("-p", "--package", type=str, help="Load package")
         parser.add_argument("-co", "--context", action="store_true", help="Display the current context")
+        parser.add_argument("-cgc", "--context_gc", action="store_true", help="Remove the context of closed sessions")
         parser.add_argument("-gc", "--git_clone", action="store_true", help="GIT clone command.")
+        parser.add_argument("-cd", "--clone_depth", type=int, help="Shallow clone of the last N commits.")
+        parser.add_argument("-cf", "--clone_filter", choices=k_launcher_git_cmd.CLONE_FILTERS, help="Partial clone filter.")
+        parser.add_argument("-csb", "--clone_single_branch", action="store_true", default=None, help="Clone a single branch.")
+        parser.add_argument("-cab", "--clone_all_branches", dest="clone_single_branch", action="store_false", default=None, help="Clone every branch, even when shallow.")
+        parser.add_argument("-cre", "--clone_reference", type=str, help="Local repository or mirror to borrow objects from.")
+        parser.add_argument("-mf", "--many_files", action="store_true", default=None, help="Use the many files profile (with -gc: on the clone).")
+        parser.add_argument("-cst", "--clone_stats", action="store_true", help="Display the recorded clone times and sizes.")
+        parser.add_argument("-ri", "--repo_import", type=str, help="Add the repositories of a manifest file to the registry.")
+        parser.add_argument("-rfd", "--repo_find", type=str, help="Find repositories of the registry by name, prefix or similar name.")
+        parser.add_argument("-mu", "--mirror_update", action="store_true", help="Update the mirrors of the registry in the background.")
+        parser.add_argument("-nm", "--no_mirror", action="store_true", help="Clone and fetch from the remote, not the mirror.")
         parser.add_argument("-gf", "--git_fetch", action="store_true", help="GIT fetch command.")
         parser.add_argument("-gp", "--git_pull", action="store_true", help="GIT pull command.")
+        parser.add_argument("-gs", "--git_status", action="store_true", help="GIT status command.")
+        parser.add_argument("-sa", "--status_all", "--status-all", action="store_true", help="Display the status of every local repository.")
+        parser.add_argument("-rf", "--refresh", action="store_true", help="Ignore the cached status snapshot and remote refs.")
+        parser.add_argument("-all", "--all", action="store_true", help="Run fetch/pull/status on every repository of the registry.")
+        parser.add_argument("-rp", "--repos", nargs="+", help="Run fetch/pull/status on the listed repositories.")
+        parser.add_argument("-gw", "--git_workers", type=int, help="Number of repositories processed in parallel.")
+        parser.add_argument("-gt", "--git_timeout", type=float, help="Timeout of each git command, in seconds.")
         parser.add_argument("-ch", "--git_check", action="store_true", help="GIT checkout command.")
+        parser.add_argument("-wt", "--worktree", action="store_true", default=None, help="Check out branches in their own worktree.")
+        parser.add_argument("-wl", "--worktree_list", action="store_true", help="List the worktrees of the package.")
         parser.add_argument("-c", "--git_commit", action="store_true", help="GIT commit command.")
+        parser.add_argument("-fl", "--files", nargs="+", help="Only stage these changed paths on commit.")
         parser.add_argument("-cr", "--git_create", action="store_true", help="GIT create branch command.")
         parser.add_argument("-gl", "--git_list", action="store_true", help="GIT list command.")
         parser.add_argument("-log", "--git_log", action="store_true", help="GIT log command.")
@@ -64,6 +89,7 @@ class KLauncher_git(k_launcher_git_cmd.k_git_cmd,
         parser.add_argument("-b", "--branch", type=str, help="Branch name.")
         parser.add_argument("-m", "--msg", type=str, help="Message.")
         parser.add_argument("-vs", "--vs_code", action="store_true", help="launch vs code with the path and package")
+        parser.add_argument("-js", "--json", action="store_true", help="Print the results as JSON on stdout.")
 
         return parser.parse_args()
 
@@ -74,33 +100,45 @@ class KLauncher_git(k_launcher_git_cmd.k_git_cmd,
         Args:
             args (argparse.Namespace): Parsed command-line arguments.
         """
+        context = self.load_data_context()
+
+        if args.git_timeout:
+            self.git_timeout = args.git_timeout
+
+        if args.no_mirror:
+            self.use_mirrors = False
+
         if args.package:
             self.package = args.package
             self.save_data_context("package", self.package)
-        elif "package" in self.load_data_context():
-            self.package = self.load_data_context()["package"]
+        elif "package" in context:
+            self.package = context["package"]
 
         if args.git_url:
             self.url = args.git_url 
             self.save_data_context("git_url", self.url)
-        elif "git_url" in self.load_data_context():
-            self.url = self.load_data_context()["git_url"]
+        elif "git_url" in context:
+            self.url = context["git_url"]
 
         if args.branch:
             self.branch = args.branch
             self.save_data_context("branch", self.branch)
-        elif "branch" in self.load_data_context():
-            self.branch = self.load_data_context()["branch"]
+        elif "branch" in context:
+            self.branch = context["branch"]
 
         if args.path:
             self.path = args.path
             self.save_data_context("path", args.path)
-        elif "path" in self.load_data_context():
-            self.path = self.load_data_context()["path"]
+            self.save_data_context("worktree_base", None)
+        elif "path" in context:
+            self.path = context["path"]
         else:
             self.path = CONSTANTS.rootLocalFolder
             self.save_data_context("path", self.path)
 
+        # The folder of the main repositories, while `path` points at a worktree.
+        self.worktree_base = context.get("worktree_base") if not args.path else None
+
 
     def execute_commands(self, args):
         """
@@ -108,12 +146,18 @@ class KLauncher_git(k_launcher_git_cmd.k_git_cmd,
 
         Args:
             args (argparse.Namespace): Parsed command-line arguments.
+
+        With `--json`, the results of the status, list, log, history and batch
+        commands are printed on stdout as a single JSON object keyed by command,
+        the logs stay on stderr.
         """
+        self.results = {}
         try:
             if args.info:
                 k_launcher_info.print_k_launcher_documentation_git()
 
             if args.vs_code:
+                import k_launcher_utils
                 k_launcher_utils.launch_vs_with_package(
                     os.path.join(self.path, self.package)
                 )
@@ -121,36 +165,38 @@ class KLauncher_git(k_launcher_git_cmd.k_git_cmd,
             if args.context:
                 self.get_data_context()
 
-            if args.git_clone:
-                packages_json = k_launcher_utils.load_json_file(
-                    os.path.join(
-                        CONSTANTS.root_folder,
-                        CONSTANTS.context_folder,
-                        CONSTANTS.package_repos
-                    )
-                )
+            if args.context_gc:
+                k_launcher_context.collect_stale_sessions()
 
-                if self.package in packages_json:
-                    self.url = packages_json[self.package]
+            if args.git_clone:
+                clone_options = {
+                    "depth": args.clone_depth,
+                    "filter": args.clone_filter,
+                    "single_branch": args.clone_single_branch,
+                    "branch": args.branch,
+                    "reference": args.clone_reference,
+                    "many_files": args.many_files,
+                }
+
+                if self.package in self.repo_dict:
+                    self.url = self.get_repository_url(self.package)
                     self.clone_repository(
                         name=self.package, 
-                        path=self.path, 
-                        custom_url=self.url
+                        path=self.worktree_base or self.path, 
+                        custom_url=self.url,
+                        options=clone_options
                     )
                 elif args.git_url:
-                    packages_json[self.package] = self.url
-                    k_launcher_utils.save_json_file(
-                        os.path.join(
-                            CONSTANTS.root_folder,
-                            CONSTANTS.context_folder,
-                            CONSTANTS.package_repos
-                        ),
-                        packages_json
-                    )
+                    try:
+                        self.add_repository(self.package, self.url)
+                    except ValueError as e:
+                        logging.error(str(e))
+                        sys.exit(1)
                     self.clone_repository(
                         name=self.package, 
-                        path=self.path, 
-                        custom_url=self.url
+                        path=self.worktree_base or self.path, 
+                        custom_url=self.url,
+                        options=clone_options
                     )
                 else:
                     logging.error(
@@ -159,30 +205,84 @@ class KLauncher_git(k_launcher_git_cmd.k_git_cmd,
                     )
                     sys.exit(1)
 
-            if args.git_fetch:
-                if self.package and self.path:
-                    self.fetch_repository(self.package, self.path, self.package)
+            if args.repo_import:
+                self.results["repo_import"] = self.import_repositories(args.repo_import)
+
+            if args.repo_find:
+                self.results["repo_find"] = self.find_repositories(args.repo_find)
+
+            if args.clone_stats:
+                self.show_clone_stats(args.package)
+
+            if args.mirror_update:
+                import k_launcher_mirror
+                k_launcher_mirror.start_background_update(
+                    self.get_repository_url(name) for name in self.repo_dict
+                )
+
+            if args.status_all:
+                self.results["status_all"] = self.status_all(self.worktree_base or self.path, refresh=args.refresh, workers=args.git_workers)
+
+            if args.all or args.repos:
+                self.execute_batch_commands(args)
+            else:
+                if args.git_fetch:
+                    if self.package and self.path:
+                        self.fetch_repository(self.path, self.package)
+                    else:
+                        logging.error("Missing package or path for git fetch.")
+                        sys.exit(1)
+
+                if args.git_pull:
+                    if self.package and self.path:
+                        self.pull_repository(self.path, self.package)
+                    else:
+                        logging.error("Missing package or path for git pull.")
+                        sys.exit(1)
+
+                if args.git_status:
+                    if self.package and self.path:
+                        status = self.get_status(self.path, self.package)
+                        self.results["status"] = status
+                        if status:
+                            logging.info(f"Status of '{self.package}': {self.format_status(status)}")
+                    else:
+                        logging.error("Missing package or path for git status.")
+                        sys.exit(1)
+
+            if args.git_check:
+                if self.package and self.branch:
+                    if args.worktree or (args.worktree is None and k_launcher_git_cmd.GIT_WORKTREES):
+                        self.switch_to_worktree()
+                    else:
+                        self.checkout_branch(self.path, self.package, self.branch)
                 else:
-                    logging.error("Missing package or path for git fetch.")
+                    logging.error("Missing package or branch for git checkout.")
                     sys.exit(1)
 
-            if args.git_pull:
-                if self.package and self.path:
-                    self.pull_repository(self.path, self.package)
+            if args.worktree_list:
+                if self.package:
+                    repo_path = os.path.join(self.worktree_base or self.path, self.package)
+                    worktrees = self.list_worktrees(repo_path)
+                    self.results["worktrees"] = worktrees
+                    for worktree in worktrees:
+                        logging.info(f"{worktree['branch'] or '(detached)'}: {worktree['path']}")
+                    if not worktrees:
+                        logging.info(f"No worktree for '{self.package}'.")
                 else:
-                    logging.error("Missing package or path for git pull.")
+                    logging.error("Missing package for git worktree list.")
                     sys.exit(1)
 
-            if args.git_check:
-                if self.package and self.branch:
-                    self.checkout_branch(self.path, self.package, self.branch)
+            if args.many_files and not args.git_clone:
+                if self.package and self.path:
+                    self.apply_many_files_profile(self.path, self.package)
                 else:
-                    logging.error("Missing package or branch for git checkout.")
+                    logging.error("Missing package or path for the many files profile.")
                     sys.exit(1)
 
             if args.git_commit and args.msg:
                 if self.package and self.path:
-                    self.commit_repository(self.path, self.package, args.msg)
+                    self.commit_repository(self.path, self.package, args.msg, paths=args.files)
                 else:
                     logging.error("Missing package or path for git commit.")
                     sys.exit(1)
@@ -196,21 +296,21 @@ class KLauncher_git(k_launcher_git_cmd.k_git_cmd,
 
             if args.git_list:
                 if self.package and self.path:
-                    self.list_remote_branches(self.path, self.package)
+                    self.results["branches"] = self.list_remote_branches(self.path, self.package, refresh=args.refresh)
                 else:
                     logging.error("Missing package or path for git list remote branches.")
                     sys.exit(1)
 
             if args.git_log:
                 if self.package and self.path:
-                    self.show_commit_log(self.path, self.package)
+                    self.results["log"] = self.show_commit_log(self.path, self.package)
                 else:
                     logging.error("Missing package or path for git log.")
                     sys.exit(1)
 
             if args.history:
                 if self.package and self.path:
-                    self.list_repository_history(self.path, self.package)
+                    self.results["history"] = self.list_repository_history(self.path, self.package)
                 else:
                     logging.error("Missing package or path for git history.")
                     sys.exit(1)
@@ -225,14 +325,71 @@ class KLauncher_git(k_launcher_git_cmd.k_git_cmd,
         except Exception as e:
             logging.error(f"An error occurred: {e}", exc_info=True)
             sys.exit(1)
+        finally:
+            if args.json:
+                sys.stdout.write(json.dumps(self.results, indent=2) + "\n")
+
+    def switch_to_worktree(self):
+        """
+        Switches the session to the worktree of the branch and points the context path at it.
+
+        Raises:
+            SystemExit: If the worktree cannot be created.
+        """
+        base = self.worktree_base or self.path
+        path = self.switch_worktree(base, self.package, self.branch)
+        if path is None:
+            sys.exit(1)
+        self.path = path
+        self.worktree_base = base if path != base else None
+        self.save_data_context("path", self.path)
+        self.save_data_context("worktree_base", self.worktree_base)
+        logging.info(f"Context path: {self.path}")
+
+    def execute_batch_commands(self, args):
+        """
+        Runs the requested fetch, pull and status operations over several repositories.
+
+        The repositories are every cloned repository of the registry (`--all`) or
+        the listed ones (`--repos`), processed in parallel (see `run_batch`).
+
+        Args:
+            args (argparse.Namespace): Parsed command-line arguments.
+
+        Raises:
+            SystemExit: If no operation is requested or if any repository failed.
+        """
+        operations = [
+            operation for operation, requested in (
+                ("fetch", args.git_fetch), ("pull", args.git_pull), ("status", args.git_status)
+            ) if requested
+        ]
+        if not operations:
+            logging.error("--all/--repos requires --git_fetch, --git_pull or --git_status.")
+            sys.exit(1)
+
+        names = None if args.all else args.repos
+        failed = False
+        for operation in operations:
+            results = self.run_batch(operation, self.worktree_base or self.path, names, workers=args.git_workers)
+            self.results[operation] = results
+            failed = failed or not results or not all(result["ok"] for result in results)
+        if failed:
+            sys.exit(1)
 
 
 def main():
     """
     Main function to initialize and run the KLauncher_git.
     """
+    args = KLauncher_git.parse_args()
+
+    # Lightweight path: the documentation needs neither the session nor the context.
+    if args.info and not any(value for key, value in vars(args).items() if key != "info"):
+        k_launcher_info.print_k_launcher_documentation_git()
+        return
+
     launcher = KLauncher_git()
-    args = launcher.parse_args()
     launcher.set_arguments(args)
     launcher.execute_commands(args)
 
@@ -0,0 +1,381 @@
+
+# regular import
+import os
+import re
+import time
+import codecs
+import asyncio
+import logging
+import threading
+import subprocess
+import configparser
+
+# custom packages import
+from k_constants import CONSTANTS
+
+
+logging.basicConfig(level=logging.INFO)
+
+
+# Default timeouts of a git command, in seconds (None disables the timeout).
+GIT_TIMEOUT = getattr(CONSTANTS, "git_timeout", 120)
+GIT_NETWORK_TIMEOUT = getattr(CONSTANTS, "git_network_timeout", 900)
+
+# Seconds given to a timed out git command to remove its lock files after SIGTERM.
+GIT_TERMINATE_GRACE = getattr(CONSTANTS, "git_terminate_grace", 5)
+
+# Maximum number of network commands running at the same time against one host.
+GIT_HOST_CONCURRENCY = getattr(CONSTANTS, "git_host_concurrency", 4)
+
+# Git commands talking to a remote, limited per host and using GIT_NETWORK_TIMEOUT.
+NETWORK_COMMANDS = ("clone", "fetch", "pull", "push", "ls-remote")
+
+# Local git commands that only read the repository, killed after GIT_TIMEOUT. The other
+# local commands (checkout, add, commit, stash...) are never timed out: killing them
+# would leave index.lock behind and the repository unusable.
+READ_ONLY_COMMANDS = (
+    "status", "log", "show", "diff", "rev-parse", "rev-list", "for-each-ref", "show-ref",
+    "ls-files", "ls-tree", "cat-file", "describe", "merge-base", "name-rev", "blame",
+)
+
+# Errors raised by `run_git`, to be caught by the callers.
+GIT_ERRORS = (subprocess.CalledProcessError, subprocess.TimeoutExpired)
+
+
+_HOST_SEMAPHORES = {}
+_HOST_SEMAPHORES_LOCK = threading.Lock()
+
+
+def get_url_host(url):
+    """
+    Extracts the host of a git remote URL.
+
+    Args:
+        url (str): The remote URL ("https://host/repo.git", "ssh://git@host:22/repo.git",
+                   "git@host:group/repo.git" or a local path).
+
+    Returns:
+        str: The host name, "local" for a local path.
+    """
+    if url.startswith("file:"):
+        return "local"
+    match = re.match(r"^[a-zA-Z][\w+.\-]*://(?:[^@/]*@)?([^/:]+)", url)
+    if match:
+        return match.group(1).lower()
+    match = re.match(r"^(?:[^@/]+@)?([^/:]{2,}):", url)
+    if match:
+        return match.group(1).lower()
+    return "local"
+
+
+def get_git_dirs(repo_path):
+    """
+    Locates the git folders of a repository or a worktree, without spawning git.
+
+    Args:
+        repo_path (str): The repository folder.
+
+    Returns:
+        tuple: `(git_dir, common_dir)`: the folder holding HEAD and FETCH_HEAD, and
+               the folder holding the refs, objects and config shared by the worktrees.
+    """
+    git_dir = os.path.join(repo_path, ".git")
+    if os.path.isfile(git_dir):
+        try:
+            with open(git_dir, "r") as file:
+                content = file.read().strip()
+            if content.startswith("gitdir: "):
+                git_dir = os.path.normpath(os.path.join(repo_path, content[len("gitdir: "):]))
+        except OSError:
+            pass
+    common_dir = git_dir
+    try:
+        with open(os.path.join(git_dir, "commondir"), "r") as file:
+            common_dir = os.path.normpath(os.path.join(git_dir, file.read().strip()))
+    except OSError:
+        pass
+    return git_dir, common_dir
+
+
+def read_git_config(repo_path):
+    """
+    Reads the git config of a repository, without spawning git.
+
+    Args:
+        repo_path (str): The repository folder.
+
+    Returns:
+        configparser.ConfigParser: The config, sections named like `remote "origin"`.
+    """
+    config = configparser.ConfigParser(strict=False, interpolation=None)
+    try:
+        config.read(os.path.join(get_git_dirs(repo_path)[1], "config"))
+    except (configparser.Error, UnicodeDecodeError):
+        pass
+    return config
+
+
+def get_remote_url(repo_path, remote="origin"):
+    """
+    Reads the URL of a remote from the git config of a repository, without spawning git.
+
+    Args:
+        repo_path (str): The repository folder.
+        remote (str): The remote name.
+
+    Returns:
+        str or None: The remote URL, None if it cannot be read.
+    """
+    try:
+        return read_git_config(repo_path).get(f'remote "{remote}"', "url")
+    except configparser.Error:
+        return None
+
+
+def get_repository_host(repo_path, remote="origin"):
+    """
+    Reads the host of a remote from the git config of a repository.
+
+    Args:
+        repo_path (str): The repository folder.
+        remote (str): The remote name.
+
+    Returns:
+        str: The host name, "local" if the remote cannot be read.
+    """
+    url = get_remote_url(repo_path, remote)
+    return get_url_host(url) if url else "local"
+
+
+def _get_host_semaphore(host):
+    """
+    Returns the semaphore limiting the network commands against a host.
+
+    Threading semaphores are used so the limit also holds between the event
+    loops of the threads of `k_git_cmd.run_batch`.
+
+    Args:
+        host (str): The host name.
+
+    Returns:
+        threading.BoundedSemaphore: The semaphore of the host.
+    """
+    with _HOST_SEMAPHORES_LOCK:
+        if host not in _HOST_SEMAPHORES:
+            _HOST_SEMAPHORES[host] = threading.BoundedSemaphore(GIT_HOST_CONCURRENCY)
+        return _HOST_SEMAPHORES[host]
+
+
+async def _acquire(semaphore, poll=0.05):
+    """
+    Acquires a threading semaphore without blocking the event loop.
+
+    Polling keeps the wait cancellable, a cancelled wait never holds the semaphore.
+
+    Args:
+        semaphore (threading.Semaphore): The semaphore to acquire.
+        poll (float): The delay between two attempts, in seconds.
+    """
+    while not semaphore.acquire(blocking=False):
+        await asyncio.sleep(poll)
+
+
+def _get_command(args):
+    """
+    Returns the git command of a list of arguments, skipping the global options.
+
+    Args:
+        args (list): The git arguments (e.g. ["-c", "key=value", "fetch", "origin"]).
+
+    Returns:
+        str or None: The git command (e.g. "fetch").
+    """
+    skip = False
+    for arg in args:
+        if skip:
+            skip = False
+        elif arg in ("-c", "-C"):
+            skip = True
+        elif not arg.startswith("-"):
+            return arg
+    return None
+
+
+async def _pump(stream, lines, level, prefix):
+    """
+    Reads a process stream until EOF, logging every line as soon as it arrives.
+
+    Both "\\n" and "\\r" end a line so git progress reports are streamed too.
+
+    Args:
+        stream (asyncio.StreamReader): The stdout or stderr of the process.
+        lines (list): Receives the decoded lines.
+        level (int): The logging level of the streamed lines.
+        prefix (str): Prepended to the logged lines.
+    """
+    # A multibyte character may be split between two reads.
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = ""
+    while True:
+        chunk = await stream.read(4096)
+        if not chunk:
+            break
+        pending += decoder.decode(chunk)
+        *complete, pending = re.split(r"\r\n|\r|\n", pending)
+        for line in complete:
+            lines.append(line)
+            if line.strip():
+                logging.log(level, f"{prefix}{line}")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        lines.append(pending)
+        logging.log(level, f"{prefix}{pending}")
+
+
+async def _communicate(process, stdout, stderr, level):
+    """
+    Streams the output of a process until it exits.
+
+    Args:
+        process (asyncio.subprocess.Process): The running process.
+        stdout (list): Receives the lines of the standard output.
+        stderr (list): Receives the lines of the standard error.
+        level (int): The logging level of the streamed lines.
+    """
+    await asyncio.gather(
+        _pump(process.stdout, stdout, level, ""),
+        _pump(process.stderr, stderr, level, ""),
+        process.wait(),
+    )
+
+
+async def _terminate(process):
+    """
+    Stops a git process and waits for it to exit.
+
+    The process gets `GIT_TERMINATE_GRACE` seconds after SIGTERM to remove its
+    lock files before it is killed.
+
+    Args:
+        process (asyncio.subprocess.Process): The process to stop.
+    """
+    if process.returncode is None:
+        try:
+            process.terminate()
+            await asyncio.wait_for(process.wait(), GIT_TERMINATE_GRACE)
+        except ProcessLookupError:
+            pass
+        except asyncio.TimeoutError:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+    await process.wait()
+
+
+async def run_git_async(args, cwd=None, timeout=None, check=True, stream=False, host=None, env=None):
+    """
+    Runs a git command as an asyncio subprocess.
+
+    The output is streamed into logging line by line while the command runs and
+    collected for the caller. Network commands (see `NETWORK_COMMANDS`) wait for a
+    slot of their host (see `GIT_HOST_CONCURRENCY`). The process is stopped when
+    the timeout expires or when the calling task is cancelled (e.g. Ctrl-C).
+    Only network and read-only commands (see `READ_ONLY_COMMANDS`) time out.
+
+    Args:
+        args (list): The git arguments, without "git" (e.g. ["fetch", "--all"]).
+        cwd (str, optional): The repository folder.
+        timeout (float, optional): The timeout in seconds, defaults to `GIT_TIMEOUT`
+                                   or `GIT_NETWORK_TIMEOUT` for network commands.
+                                   Ignored by the local write commands.
+        check (bool): Raises `CalledProcessError` on a non-zero exit code.
+        stream (bool): Logs the output at INFO level instead of DEBUG.
+        host (str, optional): The remote host of a network command, read from the
+                              URL of a clone or the origin of `cwd` by default.
+        env (dict, optional): The environment of the process.
+
+    Returns:
+        subprocess.CompletedProcess: The command with its exit code and its stdout and
+                                     stderr as text.
+
+    Raises:
+        subprocess.CalledProcessError: If `check` is set and the command failed.
+        subprocess.TimeoutExpired: If the command did not finish in time.
+        asyncio.CancelledError: If the task was cancelled, the process is killed first.
+    """
+    command = ["git"] + list(args)
+    git_command = _get_command(args)
+    network = git_command in NETWORK_COMMANDS
+    if not network and git_command not in READ_ONLY_COMMANDS:
+        timeout = None
+    elif timeout is None:
+        timeout = GIT_NETWORK_TIMEOUT if network else GIT_TIMEOUT
+
+    semaphore = None
+    if network:
+        if host is None:
+            if git_command == "clone":
+                urls = [arg for arg in args[args.index("clone") + 1:] if not arg.startswith("-")]
+                host = get_url_host(urls[0]) if urls else "local"
+            else:
+                host = get_repository_host(cwd or os.getcwd())
+        semaphore = _get_host_semaphore(host)
+        await _acquire(semaphore)
+
+    stdout, stderr = [], []
+    level = logging.INFO if stream else logging.DEBUG
+    start = time.perf_counter()
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *command, cwd=cwd, env=env, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            await asyncio.wait_for(_communicate(process, stdout, stderr, level), timeout)
+        except asyncio.TimeoutError:
+            await _terminate(process)
+            logging.error(f"'{' '.join(command)}' timed out after {timeout}s and was stopped.")
+            raise subprocess.TimeoutExpired(command, timeout, "\n".join(stdout), "\n".join(stderr))
+        except asyncio.CancelledError:
+            await _terminate(process)
+            logging.warning(f"'{' '.join(command)}' was cancelled and stopped.")
+            raise
+    finally:
+        if semaphore is not None:
+            semaphore.release()
+
+    logging.debug(f"'{' '.join(command)}' exited with {process.returncode} in {time.perf_counter() - start:.2f}s")
+    result = subprocess.CompletedProcess(command, process.returncode, "\n".join(stdout), "\n".join(stderr))
+    if check and result.returncode:
+        raise subprocess.CalledProcessError(result.returncode, command, result.stdout, result.stderr)
+    return result
+
+
+def run_git(args, cwd=None, timeout=None, check=True, stream=False, host=None, env=None):
+    """
+    Runs a git command synchronously through `run_git_async`.
+
+    Mirrors `subprocess.run(["git"] + args, capture_output=True, text=True)` with a
+    timeout. Ctrl-C cancels the command and kills the git process before the
+    `KeyboardInterrupt` propagates. Must not be called from a running event loop,
+    await `run_git_async` there instead.
+
+    Args:
+        args (list): The git arguments, without "git".
+        cwd (str, optional): The repository folder.
+        timeout (float, optional): The timeout in seconds (see `run_git_async`).
+        check (bool): Raises `CalledProcessError` on a non-zero exit code.
+        stream (bool): Logs the output at INFO level instead of DEBUG.
+        host (str, optional): The remote host of a network command.
+        env (dict, optional): The environment of the process.
+
+    Returns:
+        subprocess.CompletedProcess: The finished command.
+
+    Raises:
+        subprocess.CalledProcessError: If `check` is set and the command failed.
+        subprocess.TimeoutExpired: If the command did not finish in time.
+    """
+    return asyncio.run(
+        run_git_async(args, cwd=cwd, timeout=timeout, check=check, stream=stream, host=host, env=env)
+    )
@@ -1,13 +1,20 @@
 
 # regular import
 import logging
-import git
 import os
+import sys
 import json
-import subprocess
+import time
+import heapq
+import threading
+import tempfile
+import statistics
+import concurrent.futures
 
 # custom packages import
 import k_launcher_repo
+import k_launcher_storage
+import k_launcher_git_async
 from k_constants import CONSTANTS
 
 
@@ -16,34 +23,366 @@ logging.basicConfig(level=logging.INFO)
 
 PACKAGE_CONFIG_FILE = os.path.join(CONSTANTS.root_folder,CONSTANTS.context_folder, CONSTANTS.git_user_config)
 
+# Maximum number of repositories processed at the same time by `run_batch`.
+GIT_WORKERS = getattr(CONSTANTS, "git_workers", 8)
+
+# Clone options applied to every clone, overridden per repository in repos.json
+# and per call (see `k_git_cmd.build_clone_args`).
+CLONE_DEFAULTS = dict(getattr(CONSTANTS, "clone_defaults", {}))
+
+# Partial clone filters accepted by `build_clone_args`.
+CLONE_FILTERS = ("blob:none", "tree:0")
+
+# One JSON line per clone: strategy, duration and size on disk.
+CLONE_STATS_FILE = os.path.join(CONSTANTS.root_folder, CONSTANTS.context_folder, "clone_stats.jsonl")
+
+# Fields of the commit records of `get_commit_log`, in the order of LOG_FORMAT.
+LOG_FIELDS = ("hash", "short_hash", "parents", "author", "email", "date", "decorations", "subject")
+LOG_FORMAT = "%x00".join(("%H", "%h", "%P", "%an", "%ae", "%aI", "%D", "%s")) + "%x00"
+
+# Snapshot of `status_all`, one entry per repository path.
+STATUS_CACHE_FILE = os.path.join(CONSTANTS.root_folder, CONSTANTS.context_folder, "status_snapshot.json")
+
+# Unstaged edits do not touch the git metadata, cached entries are re-queried after this age (seconds).
+STATUS_CACHE_MAX_AGE = getattr(CONSTANTS, "status_cache_max_age", 300)
+
+# Operations available to `run_batch`: name -> method name.
+BATCH_OPERATIONS = {
+    "fetch": "fetch_repository",
+    "pull": "pull_repository",
+    "status": "get_status",
+}
+
+# Read-only queries (refs, branches, tags, recent commits) are answered in process with
+# GitPython when it is installed, git is spawned for the network and write operations
+# and for the working tree status.
+GIT_IN_PROCESS = getattr(CONSTANTS, "git_in_process", True)
+
+# Longest log read in process ("recent commits"): git walks long and full histories
+# faster than GitPython, they are read with a single `git log`.
+GIT_IN_PROCESS_MAX_COMMITS = getattr(CONSTANTS, "git_in_process_max_commits", 100)
+
+# `checkout_branch` does not fetch when the repository was fetched more recently (seconds).
+CHECKOUT_FETCH_WINDOW = getattr(CONSTANTS, "checkout_fetch_window", 300)
+
+# Worktree mode: each branch is checked out in `<repository>/<WORKTREE_FOLDER>/<branch>/<name>`,
+# sharing the objects of the repository, and switching branches updates the context path.
+GIT_WORKTREES = getattr(CONSTANTS, "git_worktrees", False)
+WORKTREE_FOLDER = getattr(CONSTANTS, "worktree_folder", ".worktrees")
+
+# Linked worktrees kept per repository, the least recently used clean ones are removed.
+WORKTREE_LIMIT = getattr(CONSTANTS, "worktree_limit", 5)
+
+# Touched in the git folder of a worktree each time it is switched to.
+WORKTREE_USED_MARKER = "k_launcher_used"
+
+# "Many files" profile of asset-heavy repositories (see `k_git_cmd.apply_many_files_profile`):
+# the untracked cache, index v4 and the split index keep `git status` and `git add`
+# from rescanning and rewriting hundreds of thousands of entries.
+MANY_FILES_CONFIG = dict(getattr(CONSTANTS, "many_files_config", {
+    "feature.manyFiles": "true",
+    "core.untrackedCache": "true",
+    "index.version": "4",
+    "core.splitIndex": "true",
+}))
+
+# Platforms of the builtin file system monitor of git, added to the profile there.
+FSMONITOR_PLATFORMS = ("win32", "darwin")
+
+_GITPYTHON = None
+
+
+def import_gitpython():
+    """
+    Imports GitPython on first use, so the launcher starts without it.
+
+    Returns:
+        module or None: The `git` module, None if GitPython is not installed or
+                        cannot find the git executable.
+    """
+    global _GITPYTHON
+    if _GITPYTHON is None:
+        try:
+            import git
+            _GITPYTHON = git
+        except ImportError as e:
+            logging.debug(f"GitPython unavailable, git queries spawn git: {e}")
+            _GITPYTHON = False
+    return _GITPYTHON or None
+
+
+def read_refs(common_dir):
+    """
+    Reads the refs of a repository from its files: packed-refs, then the loose refs.
+
+    Args:
+        common_dir (str): The git folder shared by the worktrees (".git").
+
+    Returns:
+        dict or None: `{ref path: (hexsha, commit hexsha)}`, the commit being None for
+                      the loose tags that may be annotated. None for a reftable repository.
+    """
+    if os.path.isdir(os.path.join(common_dir, "reftable")):
+        return None
+
+    refs, peeled, path = {}, False, None
+    try:
+        with open(os.path.join(common_dir, "packed-refs"), "r") as file:
+            for line in file:
+                if line.startswith("#"):
+                    peeled = bool({"peeled", "fully-peeled"} & set(line.split(":", 1)[-1].split()))
+                elif line.startswith("^"):
+                    refs[path] = (refs[path][0], line[1:].strip())
+                elif line.strip():
+                    hexsha, path = line.split()
+                    refs[path] = (hexsha, hexsha if peeled or not path.startswith("refs/tags/") else None)
+    except OSError:
+        pass
+
+    symbolic = {}
+    for folder, _subfolders, filenames in os.walk(os.path.join(common_dir, "refs")):
+        for filename in filenames:
+            if filename.endswith(".lock"):
+                continue
+            file_path = os.path.join(folder, filename)
+            path = os.path.relpath(file_path, common_dir).replace(os.sep, "/")
+            try:
+                with open(file_path, "r") as file:
+                    content = file.read().strip()
+            except OSError:
+                continue
+            if content.startswith("ref: "):
+                symbolic[path] = content[len("ref: "):]
+            elif content:
+                refs[path] = (content, None if path.startswith("refs/tags/") else content)
+    for path, target in symbolic.items():
+        if target in refs:
+            refs[path] = refs[target]
+    return refs
+
 
 class k_git_cmd(k_launcher_repo.k_repo):
     """
     A class for managing Git repositories using subprocess commands.
     Extends the `k_repo` class from `k_launcher_repo`.
+
+    Git commands run through `k_launcher_git_async` so each one has a timeout
+    and streams its output into logging. Read-only queries use a GitPython `Repo`
+    cached per repository path (see `get_repo`) and fall back to git when
+    GitPython is missing or fails.
+
+    Attributes:
+        git_timeout (float): Timeout of every git command in seconds, None uses
+                             the defaults of `k_launcher_git_async`.
+        use_mirrors (bool): Serves the clones and fetches of registered repositories
+                            from their local mirror (see `k_launcher_mirror`, disabled
+                            for every instance by `MIRROR_ENABLED`).
+        git_in_process (bool): Answers the read-only queries with GitPython.
     """
 
+    git_timeout = None
+    use_mirrors = True
+    git_in_process = GIT_IN_PROCESS
+
+    # GitPython repositories by normalized path, shared by the instances of the process.
+    _repos = {}
+    _repos_lock = threading.Lock()
+
+    def run_git(self, args, repo_path=None, stream=False, check=True):
+        """
+        Runs a git command with the timeout of the launcher.
+
+        Args:
+            args (list): The git arguments, without "git".
+            repo_path (str, optional): The repository folder.
+            stream (bool): Logs the output at INFO level while the command runs.
+            check (bool): Raises `CalledProcessError` on a non-zero exit code.
+
+        Returns:
+            subprocess.CompletedProcess: The finished command, stdout and stderr as text.
+
+        Raises:
+            subprocess.CalledProcessError: If `check` is set and the command failed.
+            subprocess.TimeoutExpired: If the command did not finish in time.
+        """
+        return k_launcher_git_async.run_git(
+            args, cwd=repo_path, timeout=self.git_timeout, check=check, stream=stream
+        )
+
     def start_ssh_agent(self):
         """
         Starts the SSH agent if not already running and adds the default SSH key.
 
         The method ensures that the SSH agent is active and the SSH private key
-        located at `~/.ssh/id_rsa` is added to the agent.
+        located at `~/.ssh/id_rsa` is added to the agent. The agent is reused
+        across the launcher calls of the session and checked once per process
+        (see `k_launcher_ssh.ensure_ssh_agent`).
+
+        Returns:
+            bool: True if the agent holds the key.
 
         Logs:
             - Info: When the SSH agent is started or the key is added.
             - Error: If adding the key to the agent fails.
         """
-        if "SSH_AUTH_SOCK" not in os.environ:
-            logging.info("Starting ssh-agent...")
-            subprocess.run(["ssh-agent", "-s"], check=True)
+        import k_launcher_ssh
+
+        return k_launcher_ssh.ensure_ssh_agent()
+
+
+    def get_repo(self, repo_path):
+        """
+        Returns the GitPython repository of a path, opened once per process.
+
+        The repository keeps its `git cat-file` reader alive between queries, refs
+        and the index are read from disk on every access so they are never stale.
+        A `Repo` is not thread-safe, the in-process queries are not meant for the
+        worker threads of `run_batch` and `status_all`.
+
+        Args:
+            repo_path (str): The repository folder.
+
+        Returns:
+            git.Repo or None: The repository, None if in-process queries are disabled,
+                              GitPython is missing or the folder is not a repository.
+        """
+        git = import_gitpython() if self.git_in_process else None
+        if git is None:
+            return None
+        key = os.path.normcase(os.path.abspath(repo_path))
+        with self._repos_lock:
+            repo = self._repos.get(key)
+            if repo is None:
+                try:
+                    repo = git.Repo(key)
+                except (git.exc.InvalidGitRepositoryError, git.exc.NoSuchPathError):
+                    return None
+                self._repos[key] = repo
+        return repo
+
+
+    @classmethod
+    def clear_repos(cls):
+        """
+        Closes the cached GitPython repositories and their git readers.
+        """
+        with cls._repos_lock:
+            for repo in cls._repos.values():
+                repo.close()
+            cls._repos.clear()
+
+
+    def get_refs(self, repo_path):
+        """
+        Lists the refs of the repository (branches, remote branches, tags, ...).
+
+        The ref files are read in process (see `read_refs`), git is only spawned
+        for reftable repositories or when in-process queries are disabled.
+
+        Args:
+            repo_path (str): The repository folder.
+
+        Returns:
+            list: The full ref names (e.g. "refs/heads/main", "refs/tags/v1.0"), sorted.
+
+        Raises:
+            subprocess.CalledProcessError: If git fails.
+            subprocess.TimeoutExpired: If git does not finish in time.
+        """
+        refs = read_refs(k_launcher_git_async.get_git_dirs(repo_path)[1]) if self.git_in_process else None
+        if refs is not None:
+            return sorted(refs)
+        result = self.run_git(["for-each-ref", "--format=%(refname)"], repo_path)
+        return sorted(line.strip() for line in result.stdout.splitlines() if line.strip())
+
+
+    @staticmethod
+    def get_current_branch(repo_path):
+        """
+        Reads the branch checked out in the repository, without spawning git.
+
+        Args:
+            repo_path (str): The repository folder.
+
+        Returns:
+            str or None: The branch name, None if HEAD is detached or unreadable.
+        """
+        try:
+            with open(os.path.join(k_launcher_git_async.get_git_dirs(repo_path)[0], "HEAD"), "r") as file:
+                head = file.read().strip()
+        except OSError:
+            return None
+        return head[len("ref: refs/heads/"):] if head.startswith("ref: refs/heads/") else None
+
+
+    @staticmethod
+    def get_fetch_age(repo_path):
+        """
+        Returns the time since the last fetch of the repository (FETCH_HEAD).
 
-        ssh_key_path = os.path.expanduser("~/.ssh/id_rsa")
+        Args:
+            repo_path (str): The repository folder.
+
+        Returns:
+            float or None: The age in seconds, None if the repository was never fetched.
+        """
         try:
-            subprocess.run(["ssh-add", ssh_key_path], check=True)
-            logging.info("SSH key added to agent.")
-        except subprocess.CalledProcessError as e:
-            logging.error(f"Failed to add SSH key to agent: {e}", exc_info=True)
+            return time.time() - os.path.getmtime(os.path.join(k_launcher_git_async.get_git_dirs(repo_path)[0], "FETCH_HEAD"))
+        except OSError:
+            return None
+
+
+    def get_tracking_remote(self, repo_path, branch_name, refs):
+        """
+        Finds the remote to fetch a branch from.
+
+        In order: the upstream remote of the branch (`branch.<name>.remote`), a remote
+        having the branch, the upstream remote of the current branch, then "origin".
+
+        Args:
+            repo_path (str): The repository folder.
+            branch_name (str): The branch.
+            refs (list): The refs of the repository (see `get_refs`).
+
+        Returns:
+            str or None: The remote name, None if the repository has no remote.
+        """
+        config = k_launcher_git_async.read_git_config(repo_path)
+        remotes = [section[len('remote "'):-1] for section in config.sections() if section.startswith('remote "')]
+        if not remotes:
+            return None
+        remote = config.get(f'branch "{branch_name}"', "remote", fallback=None)
+        if remote in remotes:
+            return remote
+        for remote in remotes:
+            if f"refs/remotes/{remote}/{branch_name}" in refs:
+                return remote
+        remote = config.get(f'branch "{self.get_current_branch(repo_path)}"', "remote", fallback=None)
+        if remote in remotes:
+            return remote
+        return "origin" if "origin" in remotes else remotes[0]
+
+
+    def is_dirty(self, repo_path):
+        """
+        Tells whether the tracked files of the repository have uncommitted changes.
+
+        Untracked files are ignored, as `git stash` leaves them in place. Answered by
+        git, which knows the sparse checkout, assume-unchanged entries, attributes and
+        the file system monitor.
+
+        Args:
+            repo_path (str): The repository folder.
+
+        Returns:
+            bool: True if the index or the working tree differs from HEAD.
+
+        Raises:
+            subprocess.CalledProcessError: If git fails.
+            subprocess.TimeoutExpired: If git does not finish in time.
+        """
+        result = self.run_git(["status", "--porcelain", "--untracked-files=no"], repo_path)
+        return bool(result.stdout.strip())
 
 
     def fetch_repository(self, path_folder, name):
@@ -54,20 +393,31 @@ class k_git_cmd(k_launcher_repo.k_repo):
             path_folder (str): Path to the parent folder containing the repository.
             name (str): Name of the repository to fetch changes for.
 
+        Returns:
+            bool: True if the fetch succeeded.
+
         Logs:
             - Info: When the fetch operation is successful.
             - Warning: If the repository is not found locally.
             - Error: If fetching fails due to Git errors.
         """
+        import k_launcher_mirror
+
         repo_path = os.path.join(path_folder, name)
         if os.path.exists(repo_path):
+            url = k_launcher_git_async.get_remote_url(repo_path)
+            if self.use_mirrors and url and k_launcher_mirror.fetch_from_mirror(repo_path, url, max_age=0):
+                logging.info(f"Fetched latest changes for '{name}' from the mirror of {url}")
+                return True
             try:
-                subprocess.run(["git", "fetch"], cwd=repo_path, check=True)
+                self.run_git(["fetch"], repo_path, stream=True)
                 logging.info(f"Fetched latest changes for '{name}'")
-            except subprocess.CalledProcessError as e:
+                return True
+            except k_launcher_git_async.GIT_ERRORS as e:
                 logging.error(f"Error fetching repository '{name}': {e.stderr}", exc_info=True)
         else:
             logging.warning(f"Repository '{name}' not found locally.")
+        return False
 
 
     def pull_repository(self, path_folder, name):
@@ -78,6 +428,9 @@ class k_git_cmd(k_launcher_repo.k_repo):
             path_folder (str): Path to the parent folder containing the repository.
             name (str): Name of the repository to pull changes for.
 
+        Returns:
+            bool: True if the pull succeeded.
+
         Logs:
             - Info: When the pull operation is successful.
             - Warning: If the repository is not found locally.
@@ -86,66 +439,470 @@ class k_git_cmd(k_launcher_repo.k_repo):
         repo_path = os.path.join(path_folder, name)
         if os.path.exists(repo_path):
             try:
-                subprocess.run(["git", "pull"], cwd=repo_path, check=True)
+                self.run_git(["pull"], repo_path, stream=True)
                 logging.info(f"Pulled latest changes for '{name}'")
-            except subprocess.CalledProcessError as e:
+                return True
+            except k_launcher_git_async.GIT_ERRORS as e:
                 logging.error(f"Error pulling repository '{name}': {e.stderr}", exc_info=True)
         else:
             logging.warning(f"Repository '{name}' not found locally.")
+        return False
 
 
-    def checkout_branch(self, path_folder, name, branch_name):
+    @staticmethod
+    def parse_status(output):
+        """
+        Parses the output of `git status --porcelain=v2 --branch`.
+
+        Args:
+            output (str): The status output.
+
+        Returns:
+            dict: `branch` (None when detached), `commit`, `upstream`, `ahead`, `behind`
+                  and the `changed`, `untracked` and `conflicted` paths.
+        """
+        status = {
+            "branch": None, "commit": None, "upstream": None, "ahead": 0, "behind": 0,
+            "changed": [], "untracked": [], "conflicted": [],
+        }
+        for line in output.splitlines():
+            if line.startswith("# branch.oid "):
+                status["commit"] = line.split(" ", 2)[2]
+            elif line.startswith("# branch.head "):
+                head = line.split(" ", 2)[2]
+                status["branch"] = None if head == "(detached)" else head
+            elif line.startswith("# branch.upstream "):
+                status["upstream"] = line.split(" ", 2)[2]
+            elif line.startswith("# branch.ab "):
+                ahead, behind = line.split(" ")[2:4]
+                status["ahead"], status["behind"] = int(ahead), -int(behind)
+            elif line.startswith(("1 ", "2 ")):
+                fields = line.split(" ", 8 if line[0] == "1" else 9)
+                status["changed"].append(fields[-1].split("\t")[0])
+            elif line.startswith("u "):
+                status["conflicted"].append(line.split(" ", 10)[-1])
+            elif line.startswith("? "):
+                status["untracked"].append(line[2:])
+        status["clean"] = not (status["changed"] or status["untracked"] or status["conflicted"])
+        return status
+
+
+    @staticmethod
+    def format_status(status):
+        """
+        Summarizes a status record of `parse_status` on one line.
+
+        Args:
+            status (dict): The status record.
+
+        Returns:
+            str: e.g. "main...origin/main [ahead 1], 3 change(s)".
+        """
+        summary = status["branch"] or f"detached at {(status['commit'] or '')[:8]}"
+        if status["upstream"]:
+            summary += f"...{status['upstream']}"
+            counts = [f"{key} {status[key]}" for key in ("ahead", "behind") if status[key]]
+            if counts:
+                summary += f" [{', '.join(counts)}]"
+        changes = len(status["changed"]) + len(status["untracked"]) + len(status["conflicted"])
+        return f"{summary}, {changes} change(s)" if changes else f"{summary}, clean"
+
+
+    def get_status(self, path_folder, name):
+        """
+        Reads the branch and working tree status of the repository.
+
+        Args:
+            path_folder (str): Path to the parent folder containing the repository.
+            name (str): Name of the repository.
+
+        Returns:
+            dict or None: The status record (see `parse_status`), or None on failure.
+
+        Logs:
+            - Warning: If the repository is not found locally.
+            - Error: If the status cannot be read.
+        """
+        repo_path = os.path.join(path_folder, name)
+        if not os.path.exists(repo_path):
+            logging.warning(f"Repository '{name}' not found locally.")
+            return None
+        try:
+            result = self.run_git(["status", "--porcelain=v2", "--branch"], repo_path)
+        except k_launcher_git_async.GIT_ERRORS as e:
+            logging.error(f"Error reading status of repository '{name}': {e.stderr}")
+            return None
+        return self.parse_status(result.stdout)
+
+
+    def status_repository(self, path_folder, name):
+        """
+        Returns the branch and working tree status of the repository on one line.
+
+        Args:
+            path_folder (str): Path to the parent folder containing the repository.
+            name (str): Name of the repository.
+
+        Returns:
+            str or None: The status summary (see `format_status`), or None on failure.
+        """
+        status = self.get_status(path_folder, name)
+        return self.format_status(status) if status else None
+
+
+    def run_batch(self, operation, path_folder, names=None, workers=None):
+        """
+        Runs a Git operation over several repositories on a bounded worker pool.
+
+        Args:
+            operation (str): One of `BATCH_OPERATIONS` ("fetch", "pull", "status").
+            path_folder (str): Path to the parent folder containing the repositories.
+            names (list, optional): The repositories to process. Defaults to every
+                                    repository of the registry cloned in `path_folder`.
+            workers (int, optional): Maximum parallel operations, defaults to `GIT_WORKERS`.
+
+        Returns:
+            list: One dictionary per repository with `name`, `operation`, `ok`,
+                  `detail`, `duration` (seconds) and, for "status", the `status`
+                  record (see `parse_status`), in the order of `names`.
+
+        Logs:
+            - Info: The summary table of the batch.
+        """
+        method = getattr(self, BATCH_OPERATIONS[operation])
+        if names is None:
+            names = sorted(
+                name for name in self.repo_dict
+                if os.path.isdir(os.path.join(path_folder, name, ".git"))
+            )
+        if not names:
+            logging.warning(f"No repository to {operation} in '{path_folder}'.")
+            return []
+
+        def run(name):
+            start = time.perf_counter()
+            try:
+                value = method(path_folder, name)
+            except Exception as e:
+                logging.error(f"Unexpected error during {operation} of '{name}': {e}", exc_info=True)
+                value = None
+            result = {
+                "name": name,
+                "operation": operation,
+                "ok": bool(value),
+                "detail": "ok" if value else "failed",
+                "duration": time.perf_counter() - start,
+            }
+            if isinstance(value, dict):
+                result["status"] = value
+                result["detail"] = self.format_status(value)
+            return result
+
+        start = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(workers or GIT_WORKERS, len(names)))) as executor:
+            results = list(executor.map(run, names))
+
+        logging.info(self.format_batch_summary(results, time.perf_counter() - start))
+        return results
+
+
+    @staticmethod
+    def format_batch_summary(results, elapsed):
+        """
+        Formats the results of `run_batch` as a table.
+
+        Args:
+            results (list): The results returned by `run_batch`.
+            elapsed (float): The wall time of the whole batch, in seconds.
+
+        Returns:
+            str: The summary table.
+        """
+        width = max([len("Repository")] + [len(result["name"]) for result in results])
+        lines = [f"{'Repository'.ljust(width)}  {'Operation':<9}  {'Result':<7}  {'Time':>7}  Detail"]
+        for result in results:
+            lines.append(
+                f"{result['name'].ljust(width)}  {result['operation']:<9}  "
+                f"{'ok' if result['ok'] else 'FAILED':<7}  {result['duration']:>6.2f}s  {result['detail']}"
+            )
+        failures = sum(not result["ok"] for result in results)
+        lines.append(
+            f"{len(results) - failures} succeeded, {failures} failed, "
+            f"{elapsed:.2f}s total ({sum(result['duration'] for result in results):.2f}s sequential)"
+        )
+        return "Batch summary:\n" + "\n".join(lines)
+
+
+    @staticmethod
+    def find_local_repositories(path_folder):
+        """
+        Lists the git repositories directly under a folder.
+
+        Args:
+            path_folder (str): The folder to scan (e.g. `CONSTANTS.rootLocalFolder`).
+
+        Returns:
+            list: The sorted names of the repositories.
+        """
+        try:
+            entries = list(os.scandir(path_folder))
+        except OSError:
+            logging.warning(f"Folder '{path_folder}' not found.")
+            return []
+        return sorted(
+            entry.name for entry in entries
+            if entry.is_dir() and os.path.exists(os.path.join(entry.path, ".git"))
+        )
+
+
+    @staticmethod
+    def get_status_signature(repo_path):
+        """
+        Builds the cache key of the status of a repository from the mtimes of its git metadata.
+
+        Covers the index, HEAD, the ref of the current branch (commits), the packed
+        refs and FETCH_HEAD (ahead/behind after a fetch).
+
+        Args:
+            repo_path (str): The repository folder.
+
+        Returns:
+            dict or None: The mtime of each file (None when missing), None if the
+                          repository has no git folder.
+        """
+        git_dir, common_dir = k_launcher_git_async.get_git_dirs(repo_path)
+        if not os.path.isdir(git_dir):
+            return None
+        files = [(git_dir, "index"), (git_dir, "HEAD"), (common_dir, "packed-refs"), (git_dir, "FETCH_HEAD")]
+        try:
+            with open(os.path.join(git_dir, "HEAD"), "r") as file:
+                head = file.read().strip()
+            if head.startswith("ref: "):
+                files.append((common_dir, head[len("ref: "):]))
+        except OSError:
+            return None
+
+        signature = {}
+        for folder, filename in files:
+            try:
+                signature[filename] = os.stat(os.path.join(folder, filename)).st_mtime
+            except OSError:
+                signature[filename] = None
+        return signature
+
+
+    def get_last_tag(self, repo_path):
+        """
+        Returns the most recent tag reachable from HEAD.
+
+        Args:
+            repo_path (str): The repository folder.
+
+        Returns:
+            str or None: The tag, None if there is none.
+        """
+        result = self.run_git(["describe", "--tags", "--abbrev=0"], repo_path, check=False)
+        return result.stdout.strip() or None if result.returncode == 0 else None
+
+
+    def status_all(self, path_folder, refresh=False, workers=None):
+        """
+        Collects the status of every repository under a folder, using a cached snapshot.
+
+        A repository is only queried (`git status --porcelain=v2 --branch` and its last
+        tag) when the mtimes of its git metadata changed (see `get_status_signature`),
+        when its cached entry is older than `STATUS_CACHE_MAX_AGE`, or with `refresh`.
+        Queries run in parallel.
+
+        Args:
+            path_folder (str): The folder containing the repositories.
+            refresh (bool): Queries every repository.
+            workers (int, optional): Maximum parallel queries, defaults to `GIT_WORKERS`.
+
+        Returns:
+            list: One record per repository with `name`, `path`, the status record
+                  (see `parse_status`), `last_tag`, `cached` and `time`.
+
+        Logs:
+            - Info: The status table and the number of queried repositories.
+        """
+        start = time.perf_counter()
+        snapshot = k_launcher_storage.read_json_file(STATUS_CACHE_FILE, {})
+        now = time.time()
+
+        records, stale = {}, []
+        for name in self.find_local_repositories(path_folder):
+            repo_path = os.path.abspath(os.path.join(path_folder, name))
+            signature = self.get_status_signature(repo_path)
+            entry = snapshot.get(repo_path)
+            if (
+                not refresh and entry and signature and entry.get("signature") == signature
+                and now - entry.get("time", 0) < STATUS_CACHE_MAX_AGE
+            ):
+                records[name] = dict(entry["record"], cached=True)
+            else:
+                stale.append((name, repo_path, signature))
+
+        def query(item):
+            name, repo_path, signature = item
+            status = self.get_status(path_folder, name)
+            if status is None:
+                return name, repo_path, signature, None
+            record = dict(status, name=name, path=repo_path, last_tag=self.get_last_tag(repo_path), time=time.time())
+            return name, repo_path, signature, record
+
+        updates = {}
+        if stale:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(workers or GIT_WORKERS, len(stale))) as executor:
+                for name, repo_path, _signature, record in executor.map(query, stale):
+                    if record is None:
+                        continue
+                    # The status itself may refresh the index, sign the entry afterwards.
+                    updates[repo_path] = {
+                        "signature": self.get_status_signature(repo_path),
+                        "time": record["time"],
+                        "record": record,
+                    }
+                    records[name] = dict(record, cached=False)
+
+        if updates:
+            try:
+                with k_launcher_storage.file_lock(STATUS_CACHE_FILE):
+                    snapshot = k_launcher_storage.read_json_file(STATUS_CACHE_FILE, {})
+                    snapshot.update(updates)
+                    k_launcher_storage.atomic_write_json(STATUS_CACHE_FILE, snapshot, indent=None)
+            except (OSError, TimeoutError) as e:
+                logging.warning(f"Failed to save the status snapshot: {e}")
+
+        results = [records[name] for name in sorted(records)]
+        logging.info(self.format_status_table(results))
+        logging.info(
+            f"{len(results)} repositories, {len(stale)} queried, {len(results) - len(stale)} from cache "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+        return results
+
+
+    @staticmethod
+    def format_status_table(records):
+        """
+        Formats the records of `status_all` as a table.
+
+        Args:
+            records (list): The status records.
+
+        Returns:
+            str: The table.
+        """
+        rows = [("Repository", "Branch", "Changes", "Ahead", "Behind", "Last tag")]
+        for record in records:
+            changes = len(record["changed"]) + len(record["untracked"]) + len(record["conflicted"])
+            rows.append((
+                record["name"],
+                record["branch"] or f"({(record['commit'] or '')[:8]})",
+                str(changes) if changes else "clean",
+                str(record["ahead"]),
+                str(record["behind"]),
+                record["last_tag"] or "-",
+            ))
+        widths = [max(len(row[column]) for row in rows) for column in range(len(rows[0]))]
+        return "Repositories status:\n" + "\n".join(
+            "  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip() for row in rows
+        )
+
+
+    def fetch_branch(self, repo_path, branch_name, fetch_window=None):
+        """
+        Fetches a branch from the remote tracking it, unless the last fetch is fresh.
+
+        Only the remote of `get_tracking_remote` is fetched, for that branch only.
+        The fetch is skipped when the repository was fetched within `fetch_window`
+        and the branch is known, an unknown branch is always fetched so a branch
+        just pushed is found. A failed fetch leaves the local refs as they are.
+
+        Args:
+            repo_path (str): The repository folder.
+            branch_name (str): The branch.
+            fetch_window (float, optional): Seconds during which a previous fetch is
+                                            fresh enough, defaults to `CHECKOUT_FETCH_WINDOW`.
+                                            0 always fetches.
+
+        Returns:
+            tuple: The refs of the repository (see `get_refs`) and the remote-tracking
+                   ref of the branch (e.g. "refs/remotes/origin/dev").
+        """
+        fetch_window = CHECKOUT_FETCH_WINDOW if fetch_window is None else fetch_window
+        refs = self.get_refs(repo_path)
+        remote = self.get_tracking_remote(repo_path, branch_name, refs)
+        remote_ref = f"refs/remotes/{remote}/{branch_name}"
+        known = f"refs/heads/{branch_name}" in refs or remote_ref in refs
+        fetch_age = self.get_fetch_age(repo_path)
+        if remote and (not known or fetch_age is None or fetch_age >= fetch_window):
+            try:
+                self.run_git(["fetch", remote, f"+refs/heads/{branch_name}:{remote_ref}"], repo_path, stream=True)
+                refs.append(remote_ref)
+            except k_launcher_git_async.GIT_ERRORS:
+                if known:
+                    logging.warning(f"Could not fetch '{branch_name}' from '{remote}', using the local refs.")
+        elif remote:
+            logging.info(f"Fetched {fetch_age:.0f}s ago, skipping the fetch of '{remote}'.")
+        return refs, remote_ref
+
+
+    def checkout_branch(self, path_folder, name, branch_name, fetch_window=None):
         """
         Checks out the specified branch in a Git repository.
-        
+
+        The branches are read in process (see `get_refs`). Only the remote tracking the branch is fetched, for that branch
+        only, and not at all when the repository was fetched within `fetch_window`
+        and the branch is known. Switching between two local branches with a clean
+        tree spawns a single `git checkout`.
+
         Args:
             path_folder (str): Path to the parent folder containing the repository.
             name (str): Name of the repository folder.
             branch_name (str): The branch name to check out or create.
+            fetch_window (float, optional): See `fetch_branch`.
+
+        Returns:
+            bool: True if the branch is checked out.
         """
         repo_path = os.path.join(path_folder, name)
         logging.info(f"Repository path: {repo_path}")
         
         if not os.path.exists(repo_path):
             logging.warning(f"Repository '{name}' not found at path '{repo_path}'.")
-            return
+            return False
         
         if not os.path.exists(os.path.join(repo_path, ".git")):
             logging.error(f"'{repo_path}' is not a valid Git repository.")
-            return
+            return False
 
         try:
-            subprocess.run(["git", "fetch", "--all"], cwd=repo_path, check=True)
-
-            status_result = subprocess.run(
-                ["git", "status", "--porcelain"],
-                cwd=repo_path,
-                stdout=subprocess.PIPE,
-                text=True,
-                check=True
-            )
+            if self.get_current_branch(repo_path) == branch_name:
+                logging.info(f"Already on branch '{branch_name}' for repository '{name}'.")
+                return True
+
+            refs, remote_ref = self.fetch_branch(repo_path, branch_name, fetch_window)
 
-            if status_result.stdout.strip():
+            if self.is_dirty(repo_path):
                 logging.warning("Uncommitted changes detected. Stashing changes before checkout.")
-                subprocess.run(["git", "stash"], cwd=repo_path, check=True)
-
-            result = subprocess.run(
-                ["git", "branch", "--list", branch_name],
-                cwd=repo_path,
-                stdout=subprocess.PIPE,
-                text=True,
-                check=True
-            )
-            
-            if not result.stdout.strip():
-                logging.warning(f"Branch '{branch_name}' does not exist. Creating it.")
-                subprocess.run(["git", "checkout", "-b", branch_name], cwd=repo_path, check=True)
+                self.run_git(["stash"], repo_path, stream=True)
+
+            if f"refs/heads/{branch_name}" in refs:
+                self.run_git(["checkout", branch_name], repo_path, stream=True)
+            elif remote_ref in refs:
+                self.run_git(
+                    ["checkout", "-b", branch_name, "--track", remote_ref[len("refs/remotes/"):]], repo_path, stream=True
+                )
             else:
-                subprocess.run(["git", "checkout", branch_name], cwd=repo_path, check=True)
+                logging.warning(f"Branch '{branch_name}' does not exist. Creating it.")
+                self.run_git(["checkout", "-b", branch_name], repo_path, stream=True)
             
             logging.info(f"Successfully checked out branch '{branch_name}' for repository '{name}'.")
+            return True
         
-        except subprocess.CalledProcessError as e:
+        except k_launcher_git_async.GIT_ERRORS as e:
             logging.error(
                 f"Error managing branch '{branch_name}' for repository '{name}': {e.stderr or e}",
                 exc_info=True
@@ -155,6 +912,202 @@ class k_git_cmd(k_launcher_repo.k_repo):
                 f"Unexpected error occurred while managing branch '{branch_name}' for repository '{name}': {e}",
                 exc_info=True
             )
+        return False
+
+
+    @staticmethod
+    def get_worktree_path(repo_path, name, branch_name):
+        """
+        Returns the folder of the worktree of a branch.
+
+        The worktree folder is named like the repository, so its parent folder can
+        be used as the context path (`os.path.join(path, name)`).
+
+        Args:
+            repo_path (str): The main repository folder.
+            name (str): Name of the repository.
+            branch_name (str): The branch, "/" are replaced by "--".
+
+        Returns:
+            str: `<repo_path>/<WORKTREE_FOLDER>/<branch>/<name>`.
+        """
+        return os.path.join(repo_path, WORKTREE_FOLDER, branch_name.replace("/", "--"), name)
+
+
+    @staticmethod
+    def list_worktrees(repo_path):
+        """
+        Lists the linked worktrees of the repository, without spawning git.
+
+        Args:
+            repo_path (str): The main repository folder.
+
+        Returns:
+            list: One dictionary per worktree: `path`, `branch` (None when detached),
+                  `git_dir` and `last_used`, the time it was last switched to.
+        """
+        admin_folder = os.path.join(k_launcher_git_async.get_git_dirs(repo_path)[1], "worktrees")
+        try:
+            entries = sorted(os.listdir(admin_folder))
+        except OSError:
+            return []
+
+        worktrees = []
+        for entry in entries:
+            git_dir = os.path.join(admin_folder, entry)
+            try:
+                with open(os.path.join(git_dir, "gitdir"), "r") as file:
+                    path = os.path.dirname(os.path.normpath(file.read().strip()))
+                with open(os.path.join(git_dir, "HEAD"), "r") as file:
+                    head = file.read().strip()
+            except OSError:
+                continue
+            try:
+                last_used = os.path.getmtime(os.path.join(git_dir, WORKTREE_USED_MARKER))
+            except OSError:
+                last_used = os.path.getmtime(git_dir)
+            worktrees.append({
+                "path": path,
+                "branch": head[len("ref: refs/heads/"):] if head.startswith("ref: refs/heads/") else None,
+                "git_dir": git_dir,
+                "last_used": last_used,
+            })
+        return worktrees
+
+
+    @staticmethod
+    def _exclude_worktree_folder(repo_path):
+        """
+        Hides the worktree folder from the status of the main worktree (info/exclude).
+
+        Args:
+            repo_path (str): The main repository folder.
+        """
+        exclude_file = os.path.join(k_launcher_git_async.get_git_dirs(repo_path)[1], "info", "exclude")
+        pattern = f"/{WORKTREE_FOLDER}/"
+        try:
+            with open(exclude_file, "r") as file:
+                if pattern in file.read().splitlines():
+                    return
+        except OSError:
+            pass
+        os.makedirs(os.path.dirname(exclude_file), exist_ok=True)
+        with open(exclude_file, "a") as file:
+            file.write(f"\n{pattern}\n")
+
+
+    def switch_worktree(self, path_folder, name, branch_name, fetch_window=None):
+        """
+        Switches to the worktree of a branch, creating it if needed.
+
+        The worktrees share the objects of the repository, switching to an existing
+        worktree spawns no git process and leaves the other worktrees untouched
+        (no stash, no checkout). A new worktree is created from the local branch,
+        the remote branch (see `fetch_branch`) or HEAD, then the least recently
+        used worktrees are pruned (see `prune_worktrees`).
+
+        Args:
+            path_folder (str): Path to the parent folder containing the main repository.
+            name (str): Name of the repository.
+            branch_name (str): The branch.
+            fetch_window (float, optional): See `fetch_branch`.
+
+        Returns:
+            str or None: The folder to use as context path: `path_folder` when the
+                         branch is checked out in the main repository, the parent of
+                         the worktree otherwise. None on failure.
+
+        Logs:
+            - Info: When a worktree is created or switched to.
+            - Warning: If the repository is not found locally.
+            - Error: If the worktree cannot be created.
+        """
+        repo_path = os.path.join(path_folder, name)
+        if not os.path.exists(os.path.join(repo_path, ".git")):
+            logging.warning(f"Repository '{name}' not found at path '{repo_path}'.")
+            return None
+        if self.get_current_branch(repo_path) == branch_name:
+            logging.info(f"Branch '{branch_name}' is checked out in '{repo_path}'.")
+            return path_folder
+
+        worktree = next((item for item in self.list_worktrees(repo_path) if item["branch"] == branch_name), None)
+        if worktree is not None and os.path.isdir(worktree["path"]):
+            worktree_path = worktree["path"]
+            with open(os.path.join(worktree["git_dir"], WORKTREE_USED_MARKER), "a"):
+                os.utime(os.path.join(worktree["git_dir"], WORKTREE_USED_MARKER), None)
+            logging.info(f"Switched to the worktree of '{branch_name}': {worktree_path}")
+            return os.path.dirname(worktree_path)
+
+        worktree_path = self.get_worktree_path(repo_path, name, branch_name)
+        try:
+            self._exclude_worktree_folder(repo_path)
+            refs, remote_ref = self.fetch_branch(repo_path, branch_name, fetch_window)
+            if f"refs/heads/{branch_name}" in refs:
+                args = ["worktree", "add", worktree_path, branch_name]
+            elif remote_ref in refs:
+                args = ["worktree", "add", "--track", "-b", branch_name, worktree_path, remote_ref[len("refs/remotes/"):]]
+            else:
+                logging.warning(f"Branch '{branch_name}' does not exist. Creating it.")
+                args = ["worktree", "add", "-b", branch_name, worktree_path]
+            self.run_git(args, repo_path, stream=True)
+        except k_launcher_git_async.GIT_ERRORS as e:
+            logging.error(f"Error creating the worktree of '{branch_name}' for '{name}': {e.stderr or e}")
+            return None
+        logging.info(f"Created the worktree of '{branch_name}': {worktree_path}")
+
+        self.prune_worktrees(repo_path, keep=[worktree_path])
+        return os.path.dirname(worktree_path)
+
+
+    def prune_worktrees(self, repo_path, limit=None, keep=()):
+        """
+        Removes the least recently used worktrees above `limit`.
+
+        Worktrees with uncommitted changes are kept, as well as the ones git refuses
+        to remove (untracked files, locked). Worktrees deleted by hand are dropped
+        from the git metadata.
+
+        Args:
+            repo_path (str): The main repository folder.
+            limit (int, optional): Worktrees kept, defaults to `WORKTREE_LIMIT`.
+            keep (iterable): Worktree folders never removed (e.g. the active one).
+
+        Returns:
+            list: The removed worktree folders.
+        """
+        limit = WORKTREE_LIMIT if limit is None else limit
+        keep = {os.path.normcase(os.path.abspath(path)) for path in keep}
+        worktrees = sorted(self.list_worktrees(repo_path), key=lambda item: item["last_used"], reverse=True)
+
+        removed, missing = [], False
+        for worktree in worktrees[limit:]:
+            path = worktree["path"]
+            if os.path.normcase(os.path.abspath(path)) in keep:
+                continue
+            if not os.path.isdir(path):
+                missing = True
+                continue
+            try:
+                if self.is_dirty(path):
+                    logging.info(f"Keeping worktree '{path}': uncommitted changes.")
+                    continue
+                self.run_git(["worktree", "remove", path], repo_path)
+            except k_launcher_git_async.GIT_ERRORS as e:
+                logging.warning(f"Keeping worktree '{path}': {(e.stderr or str(e)).strip()}")
+                continue
+            removed.append(path)
+            logging.info(f"Removed least recently used worktree '{path}'.")
+            try:
+                os.rmdir(os.path.dirname(path))
+            except OSError:
+                pass
+
+        if missing:
+            try:
+                self.run_git(["worktree", "prune"], repo_path)
+            except k_launcher_git_async.GIT_ERRORS as e:
+                logging.warning(f"Failed to prune the worktree metadata: {e.stderr}")
+        return removed
 
 
     def create_branch(self, path_folder, name, branch_name):
@@ -174,41 +1127,314 @@ class k_git_cmd(k_launcher_repo.k_repo):
         repo_path = os.path.join(path_folder, name)
         if os.path.exists(repo_path):
             try:
-                subprocess.run(["git", "checkout", "-b", branch_name], cwd=repo_path, check=True)
+                self.run_git(["checkout", "-b", branch_name], repo_path, stream=True)
                 logging.info(f"Created and checked out branch '{branch_name}' for repository '{name}'")
-            except subprocess.CalledProcessError as e:
+            except k_launcher_git_async.GIT_ERRORS as e:
                 logging.error(f"Error creating or checking out branch '{branch_name}' for '{name}': {e.stderr}", exc_info=True)
         else:
             logging.warning(f"Repository '{name}' not found locally.")
 
 
-    def list_remote_branches(self, path_folder, name):
+    def list_remote_branches(self, path_folder, name, refresh=False):
         """
         Lists all remote branches in the repository.
 
+        The branches of each remote come from the shared remote-ref cache (see
+        `k_launcher_refs.get_remote_refs`), refreshed in the background when stale,
+        so they include the branches pushed since the last fetch. The remote-tracking
+        refs of the repository are used when the remote cannot be listed.
+
         Args:
             path_folder (str): Path to the parent folder containing the repository.
             name (str): Name of the repository to list remote branches.
+            refresh (bool): Lists the remotes now instead of using the cache.
+
+        Returns:
+            list or None: The remote branches (e.g. ["origin/main"]), None on failure.
 
         Logs:
             - Info: When the remote branches are successfully listed.
             - Warning: If the repository is not found locally.
             - Error: If listing remote branches fails.
         """
+        import k_launcher_refs
+
         repo_path = os.path.join(path_folder, name)
         if os.path.exists(repo_path):
             try:
-                result = subprocess.run(
-                    ["git", "branch", "-r"], cwd=repo_path, check=True, capture_output=True, text=True
-                )
-                logging.info(f"Remote branches for '{name}':\n{result.stdout}")
-            except subprocess.CalledProcessError as e:
+                config = k_launcher_git_async.read_git_config(repo_path)
+                refs = None
+                branches = []
+                for section in config.sections():
+                    if not section.startswith('remote "'):
+                        continue
+                    remote = section[len('remote "'):-1]
+                    url = config.get(section, "url", fallback=None)
+                    entry = k_launcher_refs.get_remote_refs(url, max_age=0 if refresh else None) if url else None
+                    if entry is not None:
+                        branches.extend(f"{remote}/{branch}" for branch in sorted(entry["heads"]))
+                        continue
+                    refs = self.get_refs(repo_path) if refs is None else refs
+                    branches.extend(
+                        ref[len("refs/remotes/"):] for ref in refs
+                        if ref.startswith(f"refs/remotes/{remote}/") and not ref.endswith("/HEAD")
+                    )
+                logging.info(f"Remote branches for '{name}':\n" + "\n".join(branches))
+                return branches
+            except k_launcher_git_async.GIT_ERRORS as e:
                 logging.error(f"Error listing remote branches for repository '{name}': {e.stderr}", exc_info=True)
         else:
             logging.warning(f"Repository '{name}' not found locally.")
+        return None
+
+
+    @staticmethod
+    def build_clone_args(url, repo_path, options):
+        """
+        Builds the `git clone` arguments of a clone strategy.
+
+        Args:
+            url (str): The URL of the repository.
+            repo_path (str): The destination folder.
+            options (dict): The clone options:
+                - depth (int): Shallow clone of the last `depth` commits.
+                - filter (str): Partial clone, "blob:none" (blobless) or "tree:0" (treeless).
+                - single_branch (bool): True only fetches the history of one branch,
+                                        False of every branch. Unset, git decides:
+                                        a shallow clone (`depth`) is single branch.
+                - branch (str): The branch to check out (and fetch with `single_branch`).
+                - reference (str): A local repository or mirror whose objects are borrowed,
+                                   ignored if it does not exist.
+                - dissociate (bool): Copies the borrowed objects so the clone does not
+                                     depend on `reference` afterwards.
+                - many_files (bool): Configures the clone with the many files profile
+                                     before its files are checked out.
+
+        Returns:
+            list: The git arguments, without "git".
+
+        Raises:
+            ValueError: If the filter is not one of `CLONE_FILTERS`.
+        """
+        args = ["clone", "--progress"]
+        if options.get("depth"):
+            args += ["--depth", str(int(options["depth"]))]
+        if options.get("filter"):
+            if options["filter"] not in CLONE_FILTERS:
+                raise ValueError(f"Unsupported clone filter '{options['filter']}', use one of {CLONE_FILTERS}.")
+            args += [f"--filter={options['filter']}"]
+        if options.get("single_branch") is not None:
+            args += ["--single-branch" if options["single_branch"] else "--no-single-branch"]
+        if options.get("branch"):
+            args += ["--branch", options["branch"]]
+        if options.get("reference"):
+            args += ["--reference-if-able", options["reference"]]
+            if options.get("dissociate"):
+                args += ["--dissociate"]
+        if options.get("many_files"):
+            for key, value in k_git_cmd.get_many_files_config().items():
+                args += [f"--config={key}={value}"]
+        return args + [url, repo_path]
+
+
+    @staticmethod
+    def get_many_files_config():
+        """
+        Returns the git configuration of the many files profile on this machine.
+
+        Returns:
+            dict: `MANY_FILES_CONFIG`, with `core.fsmonitor` on the platforms of
+                  `FSMONITOR_PLATFORMS`.
+        """
+        config = dict(MANY_FILES_CONFIG)
+        if sys.platform in FSMONITOR_PLATFORMS:
+            config.setdefault("core.fsmonitor", "true")
+        return config
+
+
+    def apply_many_files_profile(self, path_folder, name):
+        """
+        Configures an existing repository with the many files profile and rewrites its index.
+
+        Args:
+            path_folder (str): Path to the parent folder containing the repository.
+            name (str): Name of the repository.
 
+        Returns:
+            bool: True if the profile is applied.
 
-    def clone_repository(self, name="", path=".", custom_url=""):
+        Logs:
+            - Info: The applied settings.
+            - Warning: If the repository is not found locally.
+            - Error: If git fails.
+        """
+        repo_path = os.path.join(path_folder, name)
+        if not os.path.isdir(repo_path):
+            logging.warning(f"Repository '{name}' not found locally.")
+            return False
+
+        config = self.get_many_files_config()
+        args = ["update-index"]
+        if config.get("index.version"):
+            args += ["--index-version", str(config["index.version"])]
+        if str(config.get("core.splitIndex")).lower() == "true":
+            args += ["--split-index"]
+        if str(config.get("core.untrackedCache")).lower() == "true":
+            args += ["--untracked-cache"]
+        try:
+            for key, value in config.items():
+                self.run_git(["config", key, str(value)], repo_path)
+            if len(args) > 1:
+                self.run_git(args, repo_path)
+        except k_launcher_git_async.GIT_ERRORS as e:
+            logging.error(f"Failed to apply the many files profile to '{name}': {e.stderr or e}")
+            return False
+        logging.info(f"Many files profile applied to '{name}': {', '.join(f'{k}={v}' for k, v in config.items())}")
+        return True
+
+
+    def stage_paths(self, repo_path, paths):
+        """
+        Stages the changes (edits, additions and deletions) of the given paths only.
+
+        The paths are passed through a file, so git neither scans the rest of the
+        working tree nor hits the command line length limit.
+
+        Args:
+            repo_path (str): The repository folder.
+            paths (list): The paths, relative to the repository or absolute.
+
+        Raises:
+            subprocess.CalledProcessError: If git fails, e.g. a path is unknown.
+            subprocess.TimeoutExpired: If git does not finish in time.
+        """
+        paths = [os.path.relpath(path, repo_path) if os.path.isabs(path) else path for path in paths]
+        with tempfile.NamedTemporaryFile("wb", suffix=".pathspec", delete=False) as file:
+            file.write(b"\0".join(os.fsencode(path) for path in paths))
+        try:
+            self.run_git(
+                ["--literal-pathspecs", "add", "--all", f"--pathspec-from-file={file.name}", "--pathspec-file-nul"],
+                repo_path
+            )
+        finally:
+            os.remove(file.name)
+
+
+    def is_registered_url(self, url):
+        """
+        Tells whether a URL belongs to a repository of the registry.
+
+        Args:
+            url (str): The remote URL.
+
+        Returns:
+            bool: True if a repository of repos.json uses this URL.
+        """
+        return any(self.get_repository_url(name) == url for name in self.repo_dict)
+
+
+    def get_clone_strategy(self, name, options=None):
+        """
+        Merges the clone options of `CLONE_DEFAULTS`, of the repository in repos.json
+        and of the call, in that order of priority.
+
+        Args:
+            name (str): Alias of the repository.
+            options (dict, optional): The options of the call, None values are ignored.
+
+        Returns:
+            dict: The clone options.
+        """
+        strategy = dict(CLONE_DEFAULTS)
+        if name:
+            strategy.update(self.get_clone_options(name))
+        strategy.update({key: value for key, value in (options or {}).items() if value is not None})
+        return strategy
+
+
+    @staticmethod
+    def record_clone_stats(name, url, options, duration, repo_path):
+        """
+        Appends the duration and size on disk of a clone to `CLONE_STATS_FILE`.
+
+        Args:
+            name (str): Alias of the repository.
+            url (str): URL of the repository.
+            options (dict): The clone options used.
+            duration (float): The clone time, in seconds.
+            repo_path (str): The cloned folder.
+
+        Returns:
+            dict: The recorded entry.
+        """
+        import k_launcher_utils
+
+        git_size = k_launcher_utils.get_folder_size(os.path.join(repo_path, ".git"))
+        entry = {
+            "time": time.time(),
+            "name": name,
+            "url": url,
+            "options": options,
+            "duration": round(duration, 3),
+            "size": k_launcher_utils.get_folder_size(repo_path),
+            "git_size": git_size,
+        }
+        try:
+            with k_launcher_storage.file_lock(CLONE_STATS_FILE):
+                with open(CLONE_STATS_FILE, "a") as file:
+                    file.write(json.dumps(entry) + "\n")
+        except (OSError, TimeoutError) as e:
+            logging.warning(f"Failed to record clone stats: {e}")
+        logging.info(
+            f"Cloned '{name}' in {duration:.1f}s, {k_launcher_utils.format_size(entry['size'])} on disk "
+            f"({k_launcher_utils.format_size(git_size)} in .git)."
+        )
+        return entry
+
+
+    @staticmethod
+    def show_clone_stats(name=None):
+        """
+        Logs the median clone time and size on disk per repository and strategy.
+
+        Args:
+            name (str, optional): Only reports this repository.
+
+        Returns:
+            dict: `{(name, strategy): {"clones", "duration", "size"}}` with the medians.
+        """
+        import k_launcher_utils
+
+        groups = {}
+        if os.path.exists(CLONE_STATS_FILE):
+            with open(CLONE_STATS_FILE, "r") as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if name and entry.get("name") != name:
+                        continue
+                    strategy = json.dumps(entry.get("options") or {}, sort_keys=True)
+                    groups.setdefault((entry.get("name"), strategy), []).append(entry)
+
+        summary = {}
+        for key, entries in sorted(groups.items()):
+            summary[key] = {
+                "clones": len(entries),
+                "duration": statistics.median(entry["duration"] for entry in entries),
+                "size": statistics.median(entry["size"] for entry in entries),
+            }
+            logging.info(
+                f"{key[0]} {key[1]}: {summary[key]['clones']} clone(s), median {summary[key]['duration']:.1f}s, "
+                f"{k_launcher_utils.format_size(summary[key]['size'])}"
+            )
+        if not summary:
+            logging.info("No clone recorded.")
+        return summary
+
+
+    def clone_repository(self, name="", path=".", custom_url="", options=None):
         """
         Clones a repository from a given alias or custom URL.
 
@@ -216,46 +1442,65 @@ class k_git_cmd(k_launcher_repo.k_repo):
             name (str): Alias of the repository to clone.
             path (str): Local path to clone the repository to.
             custom_url (str): Custom URL for the repository (optional).
+            options (dict, optional): Clone options of this call (see `build_clone_args`),
+                                      merged over the options of the repository.
+
+        Returns:
+            bool: True if the repository was cloned.
 
         Logs:
-            - Info: When the repository is successfully cloned.
+            - Info: When the repository is successfully cloned, with its time and size.
             - Error: If cloning fails or the alias/URL is invalid.
         """
+        import k_launcher_mirror
+
         repo_path = os.path.join(path, name)
         if not custom_url:
             if not name:
                 logging.error("No repository name or custom URL provided.")
-                return
+                return False
             url = self.get_repository_url(name)
         else:
             url = custom_url
 
         if not url:
             logging.error(f"Repository '{name}' not found or URL is invalid.")
-            return
+            return False
 
         if not os.path.exists(repo_path):
             logging.info(f"Creating directory: {repo_path}")
             os.makedirs(repo_path)
 
         try:
-            self.start_ssh_agent()
-
-            logging.info(f"Cloning repository '{name}' from {url} to {repo_path}")
-            result = subprocess.run(
-                ["git", "clone", url, repo_path], 
-                check=True, 
-                capture_output=True, 
-                text=True
-            )
-            logging.info(result.stdout)
-        except subprocess.CalledProcessError as e:
+            if not url.startswith(("http://", "https://", "file://")) and k_launcher_git_async.get_url_host(url) != "local":
+                self.start_ssh_agent()
+
+            strategy = self.get_clone_strategy(name, options)
+            start = time.perf_counter()
+            mirror = None
+            if self.use_mirrors and self.is_registered_url(url) and k_launcher_git_async.get_url_host(url) != "local":
+                mirror = k_launcher_mirror.get_clone_source(url)
+
+            if mirror:
+                # Objects are borrowed from the mirror, history limits would only cost time.
+                strategy = {key: value for key, value in strategy.items() if key not in ("depth", "filter")}
+                strategy["reference"] = mirror
+                logging.info(f"Cloning repository '{name}' from the mirror of {url} to {repo_path} {strategy}")
+                self.run_git(self.build_clone_args(mirror, repo_path, strategy), stream=True)
+                self.run_git(["remote", "set-url", "origin", url], repo_path)
+            else:
+                logging.info(f"Cloning repository '{name}' from {url} to {repo_path} {strategy or ''}")
+                self.run_git(self.build_clone_args(url, repo_path, strategy), stream=True)
+            self.record_clone_stats(name, url, strategy, time.perf_counter() - start, repo_path)
+            return True
+        except k_launcher_git_async.GIT_ERRORS as e:
             logging.error(f"Error cloning repository '{name}': {e.stderr}", exc_info=True)
         except Exception as e:
             logging.error(f"Unexpected error occurred: {e}", exc_info=True)
+        return False
 
 
-    def commit_repository(self, path_folder, name, message, add_all=False, push=True, remote="origin"):
+    def commit_repository(self, path_folder, name, message, add_all=False, push=True, remote="origin", paths=None):
         """
         Commits changes in the repository.
 
@@ -264,6 +1509,8 @@ class k_git_cmd(k_launcher_repo.k_repo):
             name (str): Name of the repository to commit changes.
             message (str): Commit message.
             add_all (bool): Whether to stage all changes before committing (default: False).
+            paths (list, optional): The changed paths, only these are staged (see `stage_paths`)
+                                    instead of scanning the whole working tree.
 
         Logs:
             - Info: When the changes are successfully committed.
@@ -282,40 +1529,33 @@ class k_git_cmd(k_launcher_repo.k_repo):
 
         if os.path.exists(repo_path) and configInfo:
             try:
-                subprocess.run(
-                    ["git", "config", "user.name", configInfo["user_name"]],
-                    cwd=repo_path,
-                    check=True
-                )
-                subprocess.run(
-                    ["git", "config", "user.email", configInfo["user_mail"]],
-                    cwd=repo_path,
-                    check=True
-                )
+                self.run_git(["config", "user.name", configInfo["user_name"]], repo_path)
+                self.run_git(["config", "user.email", configInfo["user_mail"]], repo_path)
 
-                if add_all:
+                if paths:
+                    logging.info(f"Staging {len(paths)} path(s) in repository '{name}'...")
+                    self.stage_paths(repo_path, paths)
+                elif add_all:
                     logging.info(f"Staging all changes in repository '{name}'...")
-                    subprocess.run(["git", "add", "--all"], cwd=repo_path, check=True)
+                    self.run_git(["add", "--all"], repo_path)
                 else:
                     logging.info(f"Staging modified files in repository '{name}'...")
-                    subprocess.run(["git", "add", "."], cwd=repo_path, check=True)
+                    self.run_git(["add", "."], repo_path)
 
                 logging.info(f"Committing changes in repository '{name}' with message: '{message}'...")
-                subprocess.run(["git", "commit", "-m", message], cwd=repo_path, check=True)
+                self.run_git(["commit", "-m", message], repo_path, stream=True)
 
                 if push:
                     logging.info(f"Determining the current branch in repository '{name}'...")
-                    branch = subprocess.check_output(
-                        ["git", "branch", "--show-current"], cwd=repo_path
-                    ).strip().decode()
+                    branch = self.run_git(["branch", "--show-current"], repo_path).stdout.strip()
 
                     logging.info(f"Pushing branch '{branch}' to remote '{remote}'...")
-                    subprocess.run(["git", "push", remote, branch], cwd=repo_path, check=True)
+                    self.run_git(["push", remote, branch], repo_path, stream=True)
                     logging.info(f"Successfully pushed branch '{branch}' to remote '{remote}' for repository '{name}'")
                 else:
                     logging.info(f"Push skipped for repository '{name}' (push=False)")
     
-            except subprocess.CalledProcessError as e:
+            except k_launcher_git_async.GIT_ERRORS as e:
                 logging.error(
                     f"Error committing/pushing changes to repository '{name}': {e.stderr or str(e)}",
                     exc_info=True
@@ -324,6 +1564,178 @@ class k_git_cmd(k_launcher_repo.k_repo):
             logging.warning(f"Repository '{name}' not found locally.")
 
 
+    @staticmethod
+    def parse_commit_log(output):
+        """
+        Parses the output of `git log --format=LOG_FORMAT`.
+
+        Every field ends with a NUL byte and every commit with a newline, so
+        authors or subjects containing separators never break the parsing.
+
+        Args:
+            output (str): The log output.
+
+        Returns:
+            list: One dictionary per commit with the `LOG_FIELDS`, `parents` as a
+                  list, `refs` (branches, HEAD) and `tags` split from the decorations.
+        """
+        commits = []
+        for record in output.split("\x00\n"):
+            fields = record.lstrip("\n").split("\x00")
+            if len(fields) < len(LOG_FIELDS):
+                continue
+            commit = dict(zip(LOG_FIELDS, fields))
+            commit["parents"] = commit["parents"].split()
+            decorations = [item.strip() for item in commit.pop("decorations").split(",") if item.strip()]
+            commit["tags"] = [item[len("tag: "):] for item in decorations if item.startswith("tag: ")]
+            commit["refs"] = [item for item in decorations if not item.startswith("tag: ")]
+            commits.append(commit)
+        return commits
+
+
+    def get_commit_log(self, path_folder, name, n=None, all_refs=False):
+        """
+        Reads the commits of the repository in a single `git log` call.
+
+        The last commits, up to `GIT_IN_PROCESS_MAX_COMMITS`, are read in process
+        (see `get_repo`).
+
+        Args:
+            path_folder (str): Path to the parent folder containing the repository.
+            name (str): Name of the repository.
+            n (int, optional): Maximum number of commits, all if None.
+            all_refs (bool): Includes the commits of every branch and tag, not only HEAD.
+
+        Returns:
+            list: The commit records (see `parse_commit_log`), newest first.
+
+        Raises:
+            subprocess.CalledProcessError: If git fails.
+            subprocess.TimeoutExpired: If git does not finish in time.
+        """
+        repo_path = os.path.join(path_folder, name)
+        repo = self.get_repo(repo_path) if n and int(n) <= GIT_IN_PROCESS_MAX_COMMITS else None
+        if repo is not None:
+            try:
+                return self._commit_log_in_process(repo, n, all_refs)
+            except Exception as e:
+                logging.debug(f"In-process log failed for '{repo_path}', using git: {e}")
+
+        args = ["log", f"--format={LOG_FORMAT}", "--decorate=short"]
+        if n:
+            args.append(f"-n{int(n)}")
+        if all_refs:
+            args.append("--all")
+        return self.parse_commit_log(self.run_git(args, repo_path).stdout)
+
+
+    @staticmethod
+    def _ref_commits(repo):
+        """
+        Resolves the commit of every ref from the ref files (see `read_refs`).
+
+        Only the loose tags are read from the object database, to peel annotated tags.
+
+        Args:
+            repo (git.Repo): The repository.
+
+        Returns:
+            list: `(ref path, commit hexsha)` pairs.
+
+        Raises:
+            ValueError: If the refs cannot be read in process (reftable).
+        """
+        git = import_gitpython()
+        refs = read_refs(repo.common_dir)
+        if refs is None:
+            raise ValueError("reftable repositories are not read in process")
+        pairs = []
+        for path, (hexsha, commit_hexsha) in sorted(refs.items()):
+            if commit_hexsha is None:
+                try:
+                    commit_hexsha = git.TagReference(repo, path).commit.hexsha
+                except ValueError:
+                    continue
+            pairs.append((path, commit_hexsha))
+        return pairs
+
+
+    @classmethod
+    def _commit_log_in_process(cls, repo, n, all_refs=False):
+        """
+        Reads the last `n` commits with GitPython, newest commit date first like `git log`.
+
+        Args:
+            repo (git.Repo): The repository.
+            n (int): Maximum number of commits.
+            all_refs (bool): Starts from every ref, not only HEAD.
+
+        Returns:
+            list: The commit records of `parse_commit_log`.
+        """
+        try:
+            head = repo.head.commit
+        except ValueError:
+            return []
+        head_ref = None if repo.head.is_detached else repo.head.reference.path
+        decorations = {head.hexsha: [f"HEAD -> {head_ref[len('refs/heads/'):]}" if head_ref else "HEAD"]}
+        starts = [head.hexsha]
+        for path, hexsha in cls._ref_commits(repo):
+            if path == head_ref:
+                continue
+            for prefix, label in (("refs/heads/", ""), ("refs/remotes/", ""), ("refs/tags/", "tag: ")):
+                if path.startswith(prefix):
+                    decorations.setdefault(hexsha, []).append(label + path[len(prefix):])
+                    break
+            else:
+                decorations.setdefault(hexsha, []).append(path)
+            if all_refs:
+                starts.append(hexsha)
+
+        git = import_gitpython()
+        commits, seen, pending = [], set(), []
+        for hexsha in starts:
+            if hexsha not in seen:
+                seen.add(hexsha)
+                commit = git.Commit(repo, bytes.fromhex(hexsha))
+                heapq.heappush(pending, (-commit.committed_date, len(seen), commit))
+        while pending and len(commits) < int(n):
+            _date, _order, commit = heapq.heappop(pending)
+            labels = decorations.get(commit.hexsha, [])
+            commits.append({
+                "hash": commit.hexsha,
+                "short_hash": commit.hexsha[:7],
+                "parents": [parent.hexsha for parent in commit.parents],
+                "author": commit.author.name,
+                "email": commit.author.email,
+                "date": commit.authored_datetime.isoformat(),
+                "subject": " ".join(line.strip() for line in commit.message.strip().split("\n\n", 1)[0].splitlines()),
+                "tags": [label[len("tag: "):] for label in labels if label.startswith("tag: ")],
+                "refs": [label for label in labels if not label.startswith("tag: ")],
+            })
+            for parent in commit.parents:
+                if parent.hexsha not in seen:
+                    seen.add(parent.hexsha)
+                    heapq.heappush(pending, (-parent.committed_date, len(seen), parent))
+        return commits
+
+
+    @staticmethod
+    def format_commit(commit):
+        """
+        Formats a commit record on one line, like `git log --oneline --decorate`.
+
+        Args:
+            commit (dict): The commit record.
+
+        Returns:
+            str: e.g. "1a2b3c4 (HEAD -> main, tag: v1.0) 2024-01-01 author: subject".
+        """
+        decorations = commit["refs"] + [f"tag: {tag}" for tag in commit["tags"]]
+        decorated = f" ({', '.join(decorations)})" if decorations else ""
+        return f"{commit['short_hash']}{decorated} {commit['date'][:10]} {commit['author']}: {commit['subject']}"
+
+
     def show_commit_log(self, path_folder, name, n=5):
         """
         Displays the last `n` commits in the repository.
@@ -333,6 +1745,9 @@ class k_git_cmd(k_launcher_repo.k_repo):
             name (str): Name of the repository to show the commit log.
             n (int): Number of commits to display (default: 5).
 
+        Returns:
+            list or None: The commit records (see `parse_commit_log`), None on failure.
+
         Logs:
             - Info: When the commit log is successfully fetched.
             - Warning: If the repository is not found locally.
@@ -341,14 +1756,16 @@ class k_git_cmd(k_launcher_repo.k_repo):
         repo_path = os.path.join(path_folder, name)
         if os.path.exists(repo_path):
             try:
-                result = subprocess.run(
-                    ["git", "log", f"-n {n}"], cwd=repo_path, check=True, capture_output=True, text=True
+                commits = self.get_commit_log(path_folder, name, n=n)
+                logging.info(
+                    f"Last {n} commits for '{name}':\n" + "\n".join(self.format_commit(commit) for commit in commits)
                 )
-                logging.info(f"Last {n} commits for '{name}':\n{result.stdout}")
-            except subprocess.CalledProcessError as e:
+                return commits
+            except k_launcher_git_async.GIT_ERRORS as e:
                 logging.error(f"Error fetching commit log for repository '{name}': {e.stderr}", exc_info=True)
         else:
             logging.warning(f"Repository '{name}' not found locally.")
+        return None
 
 
     def tag_repository(self, path_folder, name, tag_name):
@@ -368,9 +1785,9 @@ class k_git_cmd(k_launcher_repo.k_repo):
         repo_path = os.path.join(path_folder, name)
         if os.path.exists(repo_path):
             try:
-                subprocess.run(["git", "tag", tag_name], cwd=repo_path, check=True)
+                self.run_git(["tag", tag_name], repo_path)
                 logging.info(f"Tagged repository '{name}' with '{tag_name}'")
-            except subprocess.CalledProcessError as e:
+            except k_launcher_git_async.GIT_ERRORS as e:
                 logging.error(f"Error tagging repository '{name}' with '{tag_name}': {e.stderr}", exc_info=True)
         else:
             logging.warning(f"Repository '{name}' not found locally.")
@@ -380,10 +1797,17 @@ class k_git_cmd(k_launcher_repo.k_repo):
         """
         Lists the complete history of the repository, including commits and tags.
 
+        The commits and their tags are read in a single `git log` call.
+
         Args:
             path_folder (str): Path to the parent folder containing the repository.
             name (str): Name of the repository to list the history.
 
+        Returns:
+            dict or None: `{"commits": [...], "tags": [...]}` with the commit records
+                          of HEAD (see `parse_commit_log`) and the tags of every
+                          branch, None on failure.
+
         Logs:
             - Info: When the commit history and tags are successfully fetched.
             - Warning: If the repository is not found locally.
@@ -392,30 +1816,47 @@ class k_git_cmd(k_launcher_repo.k_repo):
         repo_path = os.path.join(path_folder, name)
         if os.path.exists(repo_path):
             try:
-                commit_log = subprocess.run(
-                    ["git", "log", "--oneline", "--decorate"], 
-                    cwd=repo_path, 
-                    check=True, 
-                    capture_output=True, 
-                    text=True
+                commits = self.get_commit_log(path_folder, name, all_refs=True)
+                tags = sorted({tag for commit in commits for tag in commit["tags"]})
+                head_commits = self._reachable_from_head(commits)
+                logging.info(
+                    f"Commit history for '{name}':\n" + "\n".join(self.format_commit(commit) for commit in head_commits)
                 )
-                logging.info(f"Commit history for '{name}':\n{commit_log.stdout}")
-
-                tags = subprocess.run(
-                    ["git", "tag"], 
-                    cwd=repo_path, 
-                    check=True, 
-                    capture_output=True, 
-                    text=True
-                )
-                if tags.stdout.strip():
-                    logging.info(f"Tags for '{name}':\n{tags.stdout}")
+                if tags:
+                    logging.info(f"Tags for '{name}':\n" + "\n".join(tags))
                 else:
                     logging.info(f"No tags found for repository '{name}'")
+                return {"commits": head_commits, "tags": tags}
 
-            except subprocess.CalledProcessError as e:
+            except k_launcher_git_async.GIT_ERRORS as e:
                 logging.error(f"Error listing history for repository '{name}': {e.stderr}", exc_info=True)
         else:
             logging.warning(f"Repository '{name}' not found locally.")
+        return None
+
+
+    @staticmethod
+    def _reachable_from_head(commits):
+        """
+        Keeps the commits reachable from HEAD among the commits of every ref.
+
+        Args:
+            commits (list): The commit records of `get_commit_log(all_refs=True)`.
+
+        Returns:
+            list: The commits of HEAD, in the order of `commits`.
+        """
+        by_hash = {commit["hash"]: commit for commit in commits}
+        head = next((commit for commit in commits if any(ref.split(" -> ")[0] == "HEAD" for ref in commit["refs"])), None)
+        if head is None:
+            return []
+        reachable, pending = set(), [head["hash"]]
+        while pending:
+            commit_hash = pending.pop()
+            if commit_hash in reachable or commit_hash not in by_hash:
+                continue
+            reachable.add(commit_hash)
+            pending.extend(by_hash[commit_hash]["parents"])
+        return [commit for commit in commits if commit["hash"] in reachable]
 
 
@@ -1,7 +1,291 @@
 
 # regular import
-import psutil
 import os
+import sys
+import socket
+import hashlib
+
+# custom packages import
+from k_constants import CONSTANTS
+
+
+# Exported once per shell (see `get_session_export_line`) to skip the process walk.
+SESSION_ENV_VAR = "K_LAUNCHER_SESSION"
+# PID of the terminal owning the exported session, the session is only used by
+# its descendants (child processes inherit the variables of their parent).
+SESSION_PID_ENV_VAR = "K_LAUNCHER_SESSION_PID"
+
+# Process names (without ".exe") considered as the terminal owning the session.
+SHELL_NAMES = tuple(getattr(
+    CONSTANTS,
+    "session_shell_names",
+    ("cmd", "powershell", "pwsh", "bash", "zsh", "tcsh", "csh", "sh", "fish"),
+))
+
+# Shell arguments marking an interactive shell, a shell given a script or a command
+# without one of them is a wrapper (alias script, `sh -c`) and the walk goes on.
+INTERACTIVE_SHELL_ARGS = ("-i", "--interactive", "/k", "-noexit")
+WRAPPER_SHELL_ARGS = ("-c", "/c", "-command", "-file", "-encodedcommand")
+
+# Maximum number of ancestors inspected when looking for the terminal.
+MAX_ANCESTORS = getattr(CONSTANTS, "session_max_ancestors", 8)
+
+# Maximum number of ancestors inspected when checking the owner of an exported session.
+MAX_OWNER_ANCESTORS = 64
+
+
+_SESSION_ID = None
+
+
+def _normalize_process_name(name):
+    """
+    Normalizes a process name for comparison with `SHELL_NAMES`.
+
+    Args:
+        name (str): The process name (e.g. "cmd.exe", "-bash").
+
+    Returns:
+        str: The lower case name without login dash or ".exe" suffix.
+    """
+    name = name.lower().lstrip("-")
+    if name.endswith(".exe"):
+        name = name[:-len(".exe")]
+    return name
+
+
+def _is_wrapper_shell(cmdline):
+    """
+    Tells whether a shell runs a script or a command instead of the user's terminal.
+
+    Args:
+        cmdline (list): The command line of the shell process.
+
+    Returns:
+        bool: True for `bash script.sh`, `sh -c ...`, `cmd /c ...`, `powershell -File ...`,
+              False for an interactive or login shell.
+    """
+    args = [arg.lower() for arg in cmdline[1:]]
+    if any(arg in INTERACTIVE_SHELL_ARGS for arg in args):
+        return False
+    options = ("-", "/") if os.name == "nt" else ("-", "+")
+    return any(arg in WRAPPER_SHELL_ARGS or not arg.startswith(options) for arg in args)
+
+
+def find_terminal_process(shell_names=None, max_ancestors=None):
+    """
+    Walks up the parent processes looking for the shell that launched this script.
+
+    Non-interactive shells (wrapper scripts, `sh -c`, see `_is_wrapper_shell`) are
+    skipped so every call from the same terminal finds the same shell. The walk is
+    bounded by `max_ancestors`. Without an interactive shell the first wrapper shell
+    is used, without any shell the direct parent process, so the session is never
+    left undefined.
+
+    Args:
+        shell_names (iterable, optional): Accepted shell names, defaults to `SHELL_NAMES`.
+        max_ancestors (int, optional): Maximum number of ancestors to inspect,
+                                       defaults to `MAX_ANCESTORS`.
+
+    Returns:
+        tuple: `(pid, create_time)` of the terminal process, or `(None, None)`
+               if the parent process cannot be inspected.
+    """
+    import psutil
+
+    shell_names = set(shell_names or SHELL_NAMES)
+    max_ancestors = MAX_ANCESTORS if max_ancestors is None else max_ancestors
+
+    try:
+        parent = psutil.Process(os.getppid())
+        fallback = (parent.pid, parent.create_time())
+    except psutil.Error:
+        return None, None
+
+    shell = None
+    process = parent
+    for _depth in range(max_ancestors):
+        if process is None:
+            break
+        try:
+            with process.oneshot():
+                if _normalize_process_name(process.name()) in shell_names:
+                    try:
+                        wrapper = _is_wrapper_shell(process.cmdline())
+                    except psutil.AccessDenied:
+                        wrapper = False
+                    if not wrapper:
+                        return process.pid, process.create_time()
+                    if shell is None:
+                        shell = (process.pid, process.create_time())
+                process = process.parent()
+        except psutil.Error:
+            break
+
+    return shell or fallback
+
+
+def get_host_tag(hostname=None):
+    """
+    Returns the short hash of a hostname used in the session IDs.
+
+    Args:
+        hostname (str, optional): The hostname, defaults to this machine.
+
+    Returns:
+        str: 8 hexadecimal characters.
+    """
+    hostname = (hostname or socket.gethostname()).lower()
+    return hashlib.sha1(hostname.encode("utf-8")).hexdigest()[:8]
+
+
+def format_session_id(pid, create_time, host_tag=None):
+    """
+    Builds a session ID from a terminal PID, its creation time and the host.
+
+    The CONTEXT folder is shared by every workstation, the host tag keeps two
+    terminals with the same PID and start second on two machines apart.
+
+    Args:
+        pid (int): The terminal PID.
+        create_time (float): The terminal creation time, as returned by psutil.
+        host_tag (str, optional): The host tag, defaults to `get_host_tag()`.
+
+    Returns:
+        str: The session ID, e.g. "1234-1700000000-1a2b3c4d".
+    """
+    return f"{pid}-{int(create_time)}-{host_tag or get_host_tag()}"
+
+
+def parse_session_id(session_id):
+    """
+    Splits a session ID into the terminal PID and creation time.
+
+    Accepts IDs built by `format_session_id` as well as the "pid-create_time"
+    IDs and bare PIDs used by older versions of the launcher.
+
+    Args:
+        session_id (str): The session ID.
+
+    Returns:
+        tuple: `(pid, create_time)`, each None when not part of the ID.
+    """
+    pid, _, create_time = str(session_id).partition("-")
+    create_time = create_time.partition("-")[0]
+    try:
+        pid = int(pid)
+    except ValueError:
+        return None, None
+    try:
+        create_time = int(create_time)
+    except ValueError:
+        create_time = None
+    return pid, create_time
+
+
+def parse_session_host(session_id):
+    """
+    Returns the host tag of a session ID.
+
+    Args:
+        session_id (str): The session ID.
+
+    Returns:
+        str or None: The host tag (see `get_host_tag`), None for the IDs of older versions.
+    """
+    parts = str(session_id).split("-")
+    return parts[2] if len(parts) == 3 else None
+
+
+def _get_parent_pid(pid):
+    """
+    Returns the parent PID of a process, from /proc when available (no psutil import).
+
+    Args:
+        pid (int): The process.
+
+    Returns:
+        int or None: The parent PID, None if the process cannot be inspected.
+    """
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as stat_file:
+            # "pid (name) state ppid ...", the name may contain spaces and parentheses.
+            return int(stat_file.read().rpartition(b")")[2].split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    import psutil
+    try:
+        return psutil.Process(pid).ppid()
+    except psutil.Error:
+        return None
+
+
+def is_ancestor(pid, max_ancestors=MAX_OWNER_ANCESTORS):
+    """
+    Tells whether a process is an ancestor of the current process.
+
+    Args:
+        pid (int): The candidate ancestor.
+        max_ancestors (int): Maximum number of ancestors inspected.
+
+    Returns:
+        bool: True if `pid` is the parent of this process, or its parent, and so on.
+    """
+    parent = os.getppid()
+    for _depth in range(max_ancestors):
+        if parent == pid:
+            return True
+        if not parent:
+            return False
+        parent = _get_parent_pid(parent)
+    return False
+
+
+def _get_exported_session_id():
+    """
+    Returns the exported session ID if this process runs in the terminal owning it.
+
+    The variables are inherited by every process started from the terminal,
+    including a detached DCC that outlives it and the terminals it opens. The
+    session is only used while its owner (`K_LAUNCHER_SESSION_PID`, or the PID of
+    the ID for an older export) is an ancestor of this process.
+
+    Returns:
+        str or None: The session ID, None if not exported or not owned by an ancestor.
+    """
+    session_id = os.environ.get(SESSION_ENV_VAR)
+    if not session_id:
+        return None
+    try:
+        owner = int(os.environ[SESSION_PID_ENV_VAR])
+    except (KeyError, ValueError):
+        owner = parse_session_id(session_id)[0]
+    if owner is None or not is_ancestor(owner):
+        return None
+    return session_id
+
+
+def get_session_id():
+    """
+    Returns the ID of the terminal session running this script.
+
+    Uses the `K_LAUNCHER_SESSION` environment variable when it is exported by
+    an ancestor of this process (see `_get_exported_session_id`), otherwise walks
+    the parent processes once (see `find_terminal_process`).
+    The result is cached for the lifetime of the process. The ID combines the
+    PID and creation time of the terminal, so a reused PID starts a new session,
+    and the host (see `format_session_id`).
+
+    Returns:
+        str: The session ID, or "None" if the terminal cannot be determined.
+    """
+    global _SESSION_ID
+    if _SESSION_ID is None:
+        session_id = _get_exported_session_id()
+        if not session_id:
+            pid, create_time = find_terminal_process()
+            session_id = format_session_id(pid, create_time) if pid else "None"
+        _SESSION_ID = session_id
+    return _SESSION_ID
 
 
 def get_terminal_pid():
@@ -11,14 +295,25 @@ def get_terminal_pid():
     Returns:
         int: The PID of the terminal process or None if not found.
     """
-    current_process = psutil.Process(os.getpid())
-    parent_pid = current_process.ppid()
+    return parse_session_id(get_session_id())[0]
 
-    while parent_pid:
-        parent_process = psutil.Process(parent_pid)
-        if 'cmd.exe' in parent_process.name().lower():
-            return parent_pid
-        parent_pid = parent_process.ppid()
 
-    return None
+def get_session_export_line():
+    """
+    Returns the shell command exporting the current session ID and its owner PID.
+
+    Running it once per shell lets every later launcher call skip the
+    process walk.
+
+    Returns:
+        str: `set` commands on Windows, an `export` command otherwise.
+    """
+    session_id = get_session_id()
+    owner = parse_session_id(session_id)[0] or ""
+    if os.name == "nt":
+        return f'set "{SESSION_ENV_VAR}={session_id}" & set "{SESSION_PID_ENV_VAR}={owner}"'
+    return f"export {SESSION_ENV_VAR}={session_id} {SESSION_PID_ENV_VAR}={owner}"
+
 
+if __name__ == "__main__":
+    sys.stdout.write(get_session_export_line() + "\n")
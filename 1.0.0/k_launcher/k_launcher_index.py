@@ -0,0 +1,289 @@
+
+# regular import
+import os
+import re
+import time
+import hashlib
+import logging
+
+# custom packages import
+import k_launcher_storage
+from k_constants import CONSTANTS
+
+
+logging.basicConfig(level=logging.INFO)
+
+
+INDEX_FOLDER = os.path.join(CONSTANTS.root_folder, CONSTANTS.context_folder, "package_index")
+
+
+def version_key(version):
+    """
+    Builds a sort key comparing versions token by token, numerically when possible.
+
+    Args:
+        version (str): The version (e.g. "1.10.2", "2.0.beta").
+
+    Returns:
+        tuple: A key where "1.10" > "1.9" and "1.0" < "1.0.1".
+    """
+    return tuple(
+        (1, int(token), "") if token.isdigit() else (0, 0, token)
+        for token in re.split(r"[.\-_]", version) if token
+    )
+
+
+def parse_version_range(version_range):
+    """
+    Parses a version range into a predicate.
+
+    Supported forms, combined with "," (and):
+        "1.0"        -> 1.0 and every 1.0.x version (rez family)
+        "==1.0"      -> exactly 1.0
+        ">=1.0", ">1.0", "<=2.0", "<2.0"
+        "1.0+"       -> 1.0 or above
+        "1.0+<2.0"   -> 1.0 or above, below 2.0
+        "1.0..2.0"   -> between 1.0 and 2.0, both included
+
+    Args:
+        version_range (str): The version range.
+
+    Returns:
+        callable: A function taking a version string and returning a bool.
+
+    Raises:
+        ValueError: If the range cannot be parsed.
+    """
+    checks = []
+    for part in (part.strip() for part in version_range.split(",")):
+        if not part:
+            continue
+        match = re.fullmatch(r"(==|>=|<=|>|<)(.+)", part)
+        if match:
+            operator, bound = match.group(1), version_key(match.group(2))
+            checks.append({
+                "==": lambda key, bound=bound: key == bound,
+                ">=": lambda key, bound=bound: key >= bound,
+                "<=": lambda key, bound=bound: key <= bound,
+                ">": lambda key, bound=bound: key > bound,
+                "<": lambda key, bound=bound: key < bound,
+            }[operator])
+        elif "+" in part:
+            lower, _, upper = part.partition("+")
+            lower_key = version_key(lower)
+            checks.append(lambda key, lower_key=lower_key: key >= lower_key)
+            if upper:
+                if not upper.startswith("<"):
+                    raise ValueError(f"Invalid version range '{version_range}'.")
+                upper_key = version_key(upper[1:])
+                checks.append(lambda key, upper_key=upper_key: key < upper_key)
+        elif ".." in part:
+            lower, _, upper = part.partition("..")
+            lower_key, upper_key = version_key(lower), version_key(upper)
+            checks.append(lambda key, lower_key=lower_key, upper_key=upper_key: lower_key <= key <= upper_key)
+        elif re.fullmatch(r"[\w.\-]+", part):
+            family = version_key(part)
+            checks.append(lambda key, family=family: key[:len(family)] == family)
+        else:
+            raise ValueError(f"Invalid version range '{version_range}'.")
+
+    return lambda version: all(check(version_key(version)) for check in checks)
+
+
+class PackageIndex:
+    """
+    Persistent index of the packages of a rez repository (`<root>/<name>/<version>/package.py`).
+
+    The index stores the name, version, folder and `package.py` mtime and size of
+    every package version. It is built once, then `refresh` only rescans the
+    package folders whose mtime changed (a version folder added, removed or
+    renamed) or with a version folder indexed before its package file was
+    written (`pending`). Package files edited in place leave the folder mtimes
+    untouched, `refresh(deep=True)` also detects them at the cost of one stat
+    per version.
+
+    Attributes:
+        root_folder (str): The repository folder.
+        index_file (str): The JSON file holding the index.
+        data (dict): The index: root mtime and, per package, its folder mtime, versions
+                     and version folders without package.py (`pending`).
+    """
+
+    def __init__(self, root_folder, index_file=None):
+        """
+        Initializes the index of a repository and loads it from disk if present.
+
+        Args:
+            root_folder (str): The repository folder (e.g. `CONSTANTS.rootParseFolder`).
+            index_file (str, optional): The JSON file of the index, defaults to a file
+                                        per repository in `INDEX_FOLDER`.
+        """
+        self.root_folder = os.path.abspath(root_folder)
+        if index_file is None:
+            digest = hashlib.sha1(self.root_folder.encode("utf-8")).hexdigest()[:12]
+            index_file = os.path.join(INDEX_FOLDER, f"{digest}.json")
+        self.index_file = index_file
+
+        self.data = k_launcher_storage.read_json_file(self.index_file, None)
+        if not self.data or self.data.get("root") != self.root_folder:
+            self.data = {"root": self.root_folder, "root_mtime": None, "packages": {}}
+
+    def refresh(self, save=True, deep=False):
+        """
+        Updates the index from the repository, rescanning only the changed packages.
+
+        Args:
+            save (bool): Writes the index back to disk when it changed.
+            deep (bool): Also stats the package file of every version to detect the
+                         package files edited or removed in place.
+
+        Returns:
+            int: The number of rescanned packages.
+        """
+        start = time.perf_counter()
+        try:
+            root_mtime = os.stat(self.root_folder).st_mtime
+        except FileNotFoundError:
+            logging.error(f"Package repository '{self.root_folder}' not found.")
+            return 0
+
+        packages = self.data["packages"]
+        if root_mtime != self.data["root_mtime"]:
+            names = {
+                entry.name for entry in os.scandir(self.root_folder)
+                if entry.is_dir() and not entry.name.startswith(".")
+            }
+            for name in set(packages) - names:
+                del packages[name]
+        else:
+            names = set(packages)
+
+        rescanned = 0
+        for name in names:
+            package_folder = os.path.join(self.root_folder, name)
+            try:
+                package_mtime = os.stat(package_folder).st_mtime
+            except FileNotFoundError:
+                packages.pop(name, None)
+                rescanned += 1
+                continue
+            if (name in packages and packages[name]["mtime"] == package_mtime
+                    and not self._pending_changed(packages[name])
+                    and not (deep and self._package_files_changed(packages[name]))):
+                continue
+            versions, pending = self._scan_package(package_folder)
+            packages[name] = {"mtime": package_mtime, "versions": versions, "pending": pending}
+            rescanned += 1
+
+        self.data["root_mtime"] = root_mtime
+        if save and rescanned:
+            k_launcher_storage.atomic_write_json(self.index_file, self.data, indent=None)
+        logging.debug(
+            f"Package index of '{self.root_folder}' refreshed in {(time.perf_counter() - start) * 1000:.1f} ms "
+            f"({rescanned} package(s) rescanned)."
+        )
+        return rescanned
+
+    @staticmethod
+    def _pending_changed(package):
+        """
+        Tells whether a package file was written in a version folder indexed without one.
+
+        Args:
+            package (dict): The index entry of the package.
+
+        Returns:
+            bool: True if a pending version folder now has its package.py.
+        """
+        return any(os.path.exists(os.path.join(folder, CONSTANTS.package)) for folder in package.get("pending", []))
+
+    @staticmethod
+    def _package_files_changed(package):
+        """
+        Tells whether the package files of an indexed package changed on disk.
+
+        Args:
+            package (dict): The index entry of the package.
+
+        Returns:
+            bool: True if a package.py was edited or removed.
+        """
+        for entry in package["versions"].values():
+            try:
+                stat = os.stat(os.path.join(entry["path"], CONSTANTS.package))
+            except OSError:
+                return True
+            if stat.st_mtime != entry["mtime"] or stat.st_size != entry.get("size"):
+                return True
+        return False
+
+    @staticmethod
+    def _scan_package(package_folder):
+        """
+        Lists the versions of a package folder.
+
+        Args:
+            package_folder (str): The folder of the package.
+
+        Returns:
+            tuple: `{version: {"path": folder, "mtime": package.py mtime, "size": package.py size}}`,
+                   a versionless package stored under the "" version, and the list of
+                   the version folders without package.py yet.
+        """
+        versions = {}
+        pending = []
+        with os.scandir(package_folder) as entries:
+            for entry in entries:
+                if entry.name == CONSTANTS.package and entry.is_file():
+                    stat = entry.stat()
+                    versions[""] = {"path": package_folder, "mtime": stat.st_mtime, "size": stat.st_size}
+                elif entry.is_dir() and not entry.name.startswith("."):
+                    try:
+                        stat = os.stat(os.path.join(entry.path, CONSTANTS.package))
+                    except FileNotFoundError:
+                        pending.append(entry.path)
+                        continue
+                    versions[entry.name] = {"path": entry.path, "mtime": stat.st_mtime, "size": stat.st_size}
+        return versions, pending
+
+    def find(self, name=None, version=None, version_range=None):
+        """
+        Queries the index.
+
+        Args:
+            name (str, optional): Exact package name, all packages if None.
+            version (str, optional): Exact version.
+            version_range (str, optional): Version range (see `parse_version_range`).
+
+        Returns:
+            list: Dictionaries with `name`, `version`, `path`, `mtime` and `size`, sorted by
+                  name then version.
+        """
+        in_range = parse_version_range(version_range) if version_range else None
+        packages = self.data["packages"]
+        names = [name] if name is not None else sorted(packages)
+
+        results = []
+        for package_name in names:
+            versions = packages.get(package_name, {}).get("versions", {})
+            for package_version in sorted(versions, key=version_key):
+                if version is not None and package_version != version:
+                    continue
+                if in_range is not None and not in_range(package_version):
+                    continue
+                results.append(dict(versions[package_version], name=package_name, version=package_version))
+        return results
+
+    def latest(self, name, version_range=None):
+        """
+        Returns the highest version of a package.
+
+        Args:
+            name (str): The package name.
+            version_range (str, optional): Restricts the versions considered.
+
+        Returns:
+            dict or None: The entry of the highest version (see `find`), if any.
+        """
+        results = self.find(name, version_range=version_range)
+        return results[-1] if results else None
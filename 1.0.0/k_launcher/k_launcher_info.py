@@ -19,6 +19,7 @@ def print_k_launcher_documentation_rez():
     Arguments (args*):
         -c, --config : name of the config you're working on.
         -co, --context : display the current context.
+        -cgc, --context_gc : remove the context of closed or expired sessions.
         -p, --package : package to load with the environment.
         -a, --add : additional packages to be added.
         -l, --launch : launch the DCC software by name.
@@ -26,10 +27,18 @@ def print_k_launcher_documentation_rez():
         -lo, --load : load the saved context/configuration.
         -i, --info : display information about the tool.
         -e, --echo : display the current settings.
-        -g, --grab : grab the package in PROD to LOCAL.
+        -g, --grab : grab the package in PROD to LOCAL (name or name-version), only changed files are copied.
+        -gk, --grab_link : hardlink or reflink the grabbed files instead of copying them.
+        -gx, --grab_keep : keep the LOCAL files missing in PROD (removed by default so LOCAL mirrors PROD).
+        -gw, --grab_workers : number of packages grabbed in parallel.
         -w, --switch : switch the package to the local version.
         -r, --release : chosen LOCAL package to release.
         -pr, --prod_release : chosen version of the package to release on PROD.
+        -rb, --rollback : restore the previous release of a PROD version (name-version).
+        -lm, --launch_mode : output of the launched command: tee (terminal and session log, default), passthrough or capture.
+        -d, --detach : launch in the background, the launcher returns once the command is spawned, its output goes to CONTEXT/processes/logs/<host>.<pid>.log.
+        -ps, --ps : list the processes launched in the background on this machine.
+        -k, --kill : kill processes launched in the background (and their children) by PID.
         -vs, --vs_code : launch vs code with the path and package.
 
     Example Launch Commands:
@@ -41,6 +50,13 @@ def print_k_launcher_documentation_rez():
     Config Structure:
         config : package : context/path/file.rxt
 
+    Session:
+        The context is saved per terminal session. Run `python k_launcher_id.py` once
+        per shell and apply the printed line (K_LAUNCHER_SESSION and
+        K_LAUNCHER_SESSION_PID) to skip the terminal lookup on every call. The
+        processes started from that shell inherit the variables, they only use the
+        session while the shell is one of their ancestors.
+
     Class KLauncher_rez:
         The KLauncher_rez class manages the environment setup and execution of DCC software.
         It handles various tasks such as setting and displaying configuration details,
@@ -79,11 +95,26 @@ def print_k_launcher_documentation_git():
         -i, --info : Display information about the tool.
         -p, --package : Load package.
         -co, --context : Display the current context.
+        -cgc, --context_gc : Remove the context of closed or expired sessions.
         -gc, --git_clone : Clone a Git repository.
             Parameters:
                 - URL of the repository.
                 - Local folder to clone into.
                 - Optional name for the repository folder.
+        -cd, --clone_depth : Shallow clone of the last N commits.
+        -cf, --clone_filter : Partial clone, blob:none (blobless) or tree:0 (treeless).
+        -csb, --clone_single_branch : Clone only the branch given with --branch (or the default branch).
+        -cab, --clone_all_branches : Clone every branch, also for a shallow clone (git clones a single branch when --clone_depth is set).
+            The 'single_branch' repos.json clone option does the same: true, false, or unset for git's default.
+        -cre, --clone_reference : Local repository or mirror to borrow objects from.
+        -mf, --many_files : Many files profile (untracked cache, index v4, split index, builtin fsmonitor on Windows/macOS)
+            for asset-heavy repositories. With --git_clone it configures the clone (also 'many_files' in the
+            repos.json clone options), alone it applies the profile to the existing package.
+        -cst, --clone_stats : Display the median clone time and size per repository and strategy.
+        -ri, --repo_import : Add or update the repositories of a manifest (repos.json format, JSON list or 'name url' lines).
+        -rfd, --repo_find : Find repositories of the registry by name, prefix or similar name.
+        -mu, --mirror_update : Create or update in the background the local mirror of every repository of repos.json.
+        -nm, --no_mirror : Clone and fetch from the remote instead of the local mirror.
         -gf, --git_fetch : Fetch the latest changes from the remote repository.
             Parameters:
                 - Path to the local folder containing the repository.
@@ -92,22 +123,39 @@ def print_k_launcher_documentation_git():
             Parameters:
                 - Path to the local folder containing the repository.
                 - Name of the repository.
+        -gs, --git_status : Display the branch and working tree status of the repository.
+        -sa, --status_all, --status-all : Display branch, changes, ahead/behind and last tag of every repository of the local folder.
+        -rf, --refresh : Query every repository for --status_all instead of using the cached snapshot,
+            and list the remotes for --git_list instead of using the cached remote refs.
+        -all, --all : Run --git_fetch, --git_pull or --git_status on every cloned repository of repos.json in parallel.
+        -rp, --repos : Run --git_fetch, --git_pull or --git_status on the listed repositories in parallel.
+        -gw, --git_workers : Number of repositories processed in parallel by --all/--repos.
+        -gt, --git_timeout : Timeout of each git command in seconds, the command is stopped when it expires.
+            Only network and read-only commands time out, local writes (checkout, add, commit, stash) never do.
         -ch, --git_check : Switch to a specific branch in the repository.
             Parameters:
                 - Path to the local folder containing the repository.
                 - Name of the repository.
                 - Name of the branch to checkout.
+        -wt, --worktree : With --git_check, open the branch in its own worktree
+            (<package>/.worktrees/<branch>/<package>) and point the context path at it.
+            Switching back to a branch reuses its worktree, no stash and no checkout.
+            The least recently used clean worktrees above worktree_limit are removed.
+        -wl, --worktree_list : List the worktrees of the package.
         -c, --git_commit : Commit changes to the repository.
             Parameters:
                 - Path to the local folder containing the repository.
                 - Name of the repository.
                 - Commit message.
+        -fl, --files : With --git_commit, only stage these changed paths instead of scanning the whole working tree.
         -cr, --git_create : Create a new branch in the specified repository.
             Parameters:
                 - Path to the local folder containing the repository.
                 - Name of the repository.
                 - Name of the new branch.
         -gl, --git_list : List remote branches of the repository.
+            The branches come from the remote-ref cache (CONTEXT/remote_refs, one git ls-remote per remote),
+            refreshed in the background when older than remote_refs_ttl.
             Parameters:
                 - Path to the local folder containing the repository.
                 - Name of the repository.
@@ -127,6 +175,7 @@ def print_k_launcher_documentation_git():
         -gu, --git_url : Git URL for cloning.
         -b, --branch : Branch name.
         -m, --msg : Commit message.
+        -js, --json : Print the results of --git_status, --git_list, --git_log, --history and --all/--repos as JSON on stdout.
         -vs, --vs_code : launch vs code with the path and package.
 
     Description:
@@ -0,0 +1,342 @@
+
+# regular import
+import os
+import sys
+import time
+import hashlib
+import logging
+import argparse
+import subprocess
+import concurrent.futures
+
+# custom packages import
+import k_launcher_refs
+import k_launcher_utils
+import k_launcher_storage
+import k_launcher_git_async
+from k_constants import CONSTANTS
+
+
+logging.basicConfig(level=logging.INFO)
+
+
+# One bare mirror per remote URL, shared by every artist using the CONTEXT folder.
+MIRROR_FOLDER = getattr(
+    CONSTANTS, "mirror_folder", os.path.join(CONSTANTS.root_folder, CONSTANTS.context_folder, "mirrors")
+)
+
+# Clones and fetches of registered repositories go through the mirrors.
+MIRROR_ENABLED = getattr(CONSTANTS, "git_mirrors", True)
+
+# A mirror is fetched from its remote at most once per interval (seconds).
+MIRROR_UPDATE_INTERVAL = getattr(CONSTANTS, "mirror_update_interval", 300)
+
+# Number of mirrors updated in parallel by `update_mirrors`.
+MIRROR_WORKERS = getattr(CONSTANTS, "mirror_workers", 4)
+
+# Touched after every successful update of a mirror.
+UPDATED_MARKER = "k_launcher_updated"
+
+
+def get_mirror_path(url):
+    """
+    Returns the folder of the bare mirror of a remote URL.
+
+    Args:
+        url (str): The remote URL.
+
+    Returns:
+        str: The mirror folder, `<MIRROR_FOLDER>/<sha1 of the url without credentials>.git`.
+    """
+    url = k_launcher_refs.strip_credentials(url)
+    return os.path.join(MIRROR_FOLDER, hashlib.sha1(url.encode("utf-8")).hexdigest()[:16] + ".git")
+
+
+def get_credentials_env(url):
+    """
+    Returns the environment giving the credentials of a URL to git at run time.
+
+    The mirrors only store the URL without credentials (see
+    `k_launcher_refs.strip_credentials`), a `url.<url>.insteadOf` entry passed
+    through the `GIT_CONFIG_*` variables rewrites it for a single command.
+
+    Args:
+        url (str): The remote URL, with or without credentials.
+
+    Returns:
+        dict or None: The environment of the git process, None if the URL has no credentials.
+    """
+    public_url = k_launcher_refs.strip_credentials(url)
+    if public_url == url:
+        return None
+    env = dict(os.environ)
+    index = int(env.get("GIT_CONFIG_COUNT") or 0)
+    env["GIT_CONFIG_COUNT"] = str(index + 1)
+    env[f"GIT_CONFIG_KEY_{index}"] = f"url.{url}.insteadOf"
+    env[f"GIT_CONFIG_VALUE_{index}"] = public_url
+    return env
+
+
+def has_mirror(url):
+    """
+    Tells whether the mirror of a URL exists.
+
+    Args:
+        url (str): The remote URL.
+
+    Returns:
+        bool: True if the mirror was created.
+    """
+    return os.path.exists(os.path.join(get_mirror_path(url), UPDATED_MARKER))
+
+
+def get_mirror_age(url):
+    """
+    Returns the time since the last update of a mirror.
+
+    Args:
+        url (str): The remote URL.
+
+    Returns:
+        float or None: The age in seconds, None if the mirror does not exist.
+    """
+    try:
+        return time.time() - os.path.getmtime(os.path.join(get_mirror_path(url), UPDATED_MARKER))
+    except OSError:
+        return None
+
+
+def _touch_marker(mirror_path, updated=None):
+    """
+    Records the update time of a mirror.
+
+    Args:
+        mirror_path (str): The mirror folder.
+        updated (float, optional): The update time, defaults to now.
+    """
+    marker = os.path.join(mirror_path, UPDATED_MARKER)
+    with open(marker, "a"):
+        os.utime(marker, None if updated is None else (updated, updated))
+
+
+def create_mirror(url):
+    """
+    Creates the bare mirror of a URL, waiting for another process creating it.
+
+    Unreachable objects are never pruned from the mirror, so the clones borrowing
+    its objects (alternates) never lose any. For the same reason an existing mirror
+    is never deleted: a mirror missing its marker (interrupted creation) gets the
+    marker back, dated so that the next `update_mirror` fetches it. The mirror is
+    shared, its config never stores the credentials of the URL.
+
+    Args:
+        url (str): The remote URL.
+
+    Returns:
+        str or None: The mirror folder, None if the mirror cannot be cloned.
+    """
+    mirror_path = get_mirror_path(url)
+    public_url = k_launcher_refs.strip_credentials(url)
+    os.makedirs(MIRROR_FOLDER, exist_ok=True)
+    with k_launcher_storage.file_lock(mirror_path, timeout=k_launcher_git_async.GIT_NETWORK_TIMEOUT):
+        if has_mirror(url):
+            return mirror_path
+        if os.path.exists(mirror_path):
+            logging.warning(f"Mirror of {public_url} has no update marker, repairing it.")
+            _touch_marker(mirror_path, updated=0)
+            return mirror_path
+
+        logging.info(f"Creating mirror of {public_url} in {mirror_path}")
+        temp_path = f"{mirror_path}.tmp"
+        if os.path.exists(temp_path):
+            k_launcher_utils.make_writable_and_remove(temp_path)
+        try:
+            k_launcher_git_async.run_git(["clone", "--mirror", "--progress", url, temp_path], stream=True)
+            k_launcher_git_async.run_git(["remote", "set-url", "origin", public_url], cwd=temp_path)
+            k_launcher_git_async.run_git(["config", "gc.pruneExpire", "never"], cwd=temp_path)
+            k_launcher_git_async.run_git(["config", "k-launcher.url", public_url], cwd=temp_path)
+        except k_launcher_git_async.GIT_ERRORS as e:
+            logging.error(f"Failed to create mirror of {public_url}: {e.stderr}")
+            if os.path.exists(temp_path):
+                k_launcher_utils.make_writable_and_remove(temp_path)
+            return None
+
+        os.rename(temp_path, mirror_path)
+        _touch_marker(mirror_path)
+    return mirror_path
+
+
+def update_mirror(url, max_age=None):
+    """
+    Fetches a mirror from its remote unless it was updated recently.
+
+    The update is skipped when another process is already updating the mirror,
+    unless it is forced: it then waits for that update instead.
+
+    Args:
+        url (str): The remote URL.
+        max_age (float, optional): Skips the update if the mirror is younger, in
+                                   seconds, defaults to `MIRROR_UPDATE_INTERVAL`.
+                                   0 forces the update.
+
+    Returns:
+        bool: True if the mirror is usable (updated, fresh or being updated).
+    """
+    max_age = MIRROR_UPDATE_INTERVAL if max_age is None else max_age
+    public_url = k_launcher_refs.strip_credentials(url)
+    requested = time.time()
+    age = get_mirror_age(url)
+    if age is None:
+        if create_mirror(url) is None:
+            return False
+        age = get_mirror_age(url)
+        if age < time.time() - requested:
+            return True
+    if age < max_age:
+        return True
+
+    mirror_path = get_mirror_path(url)
+    try:
+        timeout = k_launcher_git_async.GIT_NETWORK_TIMEOUT if max_age == 0 else 0
+        with k_launcher_storage.file_lock(mirror_path, timeout=timeout):
+            age = get_mirror_age(url)
+            if age is not None and age < time.time() - requested:
+                logging.debug(f"Mirror of {public_url} was updated by another process.")
+                return True
+            start = time.perf_counter()
+            k_launcher_git_async.run_git(
+                ["remote", "update", "--prune"], cwd=mirror_path, env=get_credentials_env(url)
+            )
+            _touch_marker(mirror_path)
+            logging.info(f"Updated mirror of {public_url} in {time.perf_counter() - start:.1f}s")
+    except TimeoutError:
+        if max_age == 0:
+            logging.warning(f"Mirror of {public_url} is still being updated by another process, its data may be stale.")
+        else:
+            logging.debug(f"Mirror of {public_url} is being updated by another process.")
+    except k_launcher_git_async.GIT_ERRORS as e:
+        logging.warning(f"Failed to update mirror of {public_url}, using it as is: {e.stderr}")
+    return True
+
+
+def update_mirrors(urls, max_age=None, workers=None):
+    """
+    Creates or updates the mirrors of several URLs in parallel.
+
+    Args:
+        urls (iterable): The remote URLs.
+        max_age (float, optional): See `update_mirror`.
+        workers (int, optional): Maximum parallel updates, defaults to `MIRROR_WORKERS`.
+
+    Returns:
+        dict: True or False per URL.
+    """
+    urls = sorted(set(urls))
+    if not urls:
+        return {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(workers or MIRROR_WORKERS, len(urls))) as executor:
+        results = dict(zip(urls, executor.map(lambda url: update_mirror(url, max_age), urls)))
+    failures = [k_launcher_refs.strip_credentials(url) for url, ok in results.items() if not ok]
+    logging.info(f"Mirrors: {len(urls) - len(failures)} up to date, {len(failures)} failed {failures or ''}")
+    return results
+
+
+def start_background_update(urls):
+    """
+    Updates mirrors in a detached process so the launcher returns right away.
+
+    Args:
+        urls (iterable): The remote URLs.
+
+    Returns:
+        int or None: The PID of the updater, None if nothing to update.
+    """
+    urls = sorted(set(urls))
+    if not urls:
+        return None
+
+    kwargs = {}
+    if os.name == "nt":
+        kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.DETACHED_PROCESS
+    else:
+        kwargs["start_new_session"] = True
+    # The URLs may hold credentials, they go through stdin rather than the
+    # command line, readable by every user of the machine.
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__)],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        **kwargs
+    )
+    with process.stdin:
+        process.stdin.write("\n".join(urls) + "\n")
+    logging.info(f"Updating {len(urls)} mirror(s) in the background (pid {process.pid}).")
+    return process.pid
+
+
+def get_clone_source(url):
+    """
+    Prepares a clone served by the mirror of a URL.
+
+    Args:
+        url (str): The remote URL.
+
+    Returns:
+        str or None: The mirror folder to clone from, None if mirrors are disabled
+                     or the mirror cannot be created.
+    """
+    if not MIRROR_ENABLED or not update_mirror(url):
+        return None
+    return get_mirror_path(url)
+
+
+def fetch_from_mirror(repo_path, url, remote="origin", max_age=None):
+    """
+    Fetches a repository from the mirror of its remote instead of the remote itself.
+
+    The remote-tracking branches and tags of `remote` are updated from the mirror,
+    after an update of the mirror (see `update_mirror`). Only the remote-tracking
+    branches are pruned, the local tags (even unpushed) are kept.
+
+    Args:
+        repo_path (str): The repository folder.
+        url (str): The URL of `remote`.
+        remote (str): The remote whose tracking branches are updated.
+        max_age (float, optional): See `update_mirror`, 0 for a fetch requested by the user.
+
+    Returns:
+        bool: True if the repository was fetched from the mirror, False if the
+              caller should fetch from the remote.
+    """
+    if not MIRROR_ENABLED or not has_mirror(url) or not update_mirror(url, max_age):
+        return False
+    try:
+        # Tags fetched with --tags, unlike an explicit refs/tags/* refspec, are not pruned.
+        k_launcher_git_async.run_git(
+            ["fetch", "--prune", "--tags", "--force", get_mirror_path(url), f"+refs/heads/*:refs/remotes/{remote}/*"],
+            cwd=repo_path,
+            host="local",
+        )
+    except k_launcher_git_async.GIT_ERRORS as e:
+        logging.warning(f"Failed to fetch from the mirror of {k_launcher_refs.strip_credentials(url)}: {e.stderr}")
+        return False
+    return True
+
+
+def main():
+    """
+    Creates or updates the mirrors given on the command line, or on stdin (one URL
+    per line) as done by `start_background_update`.
+    """
+    parser = argparse.ArgumentParser(description="k_launcher_mirror - Update the git mirrors.")
+    parser.add_argument("urls", nargs="*", help="Remote URLs whose mirror is updated, read from stdin if omitted.")
+    parser.add_argument("-f", "--force", action="store_true", help="Update even the recently updated mirrors.")
+    args = parser.parse_args()
+    urls = args.urls or sys.stdin.read().split()
+    update_mirrors(urls, max_age=0 if args.force else None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+
+# regular import
+import os
+import time
+import socket
+import signal
+import logging
+import subprocess
+
+# custom packages import
+import k_launcher_storage
+from k_constants import CONSTANTS
+
+
+logging.basicConfig(level=logging.INFO)
+
+
+# One registry per machine: the PIDs are only meaningful on the host that started them.
+PROCESS_FOLDER = os.path.join(CONSTANTS.root_folder, CONSTANTS.context_folder, "processes")
+
+# Output of each detached process: <PROCESS_LOG_FOLDER>/<hostname>.<pid>.log
+PROCESS_LOG_FOLDER = os.path.join(PROCESS_FOLDER, "logs")
+
+# Number of logs of finished processes kept per machine, the older ones are removed.
+PROCESS_LOGS_KEPT = getattr(CONSTANTS, "process_logs_kept", 10)
+
+# Seconds given to a process group to exit after SIGTERM before SIGKILL.
+KILL_TIMEOUT = getattr(CONSTANTS, "kill_timeout", 10)
+
+
+def get_registry_file():
+    """
+    Returns the process registry file of this machine.
+
+    Returns:
+        str: `<PROCESS_FOLDER>/<hostname>.json`
+    """
+    return os.path.join(PROCESS_FOLDER, f"{socket.gethostname()}.json")
+
+
+def _is_alive(entry):
+    """
+    Tells whether a registered process is still the one that was launched.
+
+    Args:
+        entry (dict): The registry entry.
+
+    Returns:
+        bool: True if the PID is alive and its create time matches (no PID reuse).
+    """
+    import psutil
+    try:
+        return abs(psutil.Process(entry["pid"]).create_time() - entry["create_time"]) < 1
+    except (psutil.Error, KeyError):
+        return False
+
+
+def get_process_log_file(pid):
+    """
+    Returns the log file of a detached process of this machine.
+
+    Args:
+        pid (int): The PID of the process.
+
+    Returns:
+        str: `<PROCESS_LOG_FOLDER>/<hostname>.<pid>.log`
+    """
+    return os.path.join(PROCESS_LOG_FOLDER, f"{socket.gethostname()}.{pid}.log")
+
+
+def _remove_finished_logs(entries):
+    """
+    Removes the logs of the finished processes of this machine beyond the newest
+    `PROCESS_LOGS_KEPT`.
+
+    Args:
+        entries (list): The registry entries of the running processes, whose log is kept.
+    """
+    running = {os.path.normcase(entry["log"]) for entry in entries if entry.get("log")}
+    prefix = f"{socket.gethostname()}."
+    try:
+        finished = [
+            entry for entry in os.scandir(PROCESS_LOG_FOLDER)
+            if entry.name.startswith(prefix) and os.path.normcase(entry.path) not in running
+        ]
+        finished.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    except OSError:
+        return
+    for entry in finished[PROCESS_LOGS_KEPT:]:
+        try:
+            os.remove(entry.path)
+        except OSError as e:
+            logging.debug(f"Failed to remove the process log {entry.path}: {e}")
+
+
+def launch_detached(command, env=None, log_output=True, session_id=None):
+    """
+    Starts a shell command in its own process group and registers it.
+
+    The command outlives the launcher and is not interrupted by a Ctrl-C in the
+    terminal. Its output goes to its own log file (see `get_process_log_file`),
+    kept until it is among the oldest logs of finished processes (see
+    `PROCESS_LOGS_KEPT`), or is discarded.
+
+    Args:
+        command (str): The shell command.
+        env (dict, optional): The environment of the command.
+        log_output (bool): Writes stdout and stderr to the log file of the process.
+        session_id (str, optional): The session launching the command.
+
+    Returns:
+        int: The PID of the process (the process group leader).
+    """
+    import psutil
+
+    kwargs = {}
+    if os.name == "nt":
+        kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.DETACHED_PROCESS
+    else:
+        kwargs["start_new_session"] = True
+
+    output = subprocess.DEVNULL
+    log_file = None
+    if log_output:
+        # The PID is only known once spawned, the log is renamed after it.
+        os.makedirs(PROCESS_LOG_FOLDER, exist_ok=True)
+        log_file = os.path.join(PROCESS_LOG_FOLDER, f"{socket.gethostname()}.launch-{os.getpid()}-{time.time_ns()}.log")
+        output = open(log_file, "ab")
+    try:
+        process = subprocess.Popen(
+            command, shell=True, env=env, stdin=subprocess.DEVNULL, stdout=output, stderr=subprocess.STDOUT, **kwargs
+        )
+    except BaseException:
+        if log_file:
+            output.close()
+            os.remove(log_file)
+        raise
+    if log_file:
+        output.close()
+        try:
+            os.replace(log_file, get_process_log_file(process.pid))
+            log_file = get_process_log_file(process.pid)
+        except OSError:
+            # Windows cannot rename the file while the process holds it open.
+            pass
+
+    try:
+        create_time = psutil.Process(process.pid).create_time()
+    except psutil.Error:
+        create_time = time.time()
+    entry = {
+        "pid": process.pid,
+        "create_time": create_time,
+        "command": command,
+        "started": time.time(),
+        "session": session_id,
+        "log": log_file,
+    }
+    registry_file = get_registry_file()
+    os.makedirs(PROCESS_FOLDER, exist_ok=True)
+    with k_launcher_storage.file_lock(registry_file):
+        entries = [registered for registered in k_launcher_storage.read_json_file(registry_file, []) if _is_alive(registered)]
+        entries.append(entry)
+        k_launcher_storage.atomic_write_json(registry_file, entries)
+    _remove_finished_logs(entries)
+    logging.info(f"Launched in the background with PID {process.pid}" + (f", output in {log_file}" if log_file else ""))
+    return process.pid
+
+
+def list_processes():
+    """
+    Lists the registered processes still running and drops the finished ones,
+    along with their old logs (see `PROCESS_LOGS_KEPT`).
+
+    Returns:
+        list: The registry entries of the running processes (`pid`, `create_time`,
+              `command`, `started`, `session`, `log`).
+    """
+    registry_file = get_registry_file()
+    if not os.path.exists(registry_file):
+        return []
+    with k_launcher_storage.file_lock(registry_file):
+        entries = k_launcher_storage.read_json_file(registry_file, [])
+        alive = [entry for entry in entries if _is_alive(entry)]
+        if len(alive) != len(entries):
+            k_launcher_storage.atomic_write_json(registry_file, alive)
+    if len(alive) != len(entries):
+        _remove_finished_logs(alive)
+    return alive
+
+
+def show_processes():
+    """
+    Logs the registered processes still running.
+
+    Returns:
+        list: The running entries (see `list_processes`).
+    """
+    entries = list_processes()
+    if not entries:
+        logging.info("No process launched in the background.")
+    for entry in entries:
+        started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry["started"]))
+        uptime = int(time.time() - entry["started"])
+        logging.info(
+            f"PID {entry['pid']} started {started} ({uptime // 3600}h{uptime % 3600 // 60:02d}m): {entry['command']}"
+            + (f", output in {entry['log']}" if entry.get("log") else "")
+        )
+    return entries
+
+
+def kill_process(pid, timeout=None):
+    """
+    Kills a registered process and every process of its group (the DCC and its children).
+
+    Only processes of the registry are killed, so a reused PID is never hit.
+
+    Args:
+        pid (int): The PID of a registered process.
+        timeout (float, optional): Seconds to wait after SIGTERM before SIGKILL,
+                                   defaults to `KILL_TIMEOUT`.
+
+    Returns:
+        bool: True if the process is gone.
+    """
+    import psutil
+
+    timeout = KILL_TIMEOUT if timeout is None else timeout
+    entry = next((entry for entry in list_processes() if entry["pid"] == pid), None)
+    if entry is None:
+        logging.error(f"PID {pid} is not a running process launched in the background.")
+        return False
+
+    try:
+        if os.name == "nt":
+            subprocess.run(["taskkill", "/PID", str(pid), "/T", "/F"], check=True, capture_output=True)
+        else:
+            os.killpg(pid, signal.SIGTERM)
+            try:
+                psutil.Process(pid).wait(timeout)
+            except psutil.TimeoutExpired:
+                logging.warning(f"PID {pid} did not exit after SIGTERM, sending SIGKILL.")
+                os.killpg(pid, signal.SIGKILL)
+            except psutil.NoSuchProcess:
+                pass
+    except (OSError, subprocess.CalledProcessError) as e:
+        if _is_alive(entry):
+            logging.error(f"Failed to kill PID {pid}: {e}")
+            return False
+
+    list_processes()
+    logging.info(f"Killed PID {pid}: {entry['command']}")
+    return True
@@ -0,0 +1,220 @@
+
+# regular import
+import os
+import sys
+import time
+import hashlib
+import logging
+import argparse
+import subprocess
+import urllib.parse
+
+# custom packages import
+import k_launcher_storage
+import k_launcher_git_async
+from k_constants import CONSTANTS
+
+
+logging.basicConfig(level=logging.INFO)
+
+
+# One JSON file per remote URL, shared by the CLI and the UI of every artist.
+REFS_FOLDER = getattr(
+    CONSTANTS, "remote_refs_folder", os.path.join(CONSTANTS.root_folder, CONSTANTS.context_folder, "remote_refs")
+)
+
+# Age (seconds) after which a cached entry is refreshed in the background.
+REFS_TTL = getattr(CONSTANTS, "remote_refs_ttl", 300)
+
+
+def strip_credentials(url):
+    """
+    Removes the user information ("user:token@") of a URL, the cache is shared
+    by every workstation.
+
+    Args:
+        url (str): The remote URL.
+
+    Returns:
+        str: The URL without user information, unchanged for local paths and
+             "user@host:path" remotes.
+    """
+    parts = urllib.parse.urlsplit(url)
+    if not parts.scheme or "@" not in parts.netloc:
+        return url
+    return urllib.parse.urlunsplit(parts._replace(netloc=parts.netloc.rpartition("@")[2]))
+
+
+def get_cache_file(url):
+    """
+    Returns the cache file of the refs of a remote URL.
+
+    Args:
+        url (str): The remote URL.
+
+    Returns:
+        str: `<REFS_FOLDER>/<sha1 of the url without credentials>.json`.
+    """
+    url = strip_credentials(url)
+    return os.path.join(REFS_FOLDER, hashlib.sha1(url.encode("utf-8")).hexdigest()[:16] + ".json")
+
+
+def parse_ls_remote(output):
+    """
+    Parses the output of `git ls-remote --heads --tags`.
+
+    Annotated tags are reported with the commit they point at (the "^{}" lines).
+
+    Args:
+        output (str): The ls-remote output, one "<sha>\\t<ref>" per line.
+
+    Returns:
+        dict: `{"heads": {branch: sha}, "tags": {tag: sha}}`.
+    """
+    refs = {"heads": {}, "tags": {}}
+    for line in output.splitlines():
+        sha, _tab, ref = line.partition("\t")
+        if ref.startswith("refs/heads/"):
+            refs["heads"][ref[len("refs/heads/"):]] = sha
+        elif ref.startswith("refs/tags/"):
+            tag = ref[len("refs/tags/"):]
+            if tag.endswith("^{}"):
+                refs["tags"][tag[:-len("^{}")]] = sha
+            else:
+                refs["tags"].setdefault(tag, sha)
+    return refs
+
+
+def read_cached_refs(url):
+    """
+    Reads the cached refs of a remote URL, whatever their age.
+
+    Args:
+        url (str): The remote URL.
+
+    Returns:
+        dict or None: `{"url", "updated", "heads", "tags"}`, None if never cached.
+    """
+    entry = k_launcher_storage.read_json_file(get_cache_file(url))
+    return entry if isinstance(entry, dict) and entry.get("url") == strip_credentials(url) else None
+
+
+def update_remote_refs(url, wait=False):
+    """
+    Lists the branches and tags of a remote with a single `git ls-remote` and caches them.
+
+    The update is skipped when another process is already updating the same URL,
+    or, with `wait`, replaced by the result of that update.
+
+    Args:
+        url (str): The remote URL, credentials are used for ls-remote but never stored.
+        wait (bool): Waits for the update of another process instead of skipping it.
+
+    Returns:
+        dict or None: The new entry (see `read_cached_refs`), the cached entry when
+                      another process is updating it, None if the remote cannot be listed.
+    """
+    cache_file = get_cache_file(url)
+    public_url = strip_credentials(url)
+    os.makedirs(REFS_FOLDER, exist_ok=True)
+    requested = time.time()
+    try:
+        timeout = k_launcher_git_async.GIT_NETWORK_TIMEOUT if wait else 0
+        with k_launcher_storage.file_lock(cache_file, timeout=timeout):
+            entry = read_cached_refs(url)
+            if entry is not None and entry.get("updated", 0) >= requested:
+                return entry
+            result = k_launcher_git_async.run_git(["ls-remote", "--heads", "--tags", url])
+            entry = dict(parse_ls_remote(result.stdout), url=public_url, updated=time.time())
+            k_launcher_storage.atomic_write_json(cache_file, entry, indent=None)
+            return entry
+    except TimeoutError:
+        if wait:
+            logging.warning(f"Refs of {public_url} are still being updated by another process, showing the cached refs.")
+        else:
+            logging.debug(f"Refs of {public_url} are being updated by another process.")
+        return read_cached_refs(url)
+    except k_launcher_git_async.GIT_ERRORS as e:
+        logging.warning(f"Failed to list the refs of {public_url}: {e.stderr or e}")
+        return None
+
+
+def start_background_update(urls):
+    """
+    Updates the cached refs of several URLs in a detached process.
+
+    Args:
+        urls (iterable): The remote URLs.
+
+    Returns:
+        int or None: The PID of the updater, None if nothing to update.
+    """
+    urls = sorted(set(urls))
+    if not urls:
+        return None
+
+    kwargs = {}
+    if os.name == "nt":
+        kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.DETACHED_PROCESS
+    else:
+        kwargs["start_new_session"] = True
+    # The URLs may hold credentials, they go through stdin rather than the
+    # command line, readable by every user of the machine.
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__)],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        **kwargs
+    )
+    with process.stdin:
+        process.stdin.write("\n".join(urls) + "\n")
+    logging.debug(f"Updating the refs of {len(urls)} remote(s) in the background (pid {process.pid}).")
+    return process.pid
+
+
+def get_remote_refs(url, max_age=None, wait=True):
+    """
+    Returns the branches and tags of a remote, from the cache when possible.
+
+    A cached entry is returned right away. When older than `max_age` it is
+    refreshed in the background for the next call. Without a cached entry, the
+    remote is listed now, or in the background if `wait` is False.
+
+    Args:
+        url (str): The remote URL.
+        max_age (float, optional): Age in seconds after which the entry is refreshed,
+                                   defaults to `REFS_TTL`. 0 refreshes it now, waiting
+                                   for another process refreshing it.
+        wait (bool): Lists the remote now when nothing is cached.
+
+    Returns:
+        dict or None: The entry (see `read_cached_refs`), None if nothing is cached yet.
+    """
+    max_age = REFS_TTL if max_age is None else max_age
+    entry = read_cached_refs(url)
+    if max_age == 0 or (entry is None and wait):
+        return update_remote_refs(url, wait=True) or entry
+    if entry is None:
+        start_background_update([url])
+        return None
+    if time.time() - entry.get("updated", 0) >= max_age:
+        start_background_update([url])
+    return entry
+
+
+def main():
+    """
+    Updates the cached refs of the URLs given on the command line, or on stdin (one
+    URL per line) as done by `start_background_update`.
+    """
+    parser = argparse.ArgumentParser(description="k_launcher_refs - Update the cached remote refs.")
+    parser.add_argument("urls", nargs="*", help="Remote URLs whose refs are listed, read from stdin if omitted.")
+    args = parser.parse_args()
+    for url in args.urls or sys.stdin.read().split():
+        update_remote_refs(url)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,40 +2,317 @@
 
 # regular import
 import logging
-import git
 import json
 import os
+import re
+import copy
+import bisect
+import difflib
 
 # custom packages import
+import k_launcher_storage
 from k_constants import CONSTANTS
 
 
 logging.basicConfig(level=logging.INFO)
 
 
+REPOS_FILE = os.path.join(CONSTANTS.root_folder, CONSTANTS.context_folder, CONSTANTS.package_repos)
+
+# Remote URL forms accepted by `validate_url`, local paths are accepted when they exist.
+URL_PATTERNS = (
+    r"^(https?|git|ssh|file)://\S+$",
+    r"^[\w.\-]+@[\w.\-]+:\S+$",
+)
+
+# Repository names accepted by the registry.
+NAME_PATTERN = r"^[\w.\-]+$"
+
+
+def validate_url(url):
+    """
+    Checks that a repository URL is a supported git remote.
+
+    Args:
+        url (str): The URL ("https://...", "ssh://...", "git@host:path", "file://..." or
+                   an existing local path).
+
+    Raises:
+        ValueError: If the URL is not supported.
+    """
+    if not isinstance(url, str) or not url.strip():
+        raise ValueError(f"Invalid repository URL: {url!r}")
+    if any(re.match(pattern, url) for pattern in URL_PATTERNS) or os.path.isdir(url):
+        return
+    raise ValueError(f"Invalid repository URL: {url!r}")
+
+
+def validate_entry(name, entry):
+    """
+    Checks a registry entry and normalizes it.
+
+    Args:
+        name (str): The repository name.
+        entry (str or dict): The URL, or a dictionary with a "url" and optional "clone" options.
+
+    Returns:
+        str or dict: The validated entry.
+
+    Raises:
+        ValueError: If the name, the URL or the clone options are invalid.
+    """
+    if not isinstance(name, str) or not re.match(NAME_PATTERN, name):
+        raise ValueError(f"Invalid repository name: {name!r}")
+    if isinstance(entry, dict):
+        validate_url(entry.get("url"))
+        if not isinstance(entry.get("clone", {}), dict):
+            raise ValueError(f"Invalid clone options for '{name}': {entry['clone']!r}")
+        return dict(entry)
+    validate_url(entry)
+    return entry
+
+
+def read_manifest(manifest_path):
+    """
+    Reads the repositories of a manifest file.
+
+    Supported formats:
+        - JSON object: {"name": "url" or {"url": ..., "clone": {...}}}, like repos.json;
+        - JSON list: [{"name": ..., "url": ..., "clone": {...}}];
+        - text: one "name url" per line, "#" starts a comment.
+
+    Args:
+        manifest_path (str): The manifest file.
+
+    Returns:
+        dict: The entries by repository name, not validated.
+
+    Raises:
+        OSError: If the file cannot be read.
+        ValueError: If the JSON or a text line cannot be parsed.
+    """
+    with open(manifest_path, "r") as file:
+        content = file.read()
+
+    if content.lstrip().startswith(("{", "[")):
+        data = json.loads(content)
+        if isinstance(data, dict):
+            return data
+        entries = {}
+        for item in data:
+            item = dict(item)
+            entries[item.pop("name")] = item if len(item) > 1 else item.get("url")
+        return entries
+
+    entries = {}
+    for number, line in enumerate(content.splitlines(), 1):
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        parts = line.split()
+        if len(parts) != 2:
+            raise ValueError(f"{manifest_path}:{number}: expected 'name url', got {line!r}")
+        entries[parts[0]] = parts[1]
+    return entries
+
+
+class RepositoryRegistry:
+    """
+    In-memory registry of the repositories of repos.json.
+
+    The file is read lazily on first access, once per process (see `get_registry`).
+    Changes are saved by merging only the modified entries into the current file,
+    under lock and atomically, so concurrent edits of other entries are kept.
+    A sorted index of the names serves prefix and fuzzy lookups.
+
+    Attributes:
+        path (str): The registry file.
+    """
+
+    def __init__(self, path=REPOS_FILE):
+        """
+        Initializes the registry without reading the file.
+
+        Args:
+            path (str): The registry file.
+        """
+        self.path = path
+        self._entries = None
+        self._saved = {}
+        self._names = None
+        self._lower_names = None
+
+    @property
+    def entries(self):
+        """
+        dict: The entries by repository name, read on first access.
+        """
+        if self._entries is None:
+            self.reload()
+        return self._entries
+
+    def reload(self):
+        """
+        Reads the registry file again.
+        """
+        data = k_launcher_storage.read_json_file(self.path, {})
+        self._entries = data if isinstance(data, dict) else {}
+        self._saved = copy.deepcopy(self._entries)
+        self._names = None
+
+    def _index(self):
+        """
+        Returns the sorted names, built once per change of the registry.
+
+        Returns:
+            list: The names, sorted case-insensitively.
+        """
+        if self._names is None:
+            self._names = sorted(self.entries, key=str.lower)
+            self._lower_names = [name.lower() for name in self._names]
+        return self._names
+
+    def get_url(self, name):
+        """
+        Returns the URL of a repository.
+
+        Args:
+            name (str): The repository name.
+
+        Returns:
+            str or None: The URL, None if not registered.
+        """
+        entry = self.entries.get(name)
+        if isinstance(entry, dict):
+            return entry.get("url")
+        return entry
+
+    def find_prefix(self, prefix, limit=None):
+        """
+        Lists the repositories whose name starts with `prefix`, case-insensitively.
+
+        Args:
+            prefix (str): The name prefix.
+            limit (int, optional): Maximum number of names.
+
+        Returns:
+            list: The matching names, sorted.
+        """
+        names = self._index()
+        prefix = prefix.lower()
+        start = bisect.bisect_left(self._lower_names, prefix)
+        matches = []
+        for index in range(start, len(names)):
+            if not self._lower_names[index].startswith(prefix) or (limit and len(matches) >= limit):
+                break
+            matches.append(names[index])
+        return matches
+
+    def find(self, query, limit=10, cutoff=0.6):
+        """
+        Looks up repositories by exact name, prefix, then similar names.
+
+        Args:
+            query (str): The (partial or misspelled) name.
+            limit (int): Maximum number of names.
+            cutoff (float): Minimum similarity of the fuzzy matches, between 0 and 1.
+
+        Returns:
+            list: The matching names, best first.
+        """
+        self._index()
+        matches = [query] if query in self.entries else []
+        for name in self.find_prefix(query, limit):
+            if name not in matches:
+                matches.append(name)
+        if len(matches) < limit:
+            lower_to_name = dict(zip(self._lower_names, self._names))
+            for lower in difflib.get_close_matches(query.lower(), self._lower_names, limit, cutoff):
+                if lower_to_name[lower] not in matches:
+                    matches.append(lower_to_name[lower])
+        return matches[:limit]
+
+    def update(self, changes):
+        """
+        Applies changes to the registry and saves them.
+
+        Args:
+            changes (dict): The new entries by name, None removes the repository.
+                            Entries must be validated (see `validate_entry`).
+        """
+        with k_launcher_storage.file_lock(self.path):
+            data = k_launcher_storage.read_json_file(self.path, {})
+            for name, entry in changes.items():
+                if entry is None:
+                    data.pop(name, None)
+                else:
+                    data[name] = entry
+            k_launcher_storage.atomic_write_json(self.path, data, indent=4)
+        self._entries = data
+        self._saved = copy.deepcopy(data)
+        self._names = None
+
+    def save(self):
+        """
+        Saves the entries changed in memory (`entries` edited in place) since the
+        last read or save, the entries changed by other processes are kept.
+
+        Returns:
+            dict: The saved changes, None for the removed repositories.
+        """
+        changes = {name: entry for name, entry in self.entries.items() if self._saved.get(name) != entry}
+        changes.update({name: None for name in self._saved if name not in self.entries})
+        if changes:
+            self.update(changes)
+        return changes
+
+
+_REGISTRY = None
+
+
+def get_registry():
+    """
+    Returns the registry of the process, created on first use.
+
+    Returns:
+        RepositoryRegistry: The registry of repos.json.
+    """
+    global _REGISTRY
+    if _REGISTRY is None:
+        _REGISTRY = RepositoryRegistry()
+    return _REGISTRY
+
+
 class k_repo:
+    """
+    Repository registry operations shared by the launchers, backed by `get_registry`.
+    """
 
-    def __init__(self):
-        self.repo_dict = {}
+    @property
+    def repo_dict(self):
+        """
+        dict: The repositories by name, read from repos.json on first access.
+        """
+        return get_registry().entries
 
     def load_repo_dict(self):
         """
         Loads the repository dictionary from the specified JSON file.
+
+        The registry is read lazily, this forces a new read of the file.
         """
-        jsonPath = os.path.join(CONSTANTS.root_folder, CONSTANTS.context_folder, CONSTANTS.package_repos)
-        if os.path.exists(jsonPath):
-            with open(jsonPath, 'r') as file:
-                data = json.load(file)
-            self.repo_dict = data
+        get_registry().reload()
 
     def save_repo_dict(self):
         """
         Saves the repository dictionary to the JSON file.
+
+        Only the entries changed in `repo_dict` by this process are written (see
+        `RepositoryRegistry.save`), the repositories added or removed by other
+        processes are kept.
         """
-        jsonPath = os.path.join(CONSTANTS.root_folder, CONSTANTS.context_folder, CONSTANTS.package_repos)
-        with open(jsonPath, 'w') as file:
-            json.dump(self.repo_dict, file, indent=4)
-        logging.info("Repository dictionary saved to repos.json")
+        changes = get_registry().save()
+        logging.info(f"Repository dictionary saved to repos.json ({len(changes)} change(s))")
 
     def add_repository(self, name, url):
         """
@@ -43,11 +320,65 @@ class k_repo:
 
         Args:
             name (str): Alias for the repository.
-            url (str): URL of the repository.
+            url (str or dict): URL of the repository, or an entry with "url" and "clone" options.
+
+        Raises:
+            ValueError: If the name or the URL is invalid.
+        """
+        get_registry().update({name: validate_entry(name, url)})
+        logging.info(f"Repository '{name}' added with URL: {self.get_repository_url(name)}")
+
+    def add_repositories(self, entries, overwrite=True):
         """
-        self.repo_dict[name] = url
-        logging.info(f"Repository '{name}' added with URL: {url}")
-        self.save_repo_dict()
+        Adds or updates several repositories in a single save.
+
+        Invalid entries are skipped and reported.
+
+        Args:
+            entries (dict): The entries by repository name (see `validate_entry`).
+            overwrite (bool): Replaces the repositories already registered.
+
+        Returns:
+            dict: The "added", "updated", "unchanged" and "invalid" names.
+        """
+        report = {"added": [], "updated": [], "unchanged": [], "invalid": []}
+        changes = {}
+        for name, entry in entries.items():
+            try:
+                entry = validate_entry(name, entry)
+            except ValueError as e:
+                logging.warning(str(e))
+                report["invalid"].append(name)
+                continue
+            current = self.repo_dict.get(name)
+            if current == entry or (current is not None and not overwrite):
+                report["unchanged"].append(name)
+                continue
+            report["updated" if current is not None else "added"].append(name)
+            changes[name] = entry
+
+        if changes:
+            get_registry().update(changes)
+        logging.info(", ".join(f"{len(names)} {key}" for key, names in report.items()) + " repositories.")
+        return report
+
+    def import_repositories(self, manifest_path, overwrite=True):
+        """
+        Adds the repositories of a manifest file (see `read_manifest`).
+
+        Args:
+            manifest_path (str): The manifest file.
+            overwrite (bool): Replaces the repositories already registered.
+
+        Returns:
+            dict or None: The report of `add_repositories`, None if the manifest cannot be read.
+        """
+        try:
+            entries = read_manifest(manifest_path)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logging.error(f"Failed to read manifest '{manifest_path}': {e}")
+            return None
+        return self.add_repositories(entries, overwrite=overwrite)
 
     def update_repository(self, name, new_url):
         """
@@ -56,11 +387,15 @@ class k_repo:
         Args:
             name (str): Alias for the repository.
             url (str): URL of the repository.
+
+        Raises:
+            ValueError: If the URL is invalid.
         """
         if name in self.repo_dict:
-            self.repo_dict[name] = new_url
+            entry = self.repo_dict[name]
+            validate_url(new_url)
+            get_registry().update({name: dict(entry, url=new_url) if isinstance(entry, dict) else new_url})
             logging.info(f"Repository '{name}' URL updated to {new_url}")
-            self.save_repo_dict()
         else:
             logging.warning(f"Repository '{name}' not found.")
 
@@ -72,9 +407,8 @@ class k_repo:
             name (str): Alias for the repository to remove.
         """
         if name in self.repo_dict:
-            del self.repo_dict[name]
+            get_registry().update({name: None})
             logging.info(f"Repository '{name}' removed.")
-            self.save_repo_dict()
         else:
             logging.warning(f"Repository '{name}' not found.")
 
@@ -82,20 +416,60 @@ class k_repo:
         """
         Fetches the URL of a repository by its alias.
 
+        An entry of repos.json is either the URL itself or a dictionary with a
+        "url" and optional "clone" options (see `get_clone_options`).
+
         Args:
             name (str): Alias of the repository.
 
         Returns:
             str: URL of the repository, or None if not found.
         """
-        return self.repo_dict.get(name)
+        return get_registry().get_url(name)
+
+    def get_clone_options(self, name):
+        """
+        Fetches the clone options of a repository.
+
+        Example entry of repos.json:
+            "bigRepo": {"url": "git@host:group/bigRepo.git", "clone": {"filter": "blob:none", "single_branch": true}}
+
+        Args:
+            name (str): Alias of the repository.
+
+        Returns:
+            dict: The clone options of the repository, empty if none.
+        """
+        entry = self.repo_dict.get(name)
+        if isinstance(entry, dict):
+            return dict(entry.get("clone") or {})
+        return {}
+
+    def find_repositories(self, query, limit=10):
+        """
+        Looks up repositories by name, prefix or similar name.
+
+        Args:
+            query (str): The (partial or misspelled) name.
+            limit (int): Maximum number of results.
+
+        Returns:
+            list: The matching names, best first.
+        """
+        matches = get_registry().find(query, limit=limit)
+        if matches:
+            for name in matches:
+                logging.info(f"{name}: {self.get_repository_url(name)}")
+        else:
+            logging.info(f"No repository matching '{query}'.")
+        return matches
 
     def list_repositories(self):
         """
         Lists all repositories in the dictionary.
         """
         if self.repo_dict:
-            for name, url in self.repo_dict.items():
-                logging.info(f"{name}: {url}")
+            for name in self.repo_dict:
+                logging.info(f"{name}: {self.get_repository_url(name)}")
         else:
             logging.info("No repositories found.")
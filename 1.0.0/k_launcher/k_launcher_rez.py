@@ -2,17 +2,19 @@
 # regular import
 import argparse
 import logging
+import logging.handlers
 import subprocess
+import threading
+import collections
 import os
 import sys
-import shutil
 
 # custom packages import
-import k_config.main
 import k_launcher_info
 import k_launcher_rez_cmds
 import k_launcher_utils
 import k_launcher_context
+import k_launcher_process
 import k_launcher_id
 from k_constants import CONSTANTS
 
@@ -20,6 +22,92 @@ from k_constants import CONSTANTS
 logging.basicConfig(level=logging.INFO)
 
 
+# Arguments that only display information, on their own they never launch rez.
+QUERY_ARGUMENTS = ("info", "context", "context_gc", "ps", "kill")
+
+# How the output of the launched command is handled:
+#   - capture: kept in memory (last CAPTURE_MAX_LINES lines) and logged at exit;
+#   - passthrough: written straight to the terminal;
+#   - tee: streamed line by line to the terminal and to the session log file.
+LAUNCH_MODES = ("capture", "passthrough", "tee")
+LAUNCH_MODE = getattr(CONSTANTS, "launch_mode", "tee")
+CAPTURE_MAX_LINES = getattr(CONSTANTS, "capture_max_lines", 2000)
+
+# Rotating log file of each session: CONTEXT/logs/<session id>.log, removed with the session
+# by the garbage collection of the context.
+LOG_FOLDER = k_launcher_context.SESSION_LOG_FOLDER
+LOG_MAX_BYTES = getattr(CONSTANTS, "launch_log_max_bytes", 10 * 1024 * 1024)
+LOG_BACKUPS = getattr(CONSTANTS, "launch_log_backups", 3)
+
+
+def get_session_log_file(session_id):
+    """
+    Returns the log file receiving the output launched from a session in tee mode.
+
+    Args:
+        session_id (str): The session ID.
+
+    Returns:
+        str: The log file path.
+    """
+    return os.path.join(LOG_FOLDER, f"{session_id}.log")
+
+
+def _open_session_log(session_id):
+    """
+    Creates a logger writing to the rotating log file of a session.
+
+    Args:
+        session_id (str): The session ID.
+
+    Returns:
+        logging.Logger: The logger, its handler must be closed after use.
+    """
+    os.makedirs(LOG_FOLDER, exist_ok=True)
+    logger = logging.getLogger(f"k_launcher.launch.{session_id}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    handler = logging.handlers.RotatingFileHandler(
+        get_session_log_file(session_id), maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding="utf-8"
+    )
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    logger.addHandler(handler)
+    return logger
+
+
+def _pump_lines(stream, console, logger, level, buffer):
+    """
+    Forwards the lines of a child process stream as they arrive.
+
+    The pipe is always drained to the end, whatever the console does: characters
+    the console cannot encode are replaced, and a console that fails is dropped.
+
+    Args:
+        stream (io.TextIOBase): The stdout or stderr pipe of the child.
+        console (io.TextIOBase or None): Receives each line right away (tee mode).
+        logger (logging.Logger or None): Logs each line to the session file (tee mode).
+        level (int): The logging level of the lines.
+        buffer (collections.deque or None): Keeps the last lines (capture mode).
+    """
+    for line in stream:
+        if console is not None:
+            try:
+                try:
+                    console.write(line)
+                except UnicodeEncodeError:
+                    encoding = getattr(console, "encoding", None) or "ascii"
+                    console.write(line.encode(encoding, errors="replace").decode(encoding))
+                console.flush()
+            except (OSError, ValueError, UnicodeError) as e:
+                logging.debug(f"Console output stopped, the lines are still logged: {e}")
+                console = None
+        if logger is not None:
+            logger.log(level, line.rstrip("\r\n"))
+        if buffer is not None:
+            buffer.append(line)
+    stream.close()
+
+
 class KLauncher_rez(k_launcher_rez_cmds.k_cmds,
                     k_launcher_context.PackageContextManager,
                     ):
@@ -34,16 +122,15 @@ class KLauncher_rez(k_launcher_rez_cmds.k_cmds,
     def __init__(self):
         super().__init__()
         """
-        Initializes the KLauncher_rez object, setting up the session ID, repository dictionary,
-        and loading the context from a saved file.
+        Initializes the KLauncher_rez object, setting up the session ID and loading
+        the context from a saved file. The repository registry is read on first use.
         """
         self.add_package = None
         self.switch = None
         self.package = None
         self.grab = None
         self.path = None
-        self.session_id = str(k_launcher_id.get_terminal_pid())
-        self.load_repo_dict()
+        self.session_id = k_launcher_id.get_session_id()
         self.load_data_context()
 
     def set_arguments(self, args):
@@ -53,17 +140,19 @@ class KLauncher_rez(k_launcher_rez_cmds.k_cmds,
         Args:
             args (argparse.Namespace): Parsed command-line arguments.
         """
+        context = self.load_data_context()
+
         if args.package:
             self.package = args.package
             self.save_data_context("package", self.package)
-        elif "package" in self.load_data_context():
-            self.package = self.load_data_context()["package"]
+        elif "package" in context:
+            self.package = context["package"]
 
         if args.path:
             self.path = args.path
             self.save_data_context("path", args.path)    
-        elif "path" in self.load_data_context():
-            self.path = self.load_data_context()["path"]
+        elif "path" in context:
+            self.path = context["path"]
         else:
             self.path = args.path or CONSTANTS.rootLocalFolder
             self.save_data_context("path", self.path)
@@ -71,8 +160,8 @@ class KLauncher_rez(k_launcher_rez_cmds.k_cmds,
         if args.add:
             self.add_package = args.add
             self.save_data_context("add", self.add_package)
-        elif "add" in self.load_data_context():
-            self.add_package = self.load_data_context()["add"]
+        elif "add" in context:
+            self.add_package = context["add"]
 
     def echo_settings(self):
         """
@@ -101,7 +190,7 @@ class KLauncher_rez(k_launcher_rez_cmds.k_cmds,
         logging.info(f"Grab packages: {self.grab_commande}")
         logging.info(f"Switch packages: {self.switch_commande}")
 
-    def eval_rez_command(self):
+    def eval_rez_command(self, mode=None, detach=False):
         """
         Executes the generated `rez` command to set up the environment.
 
@@ -112,31 +201,118 @@ class KLauncher_rez(k_launcher_rez_cmds.k_cmds,
         It handles the environment setup and manages launching the required 
         DCC software with the specified configuration.
 
-        Raises:
-            subprocess.CalledProcessError: If the `rez` command fails to execute.
+        The output of the command is handled according to `mode` (see `LAUNCH_MODES`).
+        In tee mode every line is shown as soon as it is printed and appended to the
+        rotating log file of the session; no mode keeps more than `CAPTURE_MAX_LINES`
+        lines in memory.
+
+        With `detach`, the command is started in its own process group and registered
+        (see `k_launcher_process`), the launcher returns as soon as it is spawned and
+        the output goes to the log file of the process.
+
+        Args:
+            mode (str, optional): "capture", "passthrough" or "tee", defaults to `LAUNCH_MODE`.
+            detach (bool): Starts the command in the background.
+
+        Returns:
+            int: The exit code of the command, 0 once a detached command is spawned.
         """
         logging.info(f"Attributes: grab_commande={getattr(self, 'grab_commande', None)}")
-        try:
-            env = os.environ.copy()
-            command = f"{self.generate_rez_command()}"
-            logging.info(f"Executing command: {command}")
+        mode = mode or LAUNCH_MODE
+        env = os.environ.copy()
+        command = f"{self.generate_rez_command()}"
+        logging.info(f"Executing command: {command}")
+
+        if detach:
+            env.setdefault("PYTHONUNBUFFERED", "1")
+            k_launcher_process.launch_detached(command, env=env, session_id=self.session_id)
+            return 0
+
+        if mode == "passthrough":
+            returncode = subprocess.run(command, shell=True, env=env).returncode
+        else:
+            returncode = self._run_streaming(command, env, mode)
+
+        if returncode:
+            logging.warning(f"Command exited with code {returncode}")
+        return returncode
 
-            result = subprocess.run(command, shell=True, check=True, capture_output=True, text=True, env=env)
+    def _run_streaming(self, command, env, mode):
+        """
+        Runs a command with its output piped line by line (tee or capture mode).
 
+        Args:
+            command (str): The shell command.
+            env (dict): The environment of the command.
+            mode (str): "tee" or "capture".
+
+        Returns:
+            int: The exit code of the command.
+        """
+        tee = mode == "tee"
+        logger = _open_session_log(self.session_id) if tee else None
+        buffers = [collections.deque(maxlen=CAPTURE_MAX_LINES), collections.deque(maxlen=CAPTURE_MAX_LINES)] if not tee else [None, None]
+        if tee:
+            # Python based DCCs block-buffer a piped stdout, ask for line buffering.
+            env.setdefault("PYTHONUNBUFFERED", "1")
+            logger.info(f"Executing command: {command}")
+            logging.info(f"Output logged to {get_session_log_file(self.session_id)}")
+
+        process = subprocess.Popen(
+            command, shell=True, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            text=True, encoding="utf-8", errors="replace", bufsize=1,
+        )
+        threads = [
+            threading.Thread(
+                target=_pump_lines,
+                args=(stream, console if tee else None, logger, level, buffer),
+                daemon=True,
+            )
+            for stream, console, level, buffer in (
+                (process.stdout, sys.stdout, logging.INFO, buffers[0]),
+                (process.stderr, sys.stderr, logging.WARNING, buffers[1]),
+            )
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            returncode = process.wait()
+        finally:
+            for thread in threads:
+                thread.join(timeout=5)
+            if logger is not None:
+                logger.info(f"Command exited with code {process.returncode}")
+                for handler in list(logger.handlers):
+                    handler.close()
+                    logger.removeHandler(handler)
+
+        if not tee:
             logging.info("Command Output:")
-            if result.stdout:
-                logging.info(result.stdout)
+            if buffers[0]:
+                logging.info("".join(buffers[0]))
+            if buffers[1]:
+                logging.warning("".join(buffers[1]))
+        return returncode
+
 
-            if result.stderr:
-                logging.warning(result.stderr)
+def execute_process_commands(args):
+    """
+    Runs the `--ps` and `--kill` commands.
+
+    Args:
+        args (argparse.Namespace): Parsed command-line arguments.
 
-        except subprocess.CalledProcessError as e:
-            logging.warning(f"Executing command: {e}")
-            logging.warning("Command Output:")
-            if e.stdout:
-                logging.error(e.stdout)
-            if e.stderr:
-                logging.error(e.stderr)
+    Returns:
+        int: 0 on success, 1 if a process could not be killed.
+    """
+    returncode = 0
+    if args.kill:
+        for pid in args.kill:
+            if not k_launcher_process.kill_process(pid):
+                returncode = 1
+    if args.ps:
+        k_launcher_process.show_processes()
+    return returncode
 
 
 def main():
@@ -151,6 +327,7 @@ def main():
     parser.add_argument("-i", "--info", action="store_true", help="Display information")
     parser.add_argument("-e", "--echo", action="store_true", help="Display current settings")
     parser.add_argument("-co", "--context", action="store_true", help="Display the current context")
+    parser.add_argument("-cgc", "--context_gc", action="store_true", help="Remove the context of closed sessions")
     parser.add_argument("-c", "--config", type=str, help="Set config")
     parser.add_argument("-p", "--package", type=str, help="Load package")
     parser.add_argument("-a", "--add", type=str, nargs="+", help="Add package")
@@ -158,15 +335,36 @@ def main():
     parser.add_argument("-lo", "--load", type=str, help="Load config")
     parser.add_argument("-s", "--save", type=str, help="Save config")
     parser.add_argument("-g", "--grab", type=str, nargs="+", help="Grab the package in LOCAL")
+    parser.add_argument("-gk", "--grab_link", type=str, choices=["hardlink", "reflink"], help="Link the grabbed files instead of copying them")
+    parser.add_argument("-gx", "--grab_keep", action="store_true", help="Keep the LOCAL files missing in PROD when grabbing")
+    parser.add_argument("-gw", "--grab_workers", type=int, help="Number of packages grabbed in parallel")
     parser.add_argument("-w", "--switch", type=str, nargs="+", help="Switch the packages to local version")
     parser.add_argument("-l", "--launch", type=str, help="Launch the DCC software")
     parser.add_argument("-r", "--release", type=str, help="Chosen LOCAL package to release")
     parser.add_argument("-pr", "--prod_release", type=str, help="Chosen version of the package to release on PROD")
+    parser.add_argument("-rb", "--rollback", type=str, help="Restore the previous release of a PROD version")
     parser.add_argument("-vs", "--vs_code", action="store_true", help="launch vs code with the path and package")
+    parser.add_argument("-lm", "--launch_mode", choices=LAUNCH_MODES, help="Output handling of the launched command")
+    parser.add_argument("-d", "--detach", action="store_true", help="Launch in the background and return right away")
+    parser.add_argument("-ps", "--ps", action="store_true", help="List the processes launched in the background")
+    parser.add_argument("-k", "--kill", type=int, nargs="+", help="Kill processes launched in the background by PID")
     
     args = parser.parse_args()
+    query_only = (
+        any(getattr(args, key) for key in QUERY_ARGUMENTS)
+        and not any(value for key, value in vars(args).items() if key not in QUERY_ARGUMENTS)
+    )
+
+    # Lightweight path: the documentation and the process registry need neither the session nor the context.
+    if query_only and not args.context and not args.context_gc:
+        if args.info:
+            k_launcher_info.print_k_launcher_documentation_rez()
+        sys.exit(execute_process_commands(args))
+
     wrapper = KLauncher_rez()
     wrapper.set_arguments(args)
+    wrapper.flush_data_context()
+    returncode = 0
 
     try:
         if args.info:
@@ -175,6 +373,14 @@ def main():
         if args.context:
             wrapper.get_data_context()
 
+        if args.context_gc:
+            k_launcher_context.collect_stale_sessions()
+
+        returncode = execute_process_commands(args)
+
+        if query_only:
+            sys.exit(returncode)
+
         if args.vs_code:
             k_launcher_utils.launch_vs_with_package(os.path.join(wrapper.path, wrapper.package))
 
@@ -182,16 +388,15 @@ def main():
             src_path = os.path.join(CONSTANTS.rootLocalFolder, args.release.split("-")[0], args.release.split("-")[-1])
             dest_path = os.path.join(CONSTANTS.rootParseFolder, args.prod_release.split("-")[0], args.prod_release.split("-")[-1])
 
-            if os.path.exists(src_path) and not os.path.exists(dest_path):
-                k_launcher_utils.release_package(src_path, dest_path)
+            k_launcher_utils.release_package(src_path, dest_path)
 
-            elif os.path.exists(dest_path):
-                shutil.rmtree(dest_path)
-                os.rmdir(dest_path)
-                k_launcher_utils.release_package(src_path, dest_path)
+        elif args.rollback:
+            dest_path = os.path.join(CONSTANTS.rootParseFolder, args.rollback.split("-")[0], args.rollback.split("-")[-1])
+            k_launcher_utils.rollback_release(dest_path)
 
         else:
             if args.echo:
+                import k_config.main
                 wrapper.echo_settings()
                 k_config.main.print_rez_env_variables()
 
@@ -209,6 +414,10 @@ def main():
 
             if args.grab:
                 wrapper.grab_commande = args.grab
+                wrapper.grab_link = args.grab_link
+                wrapper.grab_keep = args.grab_keep
+                if args.grab_workers:
+                    wrapper.grab_workers = args.grab_workers
 
             if args.switch:
                 wrapper.switch_commande = args.switch
@@ -216,13 +425,16 @@ def main():
             if args.launch:
                 wrapper.dcc_launch = args.launch
 
-            wrapper.eval_rez_command()
+            returncode = wrapper.eval_rez_command(args.launch_mode, detach=args.detach)
 
 
     except Exception as e:
         logging.error(f"An error occurred: {e}", exc_info=True)
         sys.exit(1)
 
+    if returncode:
+        sys.exit(returncode)
+
 
 if __name__ == "__main__":
     main()
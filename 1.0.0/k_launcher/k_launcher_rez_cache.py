@@ -0,0 +1,295 @@
+
+# regular import
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+
+# custom packages import
+import k_launcher_storage
+from k_constants import CONSTANTS
+
+
+logging.basicConfig(level=logging.INFO)
+
+
+CACHE_FOLDER = os.path.join(CONSTANTS.root_folder, CONSTANTS.context_folder, CONSTANTS.environments, "_cache")
+CACHE_INDEX_FILE = os.path.join(CACHE_FOLDER, "index.json")
+
+# Maximum number of resolved contexts kept, the least recently used are evicted.
+CACHE_MAX_ENTRIES = getattr(CONSTANTS, "rez_cache_max_entries", 64)
+
+
+def get_request_names(requests):
+    """
+    Extracts the package names of rez requests.
+
+    Args:
+        requests (list): The rez requests (e.g. ["maya-2024", "~weak", "tools>=1.2"]).
+
+    Returns:
+        list: The package names (e.g. ["maya", "weak", "tools"]).
+    """
+    names = []
+    for request in requests:
+        match = re.match(r"[~!]?([A-Za-z0-9_]+)", request)
+        if match:
+            names.append(match.group(1))
+    return names
+
+
+def get_package_roots(names, packages_path):
+    """
+    Lists the package root folders of the given packages in every repository.
+
+    Args:
+        names (iterable): The package names.
+        packages_path (str): The package repositories, separated by `os.pathsep` or ";".
+
+    Returns:
+        list: The existing package root folders.
+    """
+    roots = []
+    for folder in re.split(r"[;%s]" % re.escape(os.pathsep), packages_path or ""):
+        if not folder:
+            continue
+        for name in names:
+            root = os.path.join(folder, name)
+            if os.path.isdir(root):
+                roots.append(root)
+    return roots
+
+
+def get_root_signature(root):
+    """
+    Returns the state of a package root that a resolve depends on.
+
+    A root folder changes its mtime whenever a version folder is added, removed
+    or renamed in it, which is what a release does. The package files are stat-ed
+    too: a package.py edited in place, or written after its version folder was
+    created, does not change the root mtime.
+
+    Args:
+        root (str): The package root folder.
+
+    Returns:
+        list or None: `[root mtime, {version: [package file mtime, size]}]`, the
+                      versionless package under "", None for a missing root.
+    """
+    try:
+        root_mtime = os.stat(root).st_mtime
+        entries = list(os.scandir(root))
+    except OSError:
+        return None
+
+    files = {}
+    for entry in entries:
+        if entry.name == CONSTANTS.package:
+            version, package_file = "", entry.path
+        elif entry.is_dir() and not entry.name.startswith("."):
+            version, package_file = entry.name, os.path.join(entry.path, CONSTANTS.package)
+        else:
+            continue
+        try:
+            stat = os.stat(package_file)
+        except OSError:
+            continue
+        files[version] = [stat.st_mtime, stat.st_size]
+    return [root_mtime, files]
+
+
+def get_roots_signatures(roots):
+    """
+    Returns the signature of each package root (see `get_root_signature`).
+
+    Args:
+        roots (iterable): The package root folders.
+
+    Returns:
+        dict: The signature of each root, None for a missing root.
+    """
+    return {root: get_root_signature(root) for root in roots}
+
+
+def compute_request_hash(requests, packages_path):
+    """
+    Computes the cache key of a rez request.
+
+    The key covers the requested packages, the package search path and the
+    signatures of the roots of the requested packages (folder mtime and the
+    mtime and size of every package file).
+
+    Args:
+        requests (list): The rez requests.
+        packages_path (str): The package repositories used to resolve them.
+
+    Returns:
+        str: The hexadecimal key.
+    """
+    roots = get_package_roots(get_request_names(requests), packages_path)
+    payload = {
+        "requests": list(requests),
+        "packages_path": packages_path or "",
+        "roots": get_roots_signatures(roots),
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def get_context_path(key):
+    """
+    Returns the `.rxt` path of a cache key.
+
+    Args:
+        key (str): The cache key.
+
+    Returns:
+        str: The path of the resolved context file.
+    """
+    return os.path.join(CACHE_FOLDER, f"{key}.rxt")
+
+
+def _read_resolved_roots(rxt_path):
+    """
+    Reads the root folders of every package resolved in a context file.
+
+    Args:
+        rxt_path (str): The `.rxt` file written by `rez env --output`.
+
+    Returns:
+        list: The package root folders, empty if the file cannot be parsed.
+    """
+    data = k_launcher_storage.read_json_file(rxt_path, {})
+    roots = []
+    for handle in data.get("resolved_packages", []) if isinstance(data, dict) else []:
+        variables = handle.get("variables") or handle.get("handle", {}).get("variables", {})
+        location, name = variables.get("location"), variables.get("name")
+        if location and name:
+            roots.append(os.path.join(location, name))
+    return roots
+
+
+def lookup(key):
+    """
+    Returns the cached context of a key if it is still valid.
+
+    An entry is valid when its `.rxt` file exists and none of the package roots
+    resolved in it changed since it was stored. A hit refreshes the entry in the
+    LRU order.
+
+    Args:
+        key (str): The cache key (see `compute_request_hash`).
+
+    Returns:
+        str or None: The `.rxt` path on a hit, None on a miss.
+    """
+    rxt_path = get_context_path(key)
+    if not os.path.exists(rxt_path):
+        return None
+
+    index = k_launcher_storage.read_json_file(CACHE_INDEX_FILE, {})
+    entry = index.get(key)
+    if entry is None or get_roots_signatures(entry.get("roots", {})) != entry.get("roots", {}):
+        logging.info(f"Cached rez context {key} is outdated.")
+        _remove_entries([key])
+        return None
+
+    with k_launcher_storage.file_lock(CACHE_INDEX_FILE):
+        index = k_launcher_storage.read_json_file(CACHE_INDEX_FILE, {})
+        if key in index:
+            index[key]["used"] = time.time()
+            k_launcher_storage.atomic_write_json(CACHE_INDEX_FILE, index, indent=None)
+    return rxt_path
+
+
+def store(key, requests, packages_path):
+    """
+    Records a context freshly resolved into `get_context_path(key)` and evicts
+    the least recently used entries above `CACHE_MAX_ENTRIES`.
+
+    Args:
+        key (str): The cache key.
+        requests (list): The rez requests resolved in the context.
+        packages_path (str): The package repositories used to resolve them.
+    """
+    rxt_path = get_context_path(key)
+    roots = _read_resolved_roots(rxt_path) or get_package_roots(get_request_names(requests), packages_path)
+    now = time.time()
+
+    evicted = []
+    with k_launcher_storage.file_lock(CACHE_INDEX_FILE):
+        index = k_launcher_storage.read_json_file(CACHE_INDEX_FILE, {})
+        index[key] = {
+            "requests": list(requests),
+            "packages_path": packages_path or "",
+            "roots": get_roots_signatures(roots),
+            "created": now,
+            "used": now,
+        }
+        by_age = sorted(index, key=lambda entry_key: index[entry_key].get("used", 0))
+        while len(by_age) > CACHE_MAX_ENTRIES:
+            evicted.append(by_age.pop(0))
+            del index[evicted[-1]]
+        k_launcher_storage.atomic_write_json(CACHE_INDEX_FILE, index, indent=None)
+
+    for evicted_key in evicted:
+        _remove_context_file(evicted_key)
+    if evicted:
+        logging.info(f"Evicted {len(evicted)} cached rez context(s).")
+
+
+def invalidate_package(package_name):
+    """
+    Drops every cached context that resolved or requested `package_name`.
+
+    Called when a package is released so the next launch resolves it again.
+
+    Args:
+        package_name (str): The name of the package.
+
+    Returns:
+        int: The number of dropped contexts.
+    """
+    index = k_launcher_storage.read_json_file(CACHE_INDEX_FILE, {})
+    keys = [
+        key for key, entry in index.items()
+        if package_name in get_request_names(entry.get("requests", []))
+        or any(os.path.basename(root) == package_name for root in entry.get("roots", {}))
+    ]
+    if keys:
+        _remove_entries(keys)
+        logging.info(f"Invalidated {len(keys)} cached rez context(s) using '{package_name}'.")
+    return len(keys)
+
+
+def _remove_entries(keys):
+    """
+    Removes cache entries from the index and deletes their context files.
+
+    Args:
+        keys (list): The cache keys to remove.
+    """
+    if os.path.exists(CACHE_INDEX_FILE):
+        with k_launcher_storage.file_lock(CACHE_INDEX_FILE):
+            index = k_launcher_storage.read_json_file(CACHE_INDEX_FILE, {})
+            for key in keys:
+                index.pop(key, None)
+            k_launcher_storage.atomic_write_json(CACHE_INDEX_FILE, index, indent=None)
+    for key in keys:
+        _remove_context_file(key)
+
+
+def _remove_context_file(key):
+    """
+    Deletes the `.rxt` file of a cache key, if any.
+
+    Args:
+        key (str): The cache key.
+    """
+    try:
+        os.remove(get_context_path(key))
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logging.warning(f"Failed to remove cached rez context {key}: {e}")
@@ -2,8 +2,10 @@
 # regular import
 import logging
 import subprocess
+import concurrent.futures
 import k_launcher_utils
 import k_launcher_repo
+import k_launcher_rez_cache
 import os
 
 # custom packages import
@@ -13,6 +15,10 @@ from k_constants import CONSTANTS
 logging.basicConfig(level=logging.INFO)
 
 
+# Maximum number of packages grabbed at the same time.
+GRAB_WORKERS = getattr(CONSTANTS, "grab_workers", 4)
+
+
 class k_cmds(k_launcher_repo.k_repo):
     """
     A class that encapsulates commands for generating and managing `rez` environment setup commands.
@@ -34,9 +40,13 @@ class k_cmds(k_launcher_repo.k_repo):
         self.save_config = None
         self.load_config = None
         self.grab_commande = None
+        self.grab_link = None
+        self.grab_keep = False
+        self.grab_workers = GRAB_WORKERS
         self.switch_commande = None
         self.dcc_launch = None
         self.add_package = None
+        self.use_rez_cache = True
 
 
     def generate_rez_command(self):
@@ -82,8 +92,19 @@ class k_cmds(k_launcher_repo.k_repo):
                 )
             )
 
+        cached_context = None
+        if not self.load_config and not self.save_config and self.use_rez_cache:
+            cached_context = self.get_cached_rez_context(command_parts, package_list, switch_prod_local)
+
         if self.load_config:
             rez_cmd = f"rez-env --input {' '.join(launch_config)} {''.join(launch_cmd)}"
+        elif cached_context and not switch_prod_local:
+            rez_cmd = f"rez-env --input {cached_context} {''.join(launch_cmd)}"
+        elif cached_context:
+            rez_cmd = (
+                f"set REZ_PACKAGES_PATH={switch_prod_local[0]} rez-env --input "
+                f"{cached_context} {''.join(launch_cmd)}"
+            )
         elif not switch_prod_local:
             rez_cmd = f"rez env{' '.join(command_parts)} {''.join(launch_cmd)}"
         else:
@@ -96,6 +117,54 @@ class k_cmds(k_launcher_repo.k_repo):
         return rez_cmd
 
 
+    def get_cached_rez_context(self, command_parts, package_list, switch_prod_local):
+        """
+        Returns a resolved context for the current request, from the cache if possible.
+
+        The request is hashed with the package search path and the mtimes of the
+        requested package roots (see `k_launcher_rez_cache`). On a miss the request
+        is resolved once with `rez env --output` into the cache so this launch and
+        the next identical ones start with `rez-env --input`. The context is written
+        to a temporary file first, a concurrent launch never reads a partial one.
+
+        Args:
+            command_parts (list): The package parts of the regular `rez env` command.
+            package_list (list): The packages of the grab/switch command.
+            switch_prod_local (list): The LOCAL/PROD search path prefix, if switching.
+
+        Returns:
+            str or None: The path of the `.rxt` context, or None if it could not be resolved.
+        """
+        if switch_prod_local:
+            requests = ''.join(package_list).split()
+            packages_path = f"{CONSTANTS.rootLocalFolder};{CONSTANTS.rootParseFolder}"
+        else:
+            requests = ' '.join(command_parts).split()
+            packages_path = os.environ.get("REZ_PACKAGES_PATH", "")
+
+        if not requests:
+            return None
+
+        key = k_launcher_rez_cache.compute_request_hash(requests, packages_path)
+        cached_context = k_launcher_rez_cache.lookup(key)
+        if cached_context:
+            logging.info(f"Using cached rez context: {cached_context}")
+            return cached_context
+
+        cached_context = k_launcher_rez_cache.get_context_path(key)
+        temp_context = f"{cached_context}.{os.getpid()}.tmp"
+        os.makedirs(os.path.dirname(cached_context), exist_ok=True)
+        prefix = f"set REZ_PACKAGES_PATH={switch_prod_local[0]} " if switch_prod_local else ""
+        if not self.save_rez_environment(temp_context, f"{prefix}rez env {' '.join(requests)}"):
+            if os.path.exists(temp_context):
+                os.remove(temp_context)
+            return None
+
+        os.replace(temp_context, cached_context)
+        k_launcher_rez_cache.store(key, requests, packages_path)
+        return cached_context
+
+
     def set_package_to_command(self, command_parts):
         if self.set_package:
             command_parts.append(f" {self.set_package}")
@@ -115,6 +184,11 @@ class k_cmds(k_launcher_repo.k_repo):
     def handle_grab_command(self, package_list, switch_prod_local):
         """
         Handles the grab command by ensuring packages are grabbed locally.
+
+        Packages are grabbed in parallel on at most `grab_workers` threads, requests
+        of the same package (e.g. "iter" and "iter-1.1.0") run one after the other.
+        A failing package does not stop the others, only the grabbed packages are
+        added to the command, in the requested order.
         
         Args:
             package_list (list): The list to which the grabbed packages will be added in the command.
@@ -122,12 +196,55 @@ class k_cmds(k_launcher_repo.k_repo):
         """
         if self.grab_commande:
             self.ensure_switch_prod_local(switch_prod_local)
+            progress = k_launcher_utils.TransferProgress()
+
+            requests_by_name = {}
             for package in self.grab_commande:
-                try:
-                    k_launcher_utils.grab_package_to_local(package)
+                name = k_launcher_utils.split_package_request(package)[0]
+                requests_by_name.setdefault(name, []).append(package)
+
+            grabbed = set()
+            workers = max(1, min(self.grab_workers or 1, len(requests_by_name)))
+            with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(self.grab_packages, requests, progress)
+                    for requests in requests_by_name.values()
+                ]
+                for future in concurrent.futures.as_completed(futures):
+                    grabbed.update(future.result())
+            progress.summary()
+
+            for package in self.grab_commande:
+                if package in grabbed:
                     package_list.append(f" {package}")
-                except Exception as e:
-                    logging.error(f"Failed to grab package {package}: {e}")
+
+
+    def grab_packages(self, packages, progress):
+        """
+        Grabs the requests of one package in order, reporting to `progress` and never raising.
+
+        Args:
+            packages (list): The requests to grab ("name" or "name-version").
+            progress (k_launcher_utils.TransferProgress): The shared progress tracker.
+
+        Returns:
+            list: The requests that were grabbed.
+        """
+        grabbed = []
+        for package in packages:
+            progress.start(package)
+            try:
+                stats = k_launcher_utils.grab_package_to_local(
+                    package, link=self.grab_link, progress=progress.callback(package),
+                    keep_extra=self.grab_keep,
+                )
+            except Exception as e:
+                logging.error(f"Failed to grab package {package}: {e}")
+                stats = None
+            progress.finish(package, success=stats is not None)
+            if stats is not None:
+                grabbed.append(package)
+        return grabbed
 
 
     def handle_switch_command(self, package_list, switch_prod_local):
@@ -177,11 +294,16 @@ class k_cmds(k_launcher_repo.k_repo):
         Args:
             config_path (str): Full path to save the Rez context file.
             command_parts (list): List of commands for logging or further processing.
+
+        Returns:
+            bool: True if the environment was saved.
         """
         try:
             base_command = f"{command_parts} --output {config_path}"
             subprocess.run(base_command, shell=True, check=True)
             logging.info(f"Environment saved successfully at {config_path}")
+            return True
         except subprocess.CalledProcessError as e:
             logging.error(f"Failed to save Rez environment: {e}")
+            return False
 
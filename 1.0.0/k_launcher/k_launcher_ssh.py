@@ -0,0 +1,200 @@
+
+# regular import
+import os
+import re
+import base64
+import hashlib
+import logging
+import subprocess
+
+# custom packages import
+import k_launcher_context
+from k_constants import CONSTANTS
+
+
+logging.basicConfig(level=logging.INFO)
+
+
+# Private key loaded into the agent, its ".pub" sibling is used to check it is loaded.
+SSH_KEY = os.path.expanduser(getattr(CONSTANTS, "ssh_key", "~/.ssh/id_rsa"))
+
+# Timeout of the ssh-agent and ssh-add calls, in seconds (ssh-add may prompt a passphrase).
+SSH_TIMEOUT = getattr(CONSTANTS, "ssh_timeout", 120)
+
+# Session context keys holding the agent started by the launcher.
+CONTEXT_SOCK_KEY = "ssh_auth_sock"
+CONTEXT_PID_KEY = "ssh_agent_pid"
+
+# `ssh-add -l` exit codes.
+AGENT_HAS_KEYS = 0
+AGENT_NO_KEYS = 1
+AGENT_UNREACHABLE = 2
+
+
+# Process wide state: once the agent and the key are checked, later clones make no call.
+_AGENT_READY = {}
+
+
+def get_key_fingerprint(key_path=None):
+    """
+    Computes the SHA256 fingerprint of a key from its public key file, as printed by `ssh-add -l`.
+
+    Args:
+        key_path (str, optional): The private key, defaults to `SSH_KEY`.
+
+    Returns:
+        str or None: The fingerprint (e.g. "SHA256:abc..."), None if the ".pub" file
+                     is missing or invalid.
+    """
+    try:
+        with open(f"{key_path or SSH_KEY}.pub", "r") as file:
+            blob = file.read().split()[1]
+        digest = hashlib.sha256(base64.b64decode(blob)).digest()
+    except (OSError, IndexError, ValueError):
+        return None
+    return "SHA256:" + base64.b64encode(digest).decode("ascii").rstrip("=")
+
+
+def list_agent_keys():
+    """
+    Lists the fingerprints of the keys loaded in the agent of the environment.
+
+    Returns:
+        tuple: `(status, fingerprints)` where status is the `ssh-add -l` exit code
+               (`AGENT_HAS_KEYS`, `AGENT_NO_KEYS` or `AGENT_UNREACHABLE`).
+    """
+    try:
+        result = subprocess.run(
+            ["ssh-add", "-l", "-E", "sha256"], capture_output=True, text=True, timeout=SSH_TIMEOUT
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logging.debug(f"ssh-add -l failed: {e}")
+        return AGENT_UNREACHABLE, set()
+    return result.returncode, set(re.findall(r"SHA256:[A-Za-z0-9+/]+", result.stdout))
+
+
+def parse_agent_output(output):
+    """
+    Parses the variables printed by `ssh-agent -s`.
+
+    Args:
+        output (str): The output of the agent (e.g. "SSH_AUTH_SOCK=/tmp/ssh-x/agent.1; export SSH_AUTH_SOCK;").
+
+    Returns:
+        dict: The `SSH_AUTH_SOCK` and `SSH_AGENT_PID` values found.
+    """
+    return dict(re.findall(r"(SSH_AUTH_SOCK|SSH_AGENT_PID)=([^;\s]+)", output))
+
+
+def _use_agent(sock, pid=None):
+    """
+    Points the environment of the launcher, inherited by git, at an agent.
+
+    Args:
+        sock (str): The agent socket.
+        pid (str, optional): The agent PID.
+    """
+    os.environ["SSH_AUTH_SOCK"] = sock
+    if pid:
+        os.environ["SSH_AGENT_PID"] = str(pid)
+
+
+def _restore_session_agent(context):
+    """
+    Reuses the agent saved in the session context if its socket still exists.
+
+    Args:
+        context (k_launcher_context.PackageContextManager): The session context.
+
+    Returns:
+        bool: True if the environment now points at the saved agent.
+    """
+    data = context.load_data_context()
+    sock = data.get(CONTEXT_SOCK_KEY)
+    if not sock or not os.path.exists(sock):
+        return False
+    _use_agent(sock, data.get(CONTEXT_PID_KEY))
+    logging.debug(f"Reusing the ssh-agent of the session ({sock}).")
+    return True
+
+
+def _start_agent(context):
+    """
+    Starts an ssh-agent, exports its variables and saves them in the session context.
+
+    Args:
+        context (k_launcher_context.PackageContextManager): The session context.
+
+    Returns:
+        bool: True if the agent was started.
+    """
+    logging.info("Starting ssh-agent...")
+    try:
+        result = subprocess.run(
+            ["ssh-agent", "-s"], capture_output=True, text=True, check=True, timeout=SSH_TIMEOUT
+        )
+    except (OSError, subprocess.SubprocessError) as e:
+        logging.error(f"Failed to start ssh-agent: {e}")
+        return False
+
+    variables = parse_agent_output(result.stdout)
+    if "SSH_AUTH_SOCK" not in variables:
+        logging.error(f"Unexpected ssh-agent output: {result.stdout.strip()}")
+        return False
+
+    _use_agent(variables["SSH_AUTH_SOCK"], variables.get("SSH_AGENT_PID"))
+    context.save_data_context(CONTEXT_SOCK_KEY, variables["SSH_AUTH_SOCK"])
+    context.save_data_context(CONTEXT_PID_KEY, variables.get("SSH_AGENT_PID"))
+    return True
+
+
+def ensure_ssh_agent(key_path=None):
+    """
+    Makes sure an ssh-agent is reachable and holds the key, at most once per process.
+
+    The agent of the environment is used when alive, otherwise the agent saved in
+    the session context, otherwise a new agent is started and saved in the context
+    so the next launcher calls of the terminal reuse it. On Windows the OpenSSH
+    agent service is used as is. `ssh-add` only runs when the fingerprint of the
+    key is not listed by `ssh-add -l`.
+
+    Args:
+        key_path (str, optional): The private key, defaults to `SSH_KEY`.
+
+    Returns:
+        bool: True if the agent holds the key.
+
+    Logs:
+        - Info: When the agent is started or the key is added.
+        - Error: If the agent cannot be started or the key cannot be added.
+    """
+    key_path = key_path or SSH_KEY
+    if _AGENT_READY.get(key_path):
+        return True
+
+    status, fingerprints = list_agent_keys()
+    if status == AGENT_UNREACHABLE:
+        if os.name == "nt":
+            logging.error("The ssh-agent service is not running (Start-Service ssh-agent).")
+            return False
+        context = k_launcher_context.PackageContextManager()
+        if _restore_session_agent(context):
+            status, fingerprints = list_agent_keys()
+        if status == AGENT_UNREACHABLE:
+            if not _start_agent(context):
+                return False
+            status, fingerprints = AGENT_NO_KEYS, set()
+
+    fingerprint = get_key_fingerprint(key_path)
+    if fingerprint and fingerprint in fingerprints:
+        logging.debug(f"SSH key {key_path} already loaded in the agent.")
+    else:
+        try:
+            subprocess.run(["ssh-add", key_path], check=True, timeout=SSH_TIMEOUT)
+            logging.info("SSH key added to agent.")
+        except (OSError, subprocess.SubprocessError) as e:
+            logging.error(f"Failed to add SSH key to agent: {e}")
+            return False
+
+    _AGENT_READY[key_path] = True
+    return True
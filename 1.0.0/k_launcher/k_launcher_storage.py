@@ -0,0 +1,371 @@
+
+# regular import
+import os
+import json
+import time
+import logging
+import tempfile
+import contextlib
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+LOCK_TIMEOUT = 10.0
+LOCK_POLL_INTERVAL = 0.05
+
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+@contextlib.contextmanager
+def file_lock(path, timeout=LOCK_TIMEOUT, remove_lock=False):
+    """
+    Holds an exclusive lock on `path` for the duration of the `with` block.
+
+    The lock is taken on a sibling `<path>.lock` file so the locked file itself
+    can be replaced atomically while the lock is held. A lock file removed by
+    its holder while another process was waiting on it is detected (the path no
+    longer points to the locked inode) and the waiter locks the new file instead.
+
+    Args:
+        path (str): The file to lock.
+        timeout (float): Seconds to wait for the lock before giving up.
+        remove_lock (bool): Removes the lock file before releasing it, on POSIX
+                            only since Windows cannot remove an open file.
+
+    Raises:
+        TimeoutError: If the lock cannot be acquired within `timeout` seconds.
+    """
+    lock_path = f"{path}.lock"
+    deadline = time.monotonic() + timeout
+    while True:
+        fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o666)
+        try:
+            _acquire_lock(fd, path, timeout, deadline)
+        except BaseException:
+            os.close(fd)
+            raise
+        if os.name == "nt" or _is_lock_file(fd, lock_path):
+            break
+        _release_lock(fd)
+    try:
+        yield
+    finally:
+        if remove_lock and os.name != "nt":
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(lock_path)
+        _release_lock(fd)
+
+
+def _acquire_lock(fd, path, timeout, deadline):
+    """
+    Polls the exclusive lock of an open lock file until `deadline`.
+    """
+    while True:
+        try:
+            if os.name == "nt":
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Could not lock '{path}' within {timeout} seconds.")
+            time.sleep(LOCK_POLL_INTERVAL)
+
+
+def _is_lock_file(fd, lock_path):
+    """
+    Tells whether `lock_path` still is the file locked through `fd`.
+    """
+    try:
+        path_stat = os.stat(lock_path)
+    except FileNotFoundError:
+        return False
+    fd_stat = os.fstat(fd)
+    return (path_stat.st_dev, path_stat.st_ino) == (fd_stat.st_dev, fd_stat.st_ino)
+
+
+def _release_lock(fd):
+    """
+    Unlocks and closes a lock file.
+    """
+    try:
+        if os.name == "nt":
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    except OSError:
+        pass
+    os.close(fd)
+
+
+def read_json_file(file_path, default=None):
+    """
+    Reads a JSON file, tolerating a missing or corrupted file.
+
+    Args:
+        file_path (str): The JSON file to read.
+        default: The value returned when the file is missing or invalid.
+
+    Returns:
+        The decoded JSON content, or `default`.
+    """
+    try:
+        with open(file_path, "r") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return default
+    except json.JSONDecodeError:
+        logging.warning(f"Failed to decode JSON in '{file_path}', ignoring it.")
+        return default
+
+
+def atomic_write_json(file_path, data, indent=4):
+    """
+    Writes JSON data through a temporary file renamed over the destination,
+    so readers never see a truncated file.
+
+    Args:
+        file_path (str): The destination JSON file.
+        data: The data to serialize.
+        indent (int, optional): JSON indentation, None for a compact file.
+    """
+    folder = os.path.dirname(file_path) or "."
+    os.makedirs(folder, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix=f".{os.path.basename(file_path)}.", suffix=".tmp")
+    try:
+        # mkstemp creates the file private to the user, the CONTEXT folder is shared.
+        os.chmod(tmp_path, 0o666 & ~_UMASK)
+        with os.fdopen(fd, "w") as file:
+            json.dump(data, file, indent=indent)
+            file.flush()
+            os.fsync(file.fileno())
+        _replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _replace(src, dst, retries=5):
+    """
+    Renames `src` over `dst`, retrying on Windows where a reader holding `dst`
+    open makes the rename fail for a short moment.
+    """
+    for attempt in range(retries):
+        try:
+            os.replace(src, dst)
+            return
+        except PermissionError:
+            if attempt == retries - 1:
+                raise
+            time.sleep(LOCK_POLL_INTERVAL * (attempt + 1))
+
+
+class ShardedContextStore:
+    """
+    Stores the context of each session in its own JSON file.
+
+    Sessions live in `<context_file>.d/<session_id>.json`. Each shard is written
+    atomically under its own lock, so concurrent terminals only contend when they
+    share a session, and the cost of a load or a save does not depend on how many
+    sessions exist.
+
+    A legacy single-file context (`<context_file>`) is split into shards the first
+    time the store is used and kept next to it as `<context_file>.migrated`.
+
+    Attributes:
+        legacy_file (str): The path of the legacy single JSON context file.
+        folder (str): The folder holding one JSON file per session.
+        legacy_skipped (set): The legacy sessions not migrated.
+    """
+
+    def __init__(self, context_file, legacy_skipped=()):
+        """
+        Initializes the store for the given context file.
+
+        Args:
+            context_file (str): The path of the (legacy) context file, the shard
+                                folder is created next to it.
+            legacy_skipped (iterable, optional): The sessions of the legacy file
+                                                 dropped by the migration.
+        """
+        self.legacy_file = context_file
+        self.folder = f"{context_file}.d"
+        self.legacy_skipped = set(legacy_skipped)
+        self._migrated = False
+
+    def shard_path(self, session_id):
+        """
+        Returns the path of the shard holding `session_id`.
+
+        Args:
+            session_id (str): The session identifier.
+
+        Returns:
+            str: The JSON file of the session.
+        """
+        safe_id = "".join(c if c.isalnum() or c in "-_." else "_" for c in str(session_id))
+        return os.path.join(self.folder, f"{safe_id}.json")
+
+    def load(self, session_id):
+        """
+        Loads the context of a single session.
+
+        Args:
+            session_id (str): The session identifier.
+
+        Returns:
+            dict or None: The session context, or None if the session has no shard.
+        """
+        self.migrate_legacy()
+        return read_json_file(self.shard_path(session_id))
+
+    def update(self, session_id, values):
+        """
+        Merges `values` into the session shard under lock and writes it atomically.
+
+        Only the given keys are written, so two processes of the same session
+        saving different keys do not overwrite each other.
+
+        Args:
+            session_id (str): The session identifier.
+            values (dict): The context keys and values to store.
+
+        Returns:
+            dict: The full session context after the update.
+        """
+        self.migrate_legacy()
+        path = self.shard_path(session_id)
+        os.makedirs(self.folder, exist_ok=True)
+        with file_lock(path):
+            context = read_json_file(path, {})
+            context.update(values)
+            atomic_write_json(path, context)
+        return context
+
+    def remove(self, session_id):
+        """
+        Deletes the shard of a session and its lock file.
+
+        The lock file is removed under the lock (see `file_lock`), except on
+        Windows where it is left to `remove_orphan_locks`.
+
+        Args:
+            session_id (str): The session identifier.
+        """
+        path = self.shard_path(session_id)
+        with file_lock(path, remove_lock=True):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def remove_orphan_locks(self, max_age):
+        """
+        Deletes the lock files whose shard is gone, left by a crash or by `remove`
+        on Windows.
+
+        Args:
+            max_age (float): Only the lock files unchanged for more than this many
+                             seconds are removed.
+
+        Returns:
+            int: The number of removed lock files.
+        """
+        if not os.path.isdir(self.folder):
+            return 0
+        removed = 0
+        now = time.time()
+        with os.scandir(self.folder) as entries:
+            lock_files = [
+                (entry.path, entry.stat().st_mtime)
+                for entry in entries if entry.name.endswith(".json.lock")
+            ]
+        for lock_path, mtime in lock_files:
+            path = lock_path[:-len(".lock")]
+            if now - mtime < max_age or os.path.exists(path):
+                continue
+            try:
+                with file_lock(path, timeout=0, remove_lock=True):
+                    orphan = not os.path.exists(path)
+                if orphan and os.name == "nt":
+                    os.remove(lock_path)
+            except (OSError, TimeoutError):
+                continue
+            removed += orphan
+        return removed
+
+    def sessions(self):
+        """
+        Lists the session identifiers that have a shard.
+
+        Returns:
+            list: The session identifiers.
+        """
+        self.migrate_legacy()
+        if not os.path.isdir(self.folder):
+            return []
+        return [
+            filename[:-len(".json")]
+            for filename in os.listdir(self.folder)
+            if filename.endswith(".json") and not filename.startswith(".")
+        ]
+
+    def scan(self):
+        """
+        Lists the session shards with their size and modification time.
+
+        Returns:
+            list: `(session_id, path, size, mtime)` tuples, oldest shard first.
+        """
+        self.migrate_legacy()
+        if not os.path.isdir(self.folder):
+            return []
+        shards = []
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if entry.name.endswith(".json") and not entry.name.startswith("."):
+                    stat_result = entry.stat()
+                    shards.append((entry.name[:-len(".json")], entry.path, stat_result.st_size, stat_result.st_mtime))
+        return sorted(shards, key=lambda shard: shard[3])
+
+    def migrate_legacy(self):
+        """
+        Splits the legacy single-file context into per-session shards, once.
+
+        Sessions that already have a shard, or listed in `legacy_skipped`, are
+        left untouched. The shards keep the modification time of the legacy file,
+        so the sessions it held age from their last save rather than from the
+        migration. The legacy file is renamed to `<context_file>.migrated` so the
+        migration runs only once.
+        """
+        if self._migrated:
+            return
+        self._migrated = True
+
+        if not os.path.exists(self.legacy_file):
+            return
+
+        os.makedirs(self.folder, exist_ok=True)
+        with file_lock(self.legacy_file):
+            if not os.path.exists(self.legacy_file):
+                return
+            legacy = read_json_file(self.legacy_file, {})
+            legacy_mtime = os.path.getmtime(self.legacy_file)
+            migrated = 0
+            for session_id, context in legacy.items():
+                path = self.shard_path(session_id)
+                if session_id in self.legacy_skipped or os.path.exists(path):
+                    continue
+                atomic_write_json(path, context)
+                os.utime(path, (legacy_mtime, legacy_mtime))
+                migrated += 1
+            _replace(self.legacy_file, f"{self.legacy_file}.migrated")
+        logging.info(
+            f"Migrated {migrated} of {len(legacy)} session(s) from '{self.legacy_file}' to '{self.folder}'."
+        )
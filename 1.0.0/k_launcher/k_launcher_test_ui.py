@@ -1,10 +1,14 @@
+import os
 import sys
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
     QLabel, QComboBox, QTabWidget, QTextEdit, QLineEdit, QTableWidget, QTableWidgetItem,
     QHeaderView, QGroupBox, QFormLayout
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QFileSystemWatcher
+
+import k_launcher_refs
+import k_launcher_git_async
 
 class KLauncherUI(QMainWindow):
     def __init__(self):
@@ -106,12 +110,18 @@ class KLauncherUI(QMainWindow):
         layout.addWidget(repo_group)
 
         self.repo_path_input = QLineEdit()
+        self.repo_path_input.editingFinished.connect(self.refresh_branch_dropdown)
         repo_layout.addRow("Repo Path:", self.repo_path_input)
 
         self.branch_dropdown = QComboBox()
-        self.branch_dropdown.addItems(["main", "dev", "feature"])
         repo_layout.addRow("Branch:", self.branch_dropdown)
 
+        # The cache is read instantly, the dropdown is filled again when a background refresh rewrites it.
+        self.branch_url = None
+        os.makedirs(k_launcher_refs.REFS_FOLDER, exist_ok=True)
+        self.refs_watcher = QFileSystemWatcher([k_launcher_refs.REFS_FOLDER])
+        self.refs_watcher.directoryChanged.connect(self.reload_branch_dropdown)
+
         git_btn_layout = QHBoxLayout()
         self.pull_btn = QPushButton("Pull")
         self.commit_btn = QPushButton("Commit")
@@ -123,6 +133,26 @@ class KLauncherUI(QMainWindow):
 
         self.tab_widget.addTab(tab, "Git Management")
 
+    def refresh_branch_dropdown(self):
+        repo_path = self.repo_path_input.text().strip()
+        self.branch_url = k_launcher_git_async.get_remote_url(repo_path) if repo_path else None
+        entry = k_launcher_refs.get_remote_refs(self.branch_url, wait=False) if self.branch_url else None
+        self.fill_branch_dropdown(entry)
+
+    def reload_branch_dropdown(self):
+        if self.branch_url:
+            self.fill_branch_dropdown(k_launcher_refs.read_cached_refs(self.branch_url))
+
+    def fill_branch_dropdown(self, entry):
+        branches = sorted(entry["heads"]) if entry else []
+        if branches == [self.branch_dropdown.itemText(i) for i in range(self.branch_dropdown.count())]:
+            return
+        current = self.branch_dropdown.currentText()
+        self.branch_dropdown.clear()
+        self.branch_dropdown.addItems(branches)
+        if current in branches:
+            self.branch_dropdown.setCurrentText(current)
+
     def init_console(self, parent_layout):
         console_label = QLabel("Console:")
         parent_layout.addWidget(console_label)
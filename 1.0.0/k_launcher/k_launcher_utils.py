@@ -7,6 +7,9 @@ import shutil
 import os
 import re
 import stat
+import hashlib
+import time
+import threading
 import subprocess
 
 # custom packages import
@@ -16,25 +19,48 @@ from k_constants import CONSTANTS
 logging.basicConfig(level=logging.INFO)
 
 
-def parse_packages_files(root_folder, version=None):
+# Files whose size matches and mtime differs by less than this are not copied again (seconds).
+SYNC_MTIME_TOLERANCE = 1.0
+
+# Linux ioctl cloning a file (reflink).
+FICLONE = 0x40049409
+
+# Minimum delay between two aggregate progress logs of a transfer (seconds).
+PROGRESS_INTERVAL = 2.0
+
+# Hidden folders created next to the released version, ignored by the package index.
+RELEASE_STAGING_PREFIX = ".staging-"
+RELEASE_BACKUP_PREFIX = ".rollback-"
+# Number of previous contents kept per released version for `rollback_release`.
+RELEASE_BACKUPS = getattr(CONSTANTS, "release_backups", 2)
+
+
+def parse_packages_files(root_folder, version=None, name=None, version_range=None, deep=False):
     """
-    Walks through the directory tree starting from `root_folder` and finds all package files.
+    Finds the package files of a rez repository through its persistent index
+    (see `k_launcher_index.PackageIndex`), refreshed incrementally on each call.
 
     Args:
-        root_folder (str): The root directory to start searching for package files.
-        version (str, optional): The version string to filter package files by version. 
-        Defaults to None.
+        root_folder (str): The root directory of the package repository.
+        version (str, optional): Exact version of the package files to return. 
+        Defaults to None (every version).
+        name (str, optional): Exact name of the package. Defaults to None (every package).
+        version_range (str, optional): Version range (e.g. "1.0+<2.0"), see
+        `k_launcher_index.parse_version_range`.
+        deep (bool): Also detects the package files edited or removed in place
+        (see `k_launcher_index.PackageIndex.refresh`).
 
     Returns:
-        list: A list of paths to package files that match the version (if provided).
+        list: A list of paths to package files that match the filters (if provided).
     """
-    package_files = []
-    for foldername, subfolders, filenames in os.walk(root_folder):
-        for filename in filenames:
-            if filename == CONSTANTS.package:
-                if version in foldername:
-                    package_files.append(os.path.join(foldername, filename))
-    return package_files
+    import k_launcher_index
+
+    index = k_launcher_index.PackageIndex(root_folder)
+    index.refresh(deep=deep)
+    return [
+        os.path.join(entry["path"], CONSTANTS.package)
+        for entry in index.find(name=name, version=version, version_range=version_range)
+    ]
 
 
 def load_json_file(file_path):
@@ -93,29 +119,418 @@ def make_writable_and_remove(path):
     os.rmdir(path)
 
 
-def grab_package_to_local(package_name):
+def format_size(num_bytes):
+    """
+    Formats a number of bytes for logging.
+
+    Args:
+        num_bytes (int): The number of bytes.
+
+    Returns:
+        str: The human readable size (e.g. "12.3 MB").
+    """
+    if num_bytes < 1024:
+        return f"{int(num_bytes)} B"
+    for unit in ("KB", "MB", "GB"):
+        num_bytes /= 1024.0
+        if num_bytes < 1024:
+            return f"{num_bytes:.1f} {unit}"
+    num_bytes /= 1024.0
+    return f"{num_bytes:.1f} TB"
+
+
+def get_folder_size(folder):
+    """
+    Computes the disk usage of a folder, symlinks are not followed.
+
+    Args:
+        folder (str): The folder to measure.
+
+    Returns:
+        int: The total size of the files, in bytes.
+    """
+    total = 0
+    for foldername, _subfolders, filenames in os.walk(folder):
+        for filename in filenames:
+            try:
+                total += os.lstat(os.path.join(foldername, filename)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _reflink_file(src, dst):
     """
-    Copies the specified package from PROD to LOCAL, including all versions.
+    Clones `src` into `dst` sharing the data blocks (copy-on-write), on file
+    systems that support it (Btrfs, XFS, ...).
+
+    Raises:
+        OSError: If reflinks are not supported for these files.
+    """
+    if os.name == "nt":
+        raise OSError("Reflinks are not supported on this platform.")
+
+    import fcntl
+    with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+        fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+    shutil.copystat(src, dst)
+
+
+def _transfer_file(src, dst, link=None):
+    """
+    Copies, hardlinks or reflinks a single file, falling back to a copy.
 
     Args:
-        package_name (str): The name of the package to grab.
+        src (str): The source file.
+        dst (str): The destination file, must not exist.
+        link (str, optional): "hardlink", "reflink" or None for a plain copy.
+
+    Returns:
+        bool: True if the file was linked, False if it was copied.
+    """
+    if link == "hardlink":
+        try:
+            os.link(src, dst)
+            return True
+        except OSError:
+            pass
+    elif link == "reflink":
+        try:
+            _reflink_file(src, dst)
+            return True
+        except OSError:
+            if os.path.exists(dst):
+                os.remove(dst)
+    shutil.copy2(src, dst)
+    return False
+
+
+def _remove_entry(path):
+    """
+    Removes a file, a symlink or a whole folder from a synchronized destination.
+
+    Args:
+        path (str): The entry to remove, symlinks are removed, never followed.
+
+    Returns:
+        int: The number of files removed.
+    """
+    if not os.path.isdir(path) or os.path.islink(path):
+        if not os.path.islink(path):
+            os.chmod(path, stat.S_IWRITE | stat.S_IREAD)
+        os.remove(path)
+        return 1
+
+    removed = 0
+    for root, dirs, files in os.walk(path, topdown=False):
+        for name in files:
+            full_path = os.path.join(root, name)
+            if not os.path.islink(full_path):
+                os.chmod(full_path, stat.S_IWRITE | stat.S_IREAD)
+            os.remove(full_path)
+            removed += 1
+        for name in dirs:
+            full_path = os.path.join(root, name)
+            if os.path.islink(full_path):
+                os.remove(full_path)
+                removed += 1
+            else:
+                os.rmdir(full_path)
+    os.rmdir(path)
+    return removed
+
+
+def sync_tree(src, dst, link=None, progress=None, keep_extra=False):
+    """
+    Incrementally mirrors the `src` folder into `dst`.
+
+    A file is skipped when the destination already has the same size and
+    modification time (within `SYNC_MTIME_TOLERANCE`), otherwise it is replaced.
+    Files and folders only present in `dst` are removed unless `keep_extra` is set.
+
+    Args:
+        src (str): The source folder.
+        dst (str): The destination folder.
+        link (str, optional): "hardlink" or "reflink" to link new files instead of
+                              copying them when the file system allows it. A hardlinked
+                              file is the same file in both folders, editing it in `dst`
+                              edits `src` too.
+        progress (callable, optional): Called as `progress(path, size, transferred)`
+                                       after each file.
+        keep_extra (bool): Keep the files and folders of `dst` missing in `src`.
+
+    Returns:
+        dict: `files_copied`, `files_linked`, `files_skipped`, `files_removed`,
+              `bytes_copied`, `bytes_linked` and `bytes_skipped`.
+    """
+    stats = dict.fromkeys(
+        ("files_copied", "files_linked", "files_skipped", "files_removed",
+         "bytes_copied", "bytes_linked", "bytes_skipped"), 0
+    )
+    for root, dirs, files in os.walk(src):
+        target_root = os.path.join(dst, os.path.relpath(root, src))
+        os.makedirs(target_root, exist_ok=True)
+
+        # Entries of `dst` missing in `src`, or whose type changed (file <-> folder).
+        for name in os.listdir(target_root):
+            target = os.path.join(target_root, name)
+            is_folder = os.path.isdir(target) and not os.path.islink(target)
+            if name in dirs:
+                stale = not is_folder
+            elif name in files:
+                stale = is_folder
+            else:
+                stale = not keep_extra
+            if stale:
+                stats["files_removed"] += _remove_entry(target)
+
+        for name in files:
+            src_file = os.path.join(root, name)
+            dst_file = os.path.join(target_root, name)
+            src_stat = os.stat(src_file)
+            try:
+                dst_stat = os.stat(dst_file)
+            except FileNotFoundError:
+                dst_stat = None
+
+            if (
+                dst_stat is not None
+                and dst_stat.st_size == src_stat.st_size
+                and abs(dst_stat.st_mtime - src_stat.st_mtime) <= SYNC_MTIME_TOLERANCE
+            ):
+                stats["files_skipped"] += 1
+                stats["bytes_skipped"] += src_stat.st_size
+                if progress:
+                    progress(src_file, src_stat.st_size, False)
+                continue
+
+            if dst_stat is not None:
+                os.chmod(dst_file, stat.S_IWRITE | stat.S_IREAD)
+                os.remove(dst_file)
+
+            kind = "linked" if _transfer_file(src_file, dst_file, link) else "copied"
+            stats[f"files_{kind}"] += 1
+            stats[f"bytes_{kind}"] += src_stat.st_size
+            if progress:
+                progress(src_file, src_stat.st_size, True)
+    return stats
+
+
+class TransferProgress:
+    """
+    Thread-safe progress of several package transfers running in parallel.
+
+    Pass `callback(package)` as the `progress` argument of `grab_package_to_local`
+    (or `sync_tree`). The aggregate progress (files, bytes, throughput) is logged
+    at most every `interval` seconds and each package is summarized by `finish`.
+
+    Attributes:
+        packages (dict): Per package counters: files, bytes, transferred bytes,
+                         start and end time.
     """
+
+    def __init__(self, interval=PROGRESS_INTERVAL):
+        """
+        Initializes the progress tracker.
+
+        Args:
+            interval (float): Minimum delay between two aggregate logs, in seconds.
+        """
+        self.interval = interval
+        self.packages = {}
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self._last_log = self._start
+
+    def start(self, package):
+        """
+        Registers a package transfer and starts its clock.
+
+        Args:
+            package (str): The package being transferred.
+        """
+        with self._lock:
+            self.packages[package] = {
+                "files": 0, "bytes": 0, "transferred": 0,
+                "start": time.perf_counter(), "end": None,
+            }
+
+    def callback(self, package):
+        """
+        Returns the per-file progress callback of a package.
+
+        Args:
+            package (str): The package being transferred.
+
+        Returns:
+            callable: A `progress(path, size, transferred)` function.
+        """
+        if package not in self.packages:
+            self.start(package)
+
+        def progress(path, size, transferred):
+            self.update(package, size, transferred)
+        return progress
+
+    def update(self, package, size, transferred):
+        """
+        Records one processed file and logs the aggregate progress if due.
+
+        Args:
+            package (str): The package the file belongs to.
+            size (int): The size of the file in bytes.
+            transferred (bool): False if the file was skipped as unchanged.
+        """
+        with self._lock:
+            counters = self.packages[package]
+            counters["files"] += 1
+            counters["bytes"] += size
+            if transferred:
+                counters["transferred"] += size
+
+            now = time.perf_counter()
+            if now - self._last_log < self.interval:
+                return
+            self._last_log = now
+            message = self._format(self._totals(), now - self._start)
+        logging.info(f"Grab progress: {message}")
+
+    def finish(self, package, success=True):
+        """
+        Stops the clock of a package and logs its summary.
+
+        Args:
+            package (str): The transferred package.
+            success (bool): False if the transfer failed.
+        """
+        with self._lock:
+            counters = self.packages.setdefault(
+                package, {"files": 0, "bytes": 0, "transferred": 0, "start": time.perf_counter(), "end": None}
+            )
+            counters["end"] = time.perf_counter()
+            message = self._format(counters, counters["end"] - counters["start"])
+        if success:
+            logging.info(f"Grabbed '{package}': {message}")
+        else:
+            logging.error(f"Failed to grab '{package}' after {message}")
+
+    def summary(self):
+        """
+        Logs and returns the aggregate progress of every package.
+
+        Returns:
+            dict: The total files, bytes and transferred bytes, and the elapsed time in seconds.
+        """
+        with self._lock:
+            totals = self._totals()
+            totals["elapsed"] = time.perf_counter() - self._start
+            message = self._format(totals, totals["elapsed"])
+        logging.info(f"Grab total ({len(self.packages)} package(s)): {message}")
+        return totals
+
+    def _totals(self):
+        """
+        Sums the counters of every package, the lock must be held.
+        """
+        return {
+            key: sum(counters[key] for counters in self.packages.values())
+            for key in ("files", "bytes", "transferred")
+        }
+
+    @staticmethod
+    def _format(counters, elapsed):
+        """
+        Formats counters and the throughput of the transferred bytes.
+        """
+        throughput = counters["transferred"] / elapsed if elapsed > 0 else 0
+        return (
+            f"{counters['files']} file(s), {format_size(counters['bytes'])} processed, "
+            f"{format_size(counters['transferred'])} transferred in {elapsed:.1f}s "
+            f"({format_size(throughput)}/s)"
+        )
+
+
+def split_package_request(package_request):
+    """
+    Splits a "name" or "name-version" package request.
+
+    Args:
+        package_request (str): The package request (e.g. "iter" or "iter-1.1.0").
+
+    Returns:
+        tuple: The package name and the version, None if not given.
+    """
+    name, _, version = package_request.partition("-")
+    return name, version or None
+
+
+def grab_package_to_local(package_name, versions=None, link=None, progress=None, keep_extra=False):
+    """
+    Synchronizes the specified package from PROD to LOCAL.
+
+    Only the requested versions are synchronized (all PROD versions by default),
+    and only the files that differ from LOCAL are copied (see `sync_tree`).
+    Versions only present in LOCAL are kept, files only present in LOCAL under
+    a synchronized version are removed unless `keep_extra` is set.
+
+    Args:
+        package_name (str): The name of the package to grab, or "name-version"
+                            to grab a single version.
+        versions (list, optional): The versions to grab, defaults to every released
+                                   version in PROD (see `k_launcher_index.PackageIndex`).
+        link (str, optional): "hardlink" or "reflink" to link new files instead of
+                              copying them (see `sync_tree`).
+        progress (callable, optional): Called after each file (see `sync_tree`).
+        keep_extra (bool): Keep the LOCAL files missing in PROD (see `sync_tree`).
+
+    Returns:
+        dict or None: The transfer statistics (see `sync_tree`), or None if the
+                      package could not be grabbed.
+    """
+    package_name, version = split_package_request(package_name)
+    if version:
+        versions = [version]
+
     src_path = os.path.join(CONSTANTS.rootParseFolder, package_name)
     dest_path = os.path.join(CONSTANTS.rootLocalFolder, package_name)
 
     if not os.path.exists(src_path):
         logging.error(f"Source package '{src_path}' not found in PROD.")
-        return
+        return None
 
-    try:
-        if os.path.exists(dest_path):
-            logging.warning(f"Package '{package_name}' already exists in LOCAL. Overwriting...")
-            make_writable_and_remove(dest_path)
+    if versions is None:
+        import k_launcher_index
+
+        index = k_launcher_index.PackageIndex(CONSTANTS.rootParseFolder)
+        index.refresh()
+        # Version folders without package.py yet (release in progress) are not listed.
+        versions = [entry["version"] for entry in index.find(name=package_name)]
 
-        shutil.copytree(src_path, dest_path)
-        logging.info(f"Package '{package_name}' successfully copied from PROD to LOCAL.")
+    stats = {}
+    try:
+        for version in versions:
+            version_src = os.path.join(src_path, version)
+            if not os.path.isdir(version_src):
+                logging.error(f"Version '{version}' of package '{package_name}' not found in PROD.")
+                continue
+            version_stats = sync_tree(
+                version_src, os.path.join(dest_path, version), link, progress, keep_extra
+            )
+            for key, value in version_stats.items():
+                stats[key] = stats.get(key, 0) + value
+
+        transferred = stats.get("bytes_copied", 0) + stats.get("bytes_linked", 0)
+        logging.info(
+            f"Package '{package_name}' synchronized from PROD to LOCAL ({len(versions)} version(s)): "
+            f"{format_size(transferred)} transferred in {stats.get('files_copied', 0) + stats.get('files_linked', 0)} file(s) "
+            f"({format_size(stats.get('bytes_linked', 0))} linked), "
+            f"{format_size(stats.get('bytes_skipped', 0))} skipped in {stats.get('files_skipped', 0)} unchanged file(s), "
+            f"{stats.get('files_removed', 0)} LOCAL only file(s) removed."
+        )
+        return stats
     except Exception as e:
         logging.error(f"Failed to copy package '{package_name}': {e}")
+        return None
 
 
 def switch_rez_package_path(package_name, use_local=True):
@@ -173,34 +588,154 @@ def update_version(file_path, new_version):
         logging.error(f"Error occurred: {e}")
 
 
+def hash_tree(folder):
+    """
+    Computes a content hash of a folder: relative paths and bytes of every file.
+
+    Args:
+        folder (str): The folder to hash.
+
+    Returns:
+        str: The hexadecimal SHA-256 of the folder content.
+    """
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(folder):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            digest.update(os.path.relpath(path, folder).replace(os.sep, "/").encode("utf-8") + b"\0")
+            with open(path, "rb") as file:
+                for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                    digest.update(chunk)
+            digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _release_backups(package_prod):
+    """
+    Lists the rollback copies kept for a released version, most recent first.
+
+    Args:
+        package_prod (str): The version folder in PROD.
+
+    Returns:
+        list: The paths of the rollback folders.
+    """
+    package_root, version = os.path.split(os.path.normpath(package_prod))
+    prefix = f"{RELEASE_BACKUP_PREFIX}{version}-"
+    if not os.path.isdir(package_root):
+        return []
+    return sorted(
+        (os.path.join(package_root, name) for name in os.listdir(package_root) if name.startswith(prefix)),
+        reverse=True,
+    )
+
+
 def release_package(package_local, package_prod):
     """
-    Copies a package from the local directory to the production directory and updates its version.
+    Releases a package from the local directory to the production directory and updates its version.
+
+    The package is copied into a hidden staging folder next to the destination (same
+    file system), verified against the source by content hash, version-bumped, then
+    swapped in with a rename. An existing version is renamed aside first and kept for
+    `rollback_release`, so PROD only misses the version between the two renames.
 
     Args:
-        package_local (str): The name of the package in the local directory (e.g., 'iter-1.1.0').
-        package_prod (str): The name of the package in the production directory (e.g., 'iter-1.1.1').
+        package_local (str): The version folder in the local directory (e.g., 'LOCAL/iter/1.1.0').
+        package_prod (str): The version folder in the production directory (e.g., 'PROD/iter/1.1.1').
 
-    Raises:
-        Exception: If the source package is not found or the copy operation fails.
+    Returns:
+        bool: True if the package was released.
     """
+    import k_launcher_rez_cache
+
     if not os.path.exists(package_local):
         logging.error(f"Source package '{package_local}' not found in LOCAL.")
-        return
+        return False
+
+    package_prod = os.path.normpath(package_prod)
+    package_root, version = os.path.split(package_prod)
+    version = version.split("-")[-1]
+    # Fixed width nanoseconds: two releases in the same second get distinct, ordered names.
+    now = time.time_ns()
+    stamp = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now // 10**9))}-{now % 10**9:09d}"
+    staging = os.path.join(package_root, f"{RELEASE_STAGING_PREFIX}{version}-{stamp}-{os.getpid()}")
+    backup = None
 
     try:
-        if os.path.exists(package_prod):
-            logging.info(f"Removing existing package at '{package_prod}'...")
-            shutil.rmtree(package_prod)
+        os.makedirs(package_root, exist_ok=True)
+        shutil.copytree(package_local, staging)
 
-        shutil.copytree(package_local, package_prod)
+        if hash_tree(package_local) != hash_tree(staging):
+            raise IOError(f"Staged copy '{staging}' does not match '{package_local}'.")
 
-        version = package_prod.split("-")[-1]
-        update_version(os.path.join(package_prod, "package.py"), version)
-        logging.info(f"Package '{package_local}' successfully copied from LOCAL to PROD as {package_prod}.")
+        update_version(os.path.join(staging, CONSTANTS.package), version)
 
+        if os.path.exists(package_prod):
+            backup = os.path.join(package_root, f"{RELEASE_BACKUP_PREFIX}{version}-{stamp}-{os.getpid()}")
+            os.rename(package_prod, backup)
+        try:
+            os.rename(staging, package_prod)
+        except OSError:
+            if backup:
+                os.rename(backup, package_prod)
+            raise
+
+        logging.info(f"Package '{package_local}' successfully released from LOCAL to PROD as {package_prod}.")
     except Exception as e:
-        logging.error(f"Failed to copy package '{package_local}': {e}", exc_info=True)
+        logging.error(f"Failed to release package '{package_local}': {e}", exc_info=True)
+        if os.path.exists(staging):
+            make_writable_and_remove(staging)
+        return False
+
+    for old_backup in _release_backups(package_prod)[RELEASE_BACKUPS:]:
+        try:
+            make_writable_and_remove(old_backup)
+        except OSError as e:
+            logging.warning(f"Failed to remove old release backup '{old_backup}': {e}")
+
+    k_launcher_rez_cache.invalidate_package(os.path.basename(package_root))
+    return True
+
+
+def rollback_release(package_prod):
+    """
+    Restores the previous content of a released version, kept by `release_package`.
+
+    The current content is swapped out with a rename and deleted afterwards.
+
+    Args:
+        package_prod (str): The version folder in the production directory (e.g., 'PROD/iter/1.1.1').
+
+    Returns:
+        bool: True if the previous version was restored.
+    """
+    import k_launcher_rez_cache
+
+    package_prod = os.path.normpath(package_prod)
+    backups = _release_backups(package_prod)
+    if not backups:
+        logging.error(f"No previous release of '{package_prod}' to roll back to.")
+        return False
+
+    discarded = None
+    try:
+        if os.path.exists(package_prod):
+            package_root, version = os.path.split(package_prod)
+            discarded = os.path.join(package_root, f"{RELEASE_STAGING_PREFIX}{version}-rollback-{os.getpid()}")
+            os.rename(package_prod, discarded)
+        os.rename(backups[0], package_prod)
+    except OSError as e:
+        logging.error(f"Failed to roll back '{package_prod}': {e}", exc_info=True)
+        if discarded and not os.path.exists(package_prod):
+            os.rename(discarded, package_prod)
+        return False
+
+    if discarded:
+        make_writable_and_remove(discarded)
+    logging.info(f"Rolled back '{package_prod}' to the release saved in '{backups[0]}'.")
+    k_launcher_rez_cache.invalidate_package(os.path.basename(os.path.dirname(package_prod)))
+    return True
 
 
 def launch_vs_with_package(folder_path):
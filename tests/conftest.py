@@ -0,0 +1,47 @@
+# regular import
+import os
+import sys
+import types
+import shutil
+import tempfile
+
+import pytest
+
+
+# The launcher modules read their folders from `k_constants` (a rez package of the
+# studio) when imported: every test session points them at a temporary root so the
+# real CONTEXT, LOCAL and PROD folders are never touched.
+TEST_ROOT = tempfile.mkdtemp(prefix="k_launcher_tests_")
+
+
+class CONSTANTS:
+    root_folder = TEST_ROOT
+    context_folder = "CONTEXT"
+    package_context = "package_context"
+    package_repos = "repos.json"
+    environments = "environments"
+    git_user_config = "git_user.json"
+    rootLocalFolder = os.path.join(TEST_ROOT, "LOCAL")
+    rootParseFolder = os.path.join(TEST_ROOT, "PROD")
+    package = "package.py"
+
+
+sys.modules["k_constants"] = types.SimpleNamespace(CONSTANTS=CONSTANTS)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "1.0.0", "k_launcher"))
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(TEST_ROOT, ignore_errors=True)
+
+
+@pytest.fixture
+def git_env(monkeypatch):
+    """
+    Gives git a fixed identity and no user or system configuration.
+    """
+    monkeypatch.setenv("GIT_CONFIG_NOSYSTEM", "1")
+    monkeypatch.setenv("GIT_CONFIG_GLOBAL", os.devnull)
+    for variable in ("GIT_AUTHOR", "GIT_COMMITTER"):
+        monkeypatch.setenv(f"{variable}_NAME", "Test")
+        monkeypatch.setenv(f"{variable}_EMAIL", "test@k_launcher")
+        monkeypatch.setenv(f"{variable}_DATE", "2024-01-01T12:00:00+00:00")
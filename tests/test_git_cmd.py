@@ -0,0 +1,141 @@
+# regular import
+import subprocess
+
+import pytest
+
+# custom packages import
+from k_launcher_git_cmd import k_git_cmd, read_refs, LOG_FORMAT
+
+
+def _git(repo_path, *args):
+    return subprocess.run(["git", "-C", str(repo_path)] + list(args), check=True, capture_output=True, text=True).stdout
+
+
+@pytest.fixture
+def repo(tmp_path, git_env):
+    """
+    A repository with two commits on main, a "feature" branch and an annotated tag.
+    """
+    repo_path = tmp_path / "repo"
+    _git(tmp_path, "init", "--quiet", "-b", "main", str(repo_path))
+    (repo_path / "file.txt").write_text("one\n")
+    _git(repo_path, "add", "file.txt")
+    _git(repo_path, "commit", "--quiet", "-m", "First, with a comma")
+    _git(repo_path, "tag", "-a", "v1.0", "-m", "Release 1.0")
+    (repo_path / "file.txt").write_text("two\n")
+    _git(repo_path, "commit", "--quiet", "-am", "Second")
+    _git(repo_path, "branch", "feature")
+    return repo_path
+
+
+def test_parse_status_branch_and_changes():
+    output = "\n".join([
+        "# branch.oid 0123456789abcdef0123456789abcdef01234567",
+        "# branch.head main",
+        "# branch.upstream origin/main",
+        "# branch.ab +2 -1",
+        "1 .M N... 100644 100644 100644 aaaa bbbb file with spaces.txt",
+        "2 R. N... 100644 100644 100644 aaaa bbbb R100 new name.txt\told name.txt",
+        "u UU N... 100644 100644 100644 100644 aaaa bbbb cccc conflict.txt",
+        "? untracked.txt",
+    ])
+
+    status = k_git_cmd.parse_status(output)
+
+    assert status["commit"] == "0123456789abcdef0123456789abcdef01234567"
+    assert status["branch"] == "main"
+    assert status["upstream"] == "origin/main"
+    assert (status["ahead"], status["behind"]) == (2, 1)
+    assert status["changed"] == ["file with spaces.txt", "new name.txt"]
+    assert status["conflicted"] == ["conflict.txt"]
+    assert status["untracked"] == ["untracked.txt"]
+    assert not status["clean"]
+
+
+def test_parse_status_detached_and_clean():
+    status = k_git_cmd.parse_status("# branch.oid abc\n# branch.head (detached)\n")
+
+    assert status["branch"] is None
+    assert status["upstream"] is None
+    assert status["clean"]
+    assert k_git_cmd.format_status(status) == "detached at abc, clean"
+
+
+def test_parse_status_of_git_output(repo):
+    (repo / "file.txt").write_text("three\n")
+    (repo / "new.txt").write_text("new\n")
+
+    status = k_git_cmd.parse_status(_git(repo, "status", "--porcelain=v2", "--branch"))
+
+    assert status["branch"] == "main"
+    assert status["commit"] == _git(repo, "rev-parse", "HEAD").strip()
+    assert status["changed"] == ["file.txt"]
+    assert status["untracked"] == ["new.txt"]
+
+
+def test_parse_commit_log_of_git_output(repo):
+    output = _git(repo, "log", "--decorate=short", f"--format={LOG_FORMAT}")
+
+    commits = k_git_cmd.parse_commit_log(output)
+
+    assert [commit["subject"] for commit in commits] == ["Second", "First, with a comma"]
+    second, first = commits
+    assert second["hash"] == _git(repo, "rev-parse", "HEAD").strip()
+    assert second["parents"] == [first["hash"]]
+    assert first["parents"] == []
+    assert "feature" in second["refs"]
+    assert first["tags"] == ["v1.0"]
+    assert second["author"] == "Test" and second["email"] == "test@k_launcher"
+
+
+def test_parse_commit_log_keeps_separators_in_fields():
+    record = "\x00".join(["h" * 40, "hhhh", "p1 p2", "A, B", "a@b", "2024-01-01", "HEAD -> main, tag: v2, origin/main", "Merge: x\ny"])
+
+    commits = k_git_cmd.parse_commit_log(record + "\x00\n")
+
+    assert len(commits) == 1
+    assert commits[0]["parents"] == ["p1", "p2"]
+    assert commits[0]["author"] == "A, B"
+    assert commits[0]["subject"] == "Merge: x\ny"
+    assert commits[0]["tags"] == ["v2"]
+    assert commits[0]["refs"] == ["HEAD -> main", "origin/main"]
+
+
+def test_read_refs_loose_and_packed(repo):
+    common_dir = str(repo / ".git")
+    head = _git(repo, "rev-parse", "HEAD").strip()
+    tag_object = _git(repo, "rev-parse", "v1.0").strip()
+    tag_commit = _git(repo, "rev-parse", "v1.0^{commit}").strip()
+    _git(repo, "update-ref", "refs/remotes/origin/main", head)
+    _git(repo, "symbolic-ref", "refs/remotes/origin/HEAD", "refs/remotes/origin/main")
+
+    refs = read_refs(common_dir)
+
+    assert refs["refs/heads/main"] == (head, head)
+    assert refs["refs/remotes/origin/HEAD"] == (head, head)
+    # A loose tag may be annotated, its commit is left to the caller.
+    assert refs["refs/tags/v1.0"] == (tag_object, None)
+
+    _git(repo, "pack-refs", "--all")
+    refs = read_refs(common_dir)
+
+    assert refs["refs/heads/feature"] == (head, head)
+    assert refs["refs/tags/v1.0"] == (tag_object, tag_commit)
+
+
+def test_read_refs_loose_ref_overrides_packed(repo):
+    _git(repo, "pack-refs", "--all")
+    first = _git(repo, "rev-parse", "HEAD~1").strip()
+    (repo / ".git" / "refs" / "heads" / "feature").write_text(first + "\n")
+    (repo / ".git" / "refs" / "heads" / "main.lock").write_text("garbage\n")
+
+    refs = read_refs(str(repo / ".git"))
+
+    assert refs["refs/heads/feature"] == (first, first)
+    assert "refs/heads/main.lock" not in refs
+
+
+def test_read_refs_reftable(tmp_path):
+    (tmp_path / "reftable").mkdir()
+
+    assert read_refs(str(tmp_path)) is None
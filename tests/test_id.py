@@ -0,0 +1,96 @@
+# regular import
+import os
+import subprocess
+import sys
+
+import pytest
+
+# custom packages import
+import k_launcher_id
+
+
+@pytest.mark.parametrize("session_id, expected", [
+    ("1234-1700000000-1a2b3c4d", (1234, 1700000000)),
+    ("1234-1700000000", (1234, 1700000000)),
+    ("1234", (1234, None)),
+    (1234, (1234, None)),
+    ("1234-abc", (1234, None)),
+    ("None", (None, None)),
+    ("", (None, None)),
+])
+def test_parse_session_id(session_id, expected):
+    assert k_launcher_id.parse_session_id(session_id) == expected
+
+
+def test_format_and_parse_session_id_round_trip():
+    session_id = k_launcher_id.format_session_id(42, 1700000000.75, "cafe0123")
+
+    assert session_id == "42-1700000000-cafe0123"
+    assert k_launcher_id.parse_session_id(session_id) == (42, 1700000000)
+    assert k_launcher_id.parse_session_host(session_id) == "cafe0123"
+    assert k_launcher_id.parse_session_host("42-1700000000") is None
+
+
+def test_host_tag_ignores_case():
+    assert k_launcher_id.get_host_tag("WS-042") == k_launcher_id.get_host_tag("ws-042")
+    assert len(k_launcher_id.get_host_tag()) == 8
+
+
+@pytest.mark.parametrize("cmdline, wrapper", [
+    (["bash"], False),
+    (["bash", "-i"], False),
+    (["bash", "script.sh"], True),
+    (["sh", "-c", "rez env"], True),
+    (["cmd.exe", "/c", "launch.bat"], True),
+    (["cmd.exe", "/k", "setup.bat"], False),
+])
+def test_is_wrapper_shell(cmdline, wrapper):
+    assert k_launcher_id._is_wrapper_shell(cmdline) == wrapper
+
+
+def test_session_export_line(monkeypatch):
+    monkeypatch.setattr(k_launcher_id, "_SESSION_ID", "42-1700000000-cafe0123")
+
+    line = k_launcher_id.get_session_export_line()
+
+    assert "K_LAUNCHER_SESSION=42-1700000000-cafe0123" in line
+    assert "K_LAUNCHER_SESSION_PID=42" in line
+
+
+def test_is_ancestor():
+    assert k_launcher_id.is_ancestor(os.getppid())
+    assert not k_launcher_id.is_ancestor(os.getpid())
+
+
+def _child_session_id(env):
+    """
+    Resolves the session ID in a child process of this one.
+    """
+    code = "import conftest, k_launcher_id; print(k_launcher_id.get_session_id())"
+    return subprocess.run(
+        [sys.executable, "-c", code], env=env, cwd=os.path.dirname(__file__),
+        check=True, capture_output=True, text=True,
+    ).stdout.strip()
+
+
+def test_exported_session_is_used_by_the_owner_descendants(monkeypatch):
+    monkeypatch.setenv(k_launcher_id.SESSION_ENV_VAR, f"{os.getpid()}-1-cafe0123")
+    monkeypatch.setenv(k_launcher_id.SESSION_PID_ENV_VAR, str(os.getpid()))
+
+    assert _child_session_id(dict(os.environ)) == f"{os.getpid()}-1-cafe0123"
+
+    # An older export without the owner PID: the PID of the ID is the owner.
+    monkeypatch.delenv(k_launcher_id.SESSION_PID_ENV_VAR)
+    assert _child_session_id(dict(os.environ)) == f"{os.getpid()}-1-cafe0123"
+
+
+def test_exported_session_of_another_terminal_is_ignored(monkeypatch):
+    other = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    try:
+        monkeypatch.setenv(k_launcher_id.SESSION_ENV_VAR, f"{other.pid}-1-cafe0123")
+        monkeypatch.setenv(k_launcher_id.SESSION_PID_ENV_VAR, str(other.pid))
+
+        assert _child_session_id(dict(os.environ)) != f"{other.pid}-1-cafe0123"
+    finally:
+        other.kill()
+        other.wait()
@@ -0,0 +1,82 @@
+# regular import
+import os
+
+import pytest
+
+# custom packages import
+from k_launcher_index import PackageIndex, parse_version_range, version_key
+
+
+def test_version_key_orders_numerically():
+    versions = ["1.10", "1.9", "1.0.1", "1.0", "2.0.beta", "2.0"]
+
+    # Like rez, a version is lower than its extensions.
+    assert sorted(versions, key=version_key) == ["1.0", "1.0.1", "1.9", "1.10", "2.0", "2.0.beta"]
+    assert version_key("1-2_3") == version_key("1.2.3")
+
+
+@pytest.mark.parametrize("version_range, matching, not_matching", [
+    ("1.0", ["1.0", "1.0.5"], ["1.01", "1.1", "0.9"]),
+    ("==1.0", ["1.0"], ["1.0.5"]),
+    (">=1.2", ["1.2", "1.10"], ["1.1"]),
+    (">1.2", ["1.2.1"], ["1.2"]),
+    ("<=2.0", ["2.0", "1.9"], ["2.0.1"]),
+    ("<2.0", ["1.99"], ["2.0"]),
+    ("1.0+", ["1.0", "3.0"], ["0.9"]),
+    ("1.0+<2.0", ["1.0", "1.9.9"], ["2.0", "0.1"]),
+    ("1.0..2.0", ["1.0", "2.0"], ["2.0.1"]),
+    (">=1.0, <1.5", ["1.4"], ["1.5"]),
+])
+def test_parse_version_range(version_range, matching, not_matching):
+    in_range = parse_version_range(version_range)
+
+    assert all(in_range(version) for version in matching)
+    assert not any(in_range(version) for version in not_matching)
+
+
+@pytest.mark.parametrize("version_range", ["1.0+2.0", "~1.0"])
+def test_parse_version_range_invalid(version_range):
+    with pytest.raises(ValueError):
+        parse_version_range(version_range)
+
+
+def _write_package(folder, content="name = 'pkg'\n"):
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, "package.py"), "w") as file:
+        file.write(content)
+
+
+def test_index_find_and_refresh(tmp_path):
+    root = tmp_path / "packages"
+    _write_package(str(root / "pkg" / "1.0"))
+    _write_package(str(root / "pkg" / "1.10"))
+    _write_package(str(root / "other" / "2.0"))
+    (root / "pkg" / "2.0").mkdir()
+    (root / "pkg" / ".staging-1.0").mkdir()
+
+    index = PackageIndex(str(root), str(tmp_path / "index.json"))
+    assert index.refresh() == 2
+    assert [entry["version"] for entry in index.find("pkg")] == ["1.0", "1.10"]
+    assert index.latest("pkg")["version"] == "1.10"
+    assert index.latest("pkg", version_range="<1.5")["version"] == "1.0"
+
+    # Nothing changed: nothing is rescanned, the saved index is reused.
+    assert PackageIndex(str(root), str(tmp_path / "index.json")).refresh() == 0
+
+    # A package file written in a version folder indexed without one (pending).
+    _write_package(str(root / "pkg" / "2.0"))
+    assert index.refresh() == 1
+    assert index.latest("pkg")["version"] == "2.0"
+
+
+def test_index_deep_refresh_detects_edits(tmp_path):
+    root = tmp_path / "packages"
+    _write_package(str(root / "pkg" / "1.0"))
+    index = PackageIndex(str(root), str(tmp_path / "index.json"))
+    index.refresh()
+
+    _write_package(str(root / "pkg" / "1.0"), "name = 'pkg'\nversion = '1.0'\n")
+
+    assert index.refresh() == 0
+    assert index.refresh(deep=True) == 1
+    assert index.find("pkg")[0]["size"] == os.path.getsize(root / "pkg" / "1.0" / "package.py")
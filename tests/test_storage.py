@@ -0,0 +1,98 @@
+# regular import
+import os
+import threading
+import time
+
+import pytest
+
+# custom packages import
+import k_launcher_storage
+from k_launcher_storage import ShardedContextStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ShardedContextStore(str(tmp_path / "package_context"))
+
+
+def test_update_merges_and_remove_deletes_the_lock(store):
+    store.update("1-2-host", {"package": "maya"})
+    store.update("1-2-host", {"config": "anim"})
+
+    assert store.load("1-2-host") == {"package": "maya", "config": "anim"}
+    assert store.sessions() == ["1-2-host"]
+
+    store.remove("1-2-host")
+
+    assert store.load("1-2-host") is None
+    if os.name != "nt":
+        assert os.listdir(store.folder) == []
+
+
+@pytest.mark.skipif(os.name == "nt", reason="lock files are only removed on POSIX")
+def test_waiter_relocks_a_removed_lock_file(store):
+    path = store.shard_path("session")
+    os.makedirs(store.folder)
+    holding = threading.Event()
+    released = threading.Event()
+
+    def waiter():
+        with k_launcher_storage.file_lock(path):
+            holding.set()
+            released.wait(5)
+
+    with k_launcher_storage.file_lock(path, remove_lock=True):
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        time.sleep(0.2)
+
+    assert holding.wait(5)
+    # The waiter holds the recreated lock file: nobody else gets the lock.
+    with pytest.raises(TimeoutError):
+        with k_launcher_storage.file_lock(path, timeout=0.1):
+            pass
+    released.set()
+    thread.join()
+
+
+def test_remove_orphan_locks(store):
+    os.makedirs(store.folder)
+    store.update("alive", {})
+    old_orphan = store.shard_path("gone") + ".lock"
+    new_orphan = store.shard_path("recent") + ".lock"
+    for lock_path in (old_orphan, new_orphan, store.shard_path("alive") + ".lock"):
+        open(lock_path, "a").close()
+    os.utime(old_orphan, (0, 0))
+
+    assert store.remove_orphan_locks(max_age=3600) == 1
+
+    assert sorted(os.listdir(store.folder)) == ["alive.json", "alive.json.lock", "recent.json.lock"]
+
+
+def test_migrate_legacy(tmp_path):
+    legacy_file = str(tmp_path / "package_context")
+    k_launcher_storage.atomic_write_json(legacy_file, {
+        "None": {"package": "shared"},
+        "1234": {"package": "maya"},
+        "5678-1700000000": {"package": "nuke"},
+    })
+    os.utime(legacy_file, (1000, 1000))
+    store = ShardedContextStore(legacy_file, legacy_skipped=("None",))
+
+    shards = store.scan()
+
+    assert sorted(session_id for session_id, _path, _size, _mtime in shards) == ["1234", "5678-1700000000"]
+    # The shards age from the last save of the legacy file, not from the migration.
+    assert all(mtime == 1000 for _session_id, _path, _size, mtime in shards)
+    assert store.load("1234") == {"package": "maya"}
+    assert not os.path.exists(legacy_file)
+    assert os.path.exists(legacy_file + ".migrated")
+
+
+def test_migrate_legacy_keeps_existing_shards(tmp_path):
+    legacy_file = str(tmp_path / "package_context")
+    store = ShardedContextStore(legacy_file)
+    store.update("1234", {"package": "houdini"})
+    k_launcher_storage.atomic_write_json(legacy_file, {"1234": {"package": "maya"}})
+
+    assert ShardedContextStore(legacy_file).load("1234") == {"package": "houdini"}
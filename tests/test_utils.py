@@ -0,0 +1,206 @@
+# regular import
+import os
+
+import pytest
+
+# custom packages import
+import k_launcher_utils
+from k_constants import CONSTANTS
+
+
+def _write(path, content="data"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        file.write(content)
+
+
+def _read(path):
+    with open(path) as file:
+        return file.read()
+
+
+def _tree(folder):
+    return sorted(
+        os.path.relpath(os.path.join(root, name), folder).replace(os.sep, "/")
+        for root, dirs, files in os.walk(folder) for name in dirs + files
+    )
+
+
+@pytest.mark.parametrize("request_, expected", [
+    ("iter", ("iter", None)),
+    ("iter-1.1.0", ("iter", "1.1.0")),
+    ("iter-", ("iter", None)),
+    ("iter-1.0-beta", ("iter", "1.0-beta")),
+])
+def test_split_package_request(request_, expected):
+    assert k_launcher_utils.split_package_request(request_) == expected
+
+
+def test_sync_tree_copies_then_skips(tmp_path):
+    src, dst = str(tmp_path / "src"), str(tmp_path / "dst")
+    _write(os.path.join(src, "package.py"), "name = 'pkg'")
+    _write(os.path.join(src, "python", "module.py"), "x = 1")
+    progress = []
+
+    stats = k_launcher_utils.sync_tree(src, dst, progress=lambda *args: progress.append(args))
+
+    assert _tree(dst) == _tree(src)
+    assert stats["files_copied"] == 2 and stats["files_skipped"] == 0
+    assert stats["bytes_copied"] == len("name = 'pkg'") + len("x = 1")
+    assert [transferred for _path, _size, transferred in progress] == [True, True]
+
+    stats = k_launcher_utils.sync_tree(src, dst)
+
+    assert stats["files_copied"] == 0 and stats["files_skipped"] == 2
+
+
+def test_sync_tree_replaces_changed_files(tmp_path):
+    src, dst = str(tmp_path / "src"), str(tmp_path / "dst")
+    _write(os.path.join(src, "file.txt"), "new content")
+    _write(os.path.join(dst, "file.txt"), "old")
+
+    stats = k_launcher_utils.sync_tree(src, dst)
+
+    assert stats["files_copied"] == 1
+    assert _read(os.path.join(dst, "file.txt")) == "new content"
+
+
+def test_sync_tree_removes_destination_only_entries(tmp_path):
+    src, dst = str(tmp_path / "src"), str(tmp_path / "dst")
+    _write(os.path.join(src, "keep.txt"))
+    _write(os.path.join(src, "sub", "keep.txt"))
+    _write(os.path.join(src, "was_folder"))
+    os.makedirs(os.path.join(src, "was_file"))
+    _write(os.path.join(dst, "extra.txt"))
+    _write(os.path.join(dst, "sub", "extra.txt"))
+    _write(os.path.join(dst, "old", "deep", "extra.txt"))
+    _write(os.path.join(dst, "was_folder", "inner.txt"))
+    _write(os.path.join(dst, "was_file"))
+
+    stats = k_launcher_utils.sync_tree(src, dst)
+
+    assert _tree(dst) == _tree(src)
+    assert stats["files_removed"] == 5
+
+
+def test_sync_tree_keep_extra(tmp_path):
+    src, dst = str(tmp_path / "src"), str(tmp_path / "dst")
+    _write(os.path.join(src, "file.txt"))
+    _write(os.path.join(dst, "extra.txt"))
+    _write(os.path.join(dst, "old", "extra.txt"))
+
+    stats = k_launcher_utils.sync_tree(src, dst, keep_extra=True)
+
+    assert _tree(dst) == ["extra.txt", "file.txt", "old", "old/extra.txt"]
+    assert stats["files_removed"] == 0
+
+
+@pytest.mark.skipif(os.name == "nt", reason="symlinks need privileges on Windows")
+def test_sync_tree_removes_symlinks_without_following_them(tmp_path):
+    src, dst = str(tmp_path / "src"), str(tmp_path / "dst")
+    outside = str(tmp_path / "outside")
+    _write(os.path.join(src, "file.txt"))
+    _write(os.path.join(outside, "precious.txt"))
+    os.makedirs(dst)
+    os.symlink(outside, os.path.join(dst, "link"))
+
+    k_launcher_utils.sync_tree(src, dst)
+
+    assert _tree(dst) == ["file.txt"]
+    assert os.path.exists(os.path.join(outside, "precious.txt"))
+
+
+def test_sync_tree_hardlink(tmp_path):
+    src, dst = str(tmp_path / "src"), str(tmp_path / "dst")
+    _write(os.path.join(src, "file.txt"))
+
+    stats = k_launcher_utils.sync_tree(src, dst, link="hardlink")
+
+    assert stats["files_linked"] == 1
+    assert os.path.samefile(os.path.join(src, "file.txt"), os.path.join(dst, "file.txt"))
+
+
+def test_grab_package_to_local(tmp_path, monkeypatch):
+    prod, local = str(tmp_path / "PROD"), str(tmp_path / "LOCAL")
+    monkeypatch.setattr(CONSTANTS, "rootParseFolder", prod)
+    monkeypatch.setattr(CONSTANTS, "rootLocalFolder", local)
+    _write(os.path.join(prod, "pkg", "1.0", "package.py"))
+    _write(os.path.join(prod, "pkg", "2.0", "package.py"))
+    os.makedirs(os.path.join(prod, "pkg", "3.0"))
+    _write(os.path.join(local, "pkg", "1.0", "local_edit.py"))
+    _write(os.path.join(local, "pkg", "0.9", "package.py"))
+
+    stats = k_launcher_utils.grab_package_to_local("pkg")
+
+    # Released versions only, LOCAL files of a grabbed version removed, LOCAL versions kept.
+    assert _tree(os.path.join(local, "pkg")) == [
+        "0.9", "0.9/package.py", "1.0", "1.0/package.py", "2.0", "2.0/package.py",
+    ]
+    assert stats["files_copied"] == 2 and stats["files_removed"] == 1
+
+    assert k_launcher_utils.grab_package_to_local("missing") is None
+
+
+@pytest.fixture
+def release_tree(tmp_path):
+    """
+    A LOCAL version folder and the PROD package folder it is released into.
+    """
+    local = str(tmp_path / "LOCAL" / "pkg" / "1.0.0")
+    _write(os.path.join(local, "package.py"), "name = 'pkg'\nversion = '1.0.0'\n")
+    _write(os.path.join(local, "python", "module.py"), "x = 1\n")
+    return local, str(tmp_path / "PROD" / "pkg")
+
+
+def test_release_package(release_tree):
+    local, prod_root = release_tree
+    prod = os.path.join(prod_root, "1.0.1")
+
+    assert k_launcher_utils.release_package(local, prod)
+
+    assert _tree(prod) == ["package.py", "python", "python/module.py"]
+    assert "version = '1.0.1'" in _read(os.path.join(prod, "package.py"))
+    # Nothing left behind: no staging folder, no backup of a first release.
+    assert os.listdir(prod_root) == ["1.0.1"]
+
+
+def test_release_package_missing_source(release_tree, tmp_path):
+    _local, prod_root = release_tree
+
+    assert not k_launcher_utils.release_package(str(tmp_path / "missing"), os.path.join(prod_root, "1.0.1"))
+    assert not os.path.exists(prod_root)
+
+
+def test_release_over_existing_version_and_rollback(release_tree):
+    local, prod_root = release_tree
+    prod = os.path.join(prod_root, "1.0.1")
+    assert k_launcher_utils.release_package(local, prod)
+
+    _write(os.path.join(local, "python", "module.py"), "x = 2\n")
+    assert k_launcher_utils.release_package(local, prod)
+
+    assert _read(os.path.join(prod, "python", "module.py")) == "x = 2\n"
+    assert len(k_launcher_utils._release_backups(prod)) == 1
+
+    assert k_launcher_utils.rollback_release(prod)
+
+    assert _read(os.path.join(prod, "python", "module.py")) == "x = 1\n"
+    assert k_launcher_utils._release_backups(prod) == []
+    assert os.listdir(prod_root) == ["1.0.1"]
+
+    assert not k_launcher_utils.rollback_release(prod)
+
+
+def test_release_keeps_release_backups(release_tree, monkeypatch):
+    local, prod_root = release_tree
+    prod = os.path.join(prod_root, "1.0.1")
+    monkeypatch.setattr(k_launcher_utils, "RELEASE_BACKUPS", 2)
+
+    for content in range(4):
+        _write(os.path.join(local, "python", "module.py"), f"x = {content}\n")
+        assert k_launcher_utils.release_package(local, prod)
+
+    backups = k_launcher_utils._release_backups(prod)
+    assert len(backups) == 2
+    # The most recent backup holds the previous release.
+    assert _read(os.path.join(backups[0], "python", "module.py")) == "x = 2\n"